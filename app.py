@@ -1,60 +1,480 @@
-from flask import Flask, send_from_directory, request, jsonify
+from collections import namedtuple
+from flask import Flask, Response, request
 from flask_cors import CORS
-import json
+import functools
+import time
 import okey_ai
+import okey_metrics
+from okey_policy import get_policy
+from okey_pool import SimulationPool
+from okey_session import SessionNotFound, SessionStore
+from okey_encoding import compress, compress_stream, dumps, guarded_lines, negotiate
+from okey_store import EvaluationStore
+from okey_tiles import (face_type, parse_tile, parse_tiles, parse_indicator, tile_to_dict, tiles_to_dicts,
+                        tile_key)
 import os
 
 app = Flask(__name__)
 CORS(app)
 
-# Global AI instance
-ai_engine = okey_ai.OkeyAI()
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public')
+
+# Global AI instance (simülasyonlar kalıcı süreç havuzunda çalışır)
+store = EvaluationStore.from_env()
+ai_engine = okey_ai.OkeyAI(simulation_pool=SimulationPool.from_env(), store=store)
+
+# Worker açılışında önbellek kalıcı depodaki son dizilimlerle doldurulur
+if store is not None:
+    store.warm(ai_engine.evaluation_cache)
+
+# Oyun oturumları: el bir kez gönderilir, sonra sadece değişiklikler
+sessions = SessionStore.from_env()
+
+# /metrics çıktısına önbellek sayaçları
+okey_metrics.register_cache('evaluator', ai_engine.cache_stats)
+okey_metrics.register_cache('sessions', sessions.stats)
+if store is not None:
+    okey_metrics.register_cache('store', store.stats)
+
+# Tek istekte izin verilen en fazla simülasyon örneği
+MAX_SIMULATIONS = 20000
+
+# Toplu analizde tek istekte izin verilen en fazla el
+MAX_BATCH_HANDS = 10000
+
+# İstekte politika verilmezse kullanılan atış politikası (boş: heuristic)
+DEFAULT_POLICY = os.environ.get('OKEY_POLICY')
+
+def _parse_payload(data):
+    """İstek gövdesini motorun tamsayı taş kodlarına çevir"""
+    tiles = parse_tiles(data.get('tiles', []))
+    indicator = parse_indicator(data.get('indicator', {}))
+    discarded_tiles = parse_tiles(data.get('discarded_tiles', []))
+    return tiles, discarded_tiles, indicator
+
+def _parse_history(data):
+    """Atılan taş geçmişi: [{'player': rakip (0 = sıradaki), 'tile': taş}, ...]"""
+    return [(int(entry['player']), parse_tile(entry['tile'])) for entry in data.get('discard_history', [])]
+
+def _parse_events(events):
+    """Oturum olayları: [{'type': 'draw' | 'discard' | 'opponent_discard', 'tile': taş,
+    'player': rakip, 'from_discard': yerden mi}, ...]"""
+    return [{
+        'type': event['type'],
+        'tile': parse_tile(event['tile']),
+        'player': None if event.get('player') is None else int(event['player']),
+        'from_discard': bool(event.get('from_discard', False))
+    } for event in events]
+
+# Yanıttaki taş biçimi: tek taş, taş listesi ve taş anahtarı
+TileFormat = namedtuple('TileFormat', ('tile', 'tiles', 'key'))
+# Ayrıntılı: {'color', 'number', 'is_okey'} sözlükleri ve 'renk_sayı' anahtarları
+VERBOSE = TileFormat(tile_to_dict, tiles_to_dicts, tile_key)
+# Kısa (compact): motorun tamsayı kodları (okey_tiles), anahtarlar taş tipinin metni
+COMPACT = TileFormat(int, list, lambda code: str(face_type(code)))
+
+# Kısa biçimde ondalık basamak sayısı
+COMPACT_DIGITS = 4
+
+def _parse_format(data):
+    """İstekte "compact": true ise kısa biçim"""
+    return COMPACT if data.get('compact') else VERBOSE
+
+def _lean(value):
+    """Kısa biçim: boş (None, [], {}) alanları çıkar, ondalıkları yuvarla"""
+    if isinstance(value, dict):
+        return {k: _lean(v) for k, v in value.items() if v is not None and v != [] and v != {}}
+    if isinstance(value, list):
+        return [_lean(v) for v in value]
+    if isinstance(value, float):
+        return round(value, COMPACT_DIGITS)
+    return value
+
+def _arrangement_to_json(arrangement, fmt=VERBOSE):
+    """Dizilim sonucunu JSON'a çevir"""
+    return {
+        'pers': [fmt.tiles(per) for per in arrangement['pers']],
+        'score': arrangement['score'],
+        'unused_tiles': fmt.tiles(arrangement['unused_tiles']),
+        'total_tiles_used': arrangement['total_tiles_used']
+    }
+
+def _keyed_to_json(values, fmt=VERBOSE):
+    """Taş tipi anahtarlı sözlüğü 'renk_sayı' (kısa biçimde tip) anahtarlı sözlüğe çevir"""
+    return {fmt.key(t): v for t, v in values.items()}
+
+def _suggestion_to_json(result, fmt=VERBOSE):
+    """Taş önerisini JSON'a çevir"""
+    result = dict(result)
+    if result['tile'] is not None:
+        result['tile'] = fmt.tile(result['tile'])
+    return result
+
+def _simulation_to_json(result, fmt=VERBOSE):
+    """Simülasyon sonucunu JSON'a çevir"""
+    result = dict(result)
+    result['best_moves'] = [dict(move, move=fmt.key(move['move'])) for move in result['best_moves']]
+    result['risk_assessment'] = _keyed_to_json(result['risk_assessment'], fmt)
+    return result
+
+def _what_ifs_to_json(result, fmt=VERBOSE):
+    """Atış/çekiş senaryolarını JSON'a çevir"""
+    return {
+        'score': result['score'],
+        'discards': [dict(move, tile=fmt.tile(move['tile'])) for move in result['discards']],
+        'draw_scores': _keyed_to_json(result['draw_scores'], fmt)
+    }
+
+def _outs_list_to_json(outs, fmt=VERBOSE):
+    return [dict(out, tile=fmt.tile(out['tile'])) for out in outs]
+
+def _outs_to_json(result, fmt=VERBOSE):
+    """Çıkış (outs) analizini JSON'a çevir"""
+    result = dict(result, outs=_outs_list_to_json(result['outs'], fmt))
+    result['discards'] = [dict(entry, tile=fmt.tile(entry['tile']), outs=_outs_list_to_json(entry['outs'], fmt))
+                          for entry in result['discards']]
+    return result
+
+def _opening_to_json(result, fmt=VERBOSE):
+    """Açma aramasını JSON'a çevir"""
+    return dict(result, pers=dict(
+        result['pers'],
+        pers=[fmt.tiles(per) for per in result['pers']['pers']],
+        remaining=fmt.tiles(result['pers']['remaining'])
+    ), pairs=dict(
+        result['pairs'],
+        pairs=[fmt.tiles(pair) for pair in result['pairs']['pairs']],
+        remaining=fmt.tiles(result['pairs']['remaining'])
+    ))
+
+# Tur sonucundaki her alanın JSON dönüşümü
+FIELD_CONVERTERS = {
+    'best_arrangement': _arrangement_to_json,
+    'tile_values': _keyed_to_json,
+    'opponent_prediction': lambda result, fmt: {k: fmt.tiles(v) for k, v in result.items()},
+    'risk_analysis': _keyed_to_json,
+    'recommendations': lambda result, fmt: result,
+    'suggestion': _suggestion_to_json,
+    'what_ifs': _what_ifs_to_json,
+    'outs': _outs_to_json,
+    'opening': _opening_to_json,
+    'simulation': _simulation_to_json
+}
+
+def _shaped(result, fmt):
+    """Kısa biçimde boş alanları çıkar, ayrıntılı biçimde olduğu gibi bırak"""
+    return _lean(result) if fmt is COMPACT else result
+
+def _fields_to_json(result, fmt=VERBOSE):
+    """Alan seçimli sonucu JSON'a çevir"""
+    return _shaped({field: FIELD_CONVERTERS[field](value, fmt) for field, value in result.items()}, fmt)
+
+def _analysis_to_json(result, fmt=VERBOSE):
+    """El analizi sonucunu JSON'a çevir"""
+    return _fields_to_json(result, fmt)
+
+def _simulation_options(data):
+    """Simülasyon bütçesini oku (örnek sayısı, milisaniye ve/veya güven genişliği)"""
+    seed = data.get('seed')
+    time_budget_ms = data.get('time_budget_ms')
+    target_ci_width = data.get('target_ci_width')
+    return {
+        'num_simulations': min(int(data.get('num_simulations', 2000)), MAX_SIMULATIONS),
+        'seed': None if seed is None else int(seed),
+        'time_budget_ms': None if time_budget_ms is None else float(time_budget_ms),
+        'target_ci_width': None if target_ci_width is None else float(target_ci_width)
+    }
+
+def parse_policy(data):
+    """Atış politikası: istekteki 'policy' (heuristic | rollout | search) ya da OKEY_POLICY"""
+    return get_policy(data.get('policy') or DEFAULT_POLICY)
+
+def parse_fields(fields):
+    """Alan seçicisini oku (liste ya da virgülle ayrılmış metin, boş → varsayılan)"""
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    return [field.strip() for field in fields if field.strip()]
+
+def _instrumented(endpoint):
+    """İşleyiciyi ölç; istek gövdesinde "timings": true ise yanıta aşama süreleri (ms) eklenir"""
+    def wrap(handler):
+        @functools.wraps(handler)
+        def run(*args):
+            data = args[-1] if args and isinstance(args[-1], dict) else {}
+            with okey_metrics.request(endpoint) as timings:
+                result = handler(*args)
+            if data.get('timings'):
+                result = dict(result, timings=timings)
+            return result
+        return run
+    return wrap
+
+# Uç noktaların çerçeveden bağımsız işleyicileri (Flask ve ASGI kipi ortak kullanır)
+
+@_instrumented('analyze')
+def analyze_json(data):
+    """El analizi"""
+    tiles, discarded_tiles, indicator = _parse_payload(data)
+    result = ai_engine.analyze_hand(tiles, discarded_tiles, indicator, _parse_history(data))
+    return _analysis_to_json(result, _parse_format(data))
+
+@_instrumented('suggest_tile')
+def suggest_tile_json(data):
+    """Taş önerisi"""
+    tiles, discarded_tiles, indicator = _parse_payload(data)
+    result = ai_engine.suggest_best_tile(tiles, discarded_tiles, indicator,
+                                         discard_history=_parse_history(data),
+                                         policy=parse_policy(data))
+    fmt = _parse_format(data)
+    return _shaped(_suggestion_to_json(result, fmt), fmt)
+
+@_instrumented('can_open')
+def can_open_json(data):
+    """El açılabilir mi (perle 101 ya da en az beş çift); en iyi dizilim aranmaz"""
+    tiles, _, indicator = _parse_payload(data)
+    return ai_engine.can_open(tiles, indicator)
+
+@_instrumented('simulate')
+def simulate_json(data):
+    """Monte Carlo simülasyonu (bütçe: örnek sayısı, milisaniye ve/veya güven genişliği)"""
+    tiles, discarded_tiles, indicator = _parse_payload(data)
+    result = ai_engine.monte_carlo_simulation(tiles, discarded_tiles, indicator,
+                                              discard_history=_parse_history(data),
+                                              **_simulation_options(data))
+    fmt = _parse_format(data)
+    return _shaped(_simulation_to_json(result, fmt), fmt)
+
+def simulate_lines(data):
+    """Akışlı simülasyon: her örnek turundan sonra bir NDJSON satırı üreten iteratör
+
+    Ara satırlarda ``stopped`` null'dır, son satırda durma nedenidir. Girdi
+    hemen doğrulanır. İstemci ayrılınca iteratör kapatılır ve simülasyon
+    sonraki turda durur.
+    """
+    tiles, discarded_tiles, indicator = _parse_payload(data)
+    fmt = _parse_format(data)
+    results = ai_engine.monte_carlo_stream(tiles, discarded_tiles, indicator,
+                                           discard_history=_parse_history(data),
+                                           **_simulation_options(data))
+    
+    def generate():
+        # Akış farklı iş parçacıklarında ilerleyebilir; sadece süre ve sayaç tutulur
+        start, status = time.perf_counter(), 'cancelled'
+        try:
+            for result in results:
+                yield dumps(_shaped(_simulation_to_json(result, fmt), fmt)) + b'\n'
+            status = 'ok'
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            results.close()
+            okey_metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint='simulate_stream')
+            okey_metrics.REQUESTS.inc(endpoint='simulate_stream', status=status)
+    
+    return generate()
+
+@_instrumented('turn')
+def turn_json(data):
+    """Tek geçişte analiz, öneri ve istenirse simülasyon (fields ile alan seçimi)"""
+    tiles, discarded_tiles, indicator = _parse_payload(data)
+    result = ai_engine.play_turn(
+        tiles, discarded_tiles, indicator,
+        fields=parse_fields(data.get('fields')),
+        simulation_options=_simulation_options(data.get('simulation') or {}),
+        discard_history=_parse_history(data),
+        policy=parse_policy(data)
+    )
+    return _fields_to_json(result, _parse_format(data))
+
+def analyze_batch_lines(data):
+    """Toplu analiz: el başına bir NDJSON satırı üreten iteratör
+
+    Girdi hemen doğrulanır; geçersiz eller akışta hata satırı olur, diğerleri
+    toplu analiz edilir.
+    """
+    hands = data.get('hands', [])
+    if len(hands) > MAX_BATCH_HANDS:
+        raise ValueError(f"Tek istekte en fazla {MAX_BATCH_HANDS} el gönderilebilir")
+    
+    parsed, errors = [], {}
+    for i, hand in enumerate(hands):
+        try:
+            parsed.append(_parse_payload(hand))
+        except Exception as e:
+            parsed.append(None)
+            errors[i] = str(e)
+    fmt = _parse_format(data)
+    
+    def generate():
+        # Akış farklı iş parçacıklarında ilerleyebilir; sadece süre ve sayaç tutulur
+        start = time.perf_counter()
+        results = ai_engine.analyze_many(hand for hand in parsed if hand is not None)
+        for index, hand in enumerate(parsed):
+            if hand is None:
+                line = {'index': index, 'error': errors[index]}
+            else:
+                line = dict(_analysis_to_json(next(results), fmt), index=index)
+            yield dumps(line) + b'\n'
+        okey_metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint='analyze_batch')
+        okey_metrics.REQUESTS.inc(endpoint='analyze_batch', status='ok')
+    
+    return generate()
+
+@_instrumented('session_create')
+def session_create_json(data):
+    """Oturum aç (el, gösterge, atılan taşlar ve geçmiş bir kez gönderilir)"""
+    tiles, discarded_tiles, indicator = _parse_payload(data)
+    session_id, session = sessions.create(tiles, discarded_tiles, indicator, _parse_history(data))
+    return {'session_id': session_id, 'session': session.state()}
+
+@_instrumented('session_turn')
+def session_turn_json(session_id, data):
+    """Oturuma olayları uygula, turu oturumun durumundan hesapla
+
+    Durum değişmeden tekrarlanan sorgu (simülasyon hariç) önbellekten döner.
+    """
+    session = sessions.get(session_id)
+    fields = parse_fields(data.get('fields'))
+    policy = parse_policy(data)
+    events = _parse_events(data.get('events', []))
+    fmt = _parse_format(data)
+    
+    def compute():
+        result = ai_engine.play_turn(
+            session.tiles, session.discarded_tiles, session.indicator,
+            fields=fields,
+            simulation_options=_simulation_options(data.get('simulation') or {}),
+            discard_history=session.discard_history,
+            policy=policy,
+            # Oturumun olay başına güncellenen rakip modeli ve sayımları yeniden kurulmaz
+            model=session.model,
+            player_counts=session.hand_counts
+        )
+        return _fields_to_json(result, fmt)
+    
+    with session.lock:
+        session.apply(events)
+        if fields and 'simulation' in fields:
+            result = compute()
+        else:
+            result = session.cached((tuple(fields or ()), policy.name, fmt is COMPACT), compute)
+        return dict(result, session=session.state())
+
+@_instrumented('session_delete')
+def session_delete_json(session_id, data=None):
+    """Oturumu kapat"""
+    sessions.delete(session_id)
+    return {'closed': session_id}
+
+def _encoded_response(body, mimetype, encoding, status=200):
+    """Gövdesi verilen kodlamayla sıkıştırılmış yanıt"""
+    response = Response(body, status=status, mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def _json(payload, status=200):
+    """JSON yanıtı (hızlı serileştirici; büyük gövde istemci kabul ediyorsa sıkıştırılır)"""
+    body = dumps(payload)
+    encoding = negotiate(request.headers.get('Accept-Encoding'), len(body))
+    return _encoded_response(compress(body, encoding), 'application/json', encoding, status)
+
+def _ndjson(lines):
+    """NDJSON akış yanıtı (istemci kabul ediyorsa satır satır sıkıştırılır, hata son satır olur)"""
+    encoding = negotiate(request.headers.get('Accept-Encoding'))
+    return _encoded_response(compress_stream(guarded_lines(lines), encoding), 'application/x-ndjson', encoding)
+
+@functools.lru_cache(maxsize=None)
+def static_variants(name):
+    """public/ altındaki dosyanın ham ve önceden sıkıştırılmış halleri (kodlama → gövde)"""
+    with open(os.path.join(STATIC_DIR, name), 'rb') as f:
+        body = f.read()
+    return {encoding: compress(body, encoding) for encoding in (None, 'gzip', 'br')
+            if encoding is None or negotiate(encoding) == encoding}
 
 @app.route('/')
 def index():
-    return send_from_directory('public', 'index.html')
+    variants = static_variants('index.html')
+    encoding = negotiate(request.headers.get('Accept-Encoding'), len(variants[None]))
+    return _encoded_response(variants[encoding], 'text/html', encoding)
+
+@app.route('/metrics')
+def metrics():
+    # Prometheus metin biçimi: aşama süreleri, istek sayaçları, önbellek isabetleri
+    return Response(okey_metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/analyze', methods=['POST'])
 def analyze():
     try:
-        data = request.get_json()
-        tiles = data.get('tiles', [])
-        indicator = data.get('indicator', {})
-        discarded_tiles = data.get('discarded_tiles', [])
-        
-        # AI analizi
-        result = ai_engine.analyze_hand(tiles, discarded_tiles, indicator)
-        return jsonify(result)
+        return _json(analyze_json(request.get_json()))
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 @app.route('/api/suggest_tile', methods=['POST'])
 def suggest_tile():
     try:
-        data = request.get_json()
-        tiles = data.get('tiles', [])
-        indicator = data.get('indicator', {})
-        discarded_tiles = data.get('discarded_tiles', [])
-        
-        # Taş önerisi
-        result = ai_engine.suggest_best_tile(tiles, discarded_tiles, indicator)
-        return jsonify(result)
+        return _json(suggest_tile_json(request.get_json()))
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
+
+@app.route('/api/can_open', methods=['POST'])
+def can_open():
+    try:
+        return _json(can_open_json(request.get_json()))
+    except Exception as e:
+        return _json({'error': str(e)}, 500)
 
 @app.route('/api/simulate', methods=['POST'])
 def simulate():
     try:
-        data = request.get_json()
-        tiles = data.get('tiles', [])
-        indicator = data.get('indicator', {})
-        discarded_tiles = data.get('discarded_tiles', [])
-        
-        # Monte Carlo simülasyonu
-        result = ai_engine.monte_carlo_simulation(tiles, discarded_tiles, indicator)
-        return jsonify(result)
+        return _json(simulate_json(request.get_json()))
+    except Exception as e:
+        return _json({'error': str(e)}, 500)
+
+@app.route('/api/simulate_stream', methods=['POST'])
+def simulate_stream():
+    try:
+        # Ara sonuçlar her örnek turundan sonra bir NDJSON satırı olarak gönderilir
+        return _ndjson(simulate_lines(request.get_json()))
+    except Exception as e:
+        return _json({'error': str(e)}, 500)
+
+@app.route('/api/turn', methods=['POST'])
+def turn():
+    try:
+        return _json(turn_json(request.get_json()))
+    except Exception as e:
+        return _json({'error': str(e)}, 500)
+
+@app.route('/api/analyze_batch', methods=['POST'])
+def analyze_batch():
+    try:
+        # Sonuçlar satır satır JSON (NDJSON) olarak, hazır oldukça gönderilir
+        return _ndjson(analyze_batch_lines(request.get_json()))
+    except Exception as e:
+        return _json({'error': str(e)}, 500)
+
+@app.route('/api/session', methods=['POST'])
+def session_create():
+    try:
+        return _json(session_create_json(request.get_json()))
+    except Exception as e:
+        return _json({'error': str(e)}, 500)
+
+@app.route('/api/session/<session_id>', methods=['POST', 'DELETE'])
+def session_turn(session_id):
+    try:
+        if request.method == 'DELETE':
+            return _json(session_delete_json(session_id))
+        return _json(session_turn_json(session_id, request.get_json(silent=True) or {}))
+    except SessionNotFound:
+        return _json({'error': 'Oturum bulunamadı ya da süresi doldu'}, 404)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=int(os.environ.get('PORT', 5000))) 
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -0,0 +1,312 @@
+"""Asenkron (ASGI) sunum kipi.
+
+İstekler olay döngüsünde karşılanır; motor çağrıları iki ayrı, sınırlı iş
+parçacığı havuzunda çalışır: ucuz uç noktalar (analiz, öneri, simülasyonsuz
+tur) ve pahalı uç noktalar (simülasyon, toplu analiz, simülasyonlu tur).
+Yavaş bir simülasyon böylece ucuz isteklerin kuyruğunu tıkamaz; simülasyonun
+kendisi yine kalıcı süreç havuzunda (okey_pool) çalışır.
+
+Her uç noktanın eşzamanlı istek sınırı vardır; sınır dolunca gelenler
+bekler, bekleyen sayısı da dolunca 503 ve ``Retry-After`` döner.
+
+İşleyiciler ve JSON dönüşümleri Flask uygulamasıyla (app.py) ortaktır.
+Çalıştırma: ``uvicorn asgi:app`` ya da
+``gunicorn asgi:app -k uvicorn.workers.UvicornWorker``.
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import app as handlers
+from okey_encoding import compress, compress_stream, dumps, guarded_lines, negotiate
+from okey_session import SessionNotFound
+
+log = logging.getLogger(__name__)
+
+CHEAP = 'cheap'
+EXPENSIVE = 'expensive'
+
+# Havuz başına iş parçacığı sayısı
+EXECUTOR_WORKERS = {
+    CHEAP: int(os.environ.get('OKEY_ASGI_CHEAP_WORKERS', 4)),
+    EXPENSIVE: int(os.environ.get('OKEY_ASGI_EXPENSIVE_WORKERS', 2))
+}
+
+# Oturum yolları: /api/session/<oturum>
+SESSION_PREFIX = '/api/session/'
+
+# Uç nokta başına eşzamanlı istek sınırı (sınırın iki katına kadar istek bekleyebilir)
+CONCURRENCY_LIMITS = {
+    '/api/analyze': 8,
+    '/api/suggest_tile': 8,
+    '/api/can_open': 8,
+    '/api/turn': 8,
+    '/api/simulate': 2,
+    '/api/simulate_stream': 2,
+    '/api/analyze_batch': 1,
+    '/api/session': 8,
+    SESSION_PREFIX: 8
+}
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-headers', b'Content-Type'),
+    (b'access-control-allow-methods', b'GET, POST, DELETE, OPTIONS')
+]
+
+
+# Sabit hata gövdeleri bir kez kodlanır
+NOT_FOUND_BODY = dumps({'error': 'Bulunamadı'})
+BUSY_BODY = dumps({'error': 'Sunucu meşgul, lütfen tekrar deneyin'})
+SESSION_GONE_BODY = dumps({'error': 'Oturum bulunamadı ya da süresi doldu'})
+
+
+class Overloaded(Exception):
+    """Uç noktanın bekleme kuyruğu dolu"""
+
+
+class EndpointLimiter:
+    """Eşzamanlı istek sınırı ve sınırlı bekleme kuyruğu"""
+
+    def __init__(self, limit: int, max_waiting: Optional[int] = None):
+        self.limit = limit
+        self.max_waiting = 2 * limit if max_waiting is None else max_waiting
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self):
+        # Semafor olay döngüsü içinde oluşturulur (Python 3.9 döngüye bağlar)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        if self._semaphore.locked():
+            if self.waiting >= self.max_waiting:
+                raise Overloaded()
+            self.waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
+
+
+def _policy_queue(data: Dict) -> str:
+    """Pahalı atış politikası (search) istenen öneri pahalı kuyruğa gider"""
+    return EXPENSIVE if handlers.parse_policy(data).expensive else CHEAP
+
+
+def _turn_queue(data: Dict) -> str:
+    """Simülasyon ya da pahalı politika istenen tur pahalı kuyruğa gider"""
+    fields = handlers.parse_fields(data.get('fields'))
+    return EXPENSIVE if fields and 'simulation' in fields else _policy_queue(data)
+
+
+# Yol → (kuyruk seçici, işleyici, akış mı)
+ROUTES: Dict[str, tuple] = {
+    '/api/analyze': (lambda data: CHEAP, handlers.analyze_json, False),
+    '/api/suggest_tile': (_policy_queue, handlers.suggest_tile_json, False),
+    '/api/can_open': (lambda data: CHEAP, handlers.can_open_json, False),
+    '/api/turn': (_turn_queue, handlers.turn_json, False),
+    '/api/simulate': (lambda data: EXPENSIVE, handlers.simulate_json, False),
+    '/api/simulate_stream': (lambda data: EXPENSIVE, handlers.simulate_lines, True),
+    '/api/analyze_batch': (lambda data: EXPENSIVE, handlers.analyze_batch_lines, True),
+    '/api/session': (lambda data: CHEAP, handlers.session_create_json, False)
+}
+
+
+def _session_route(method: str, session_id: str) -> Optional[tuple]:
+    """Oturum yolunun (kuyruk seçici, işleyici, akış mı) üçlüsü"""
+    if method == 'POST':
+        return _turn_queue, functools.partial(handlers.session_turn_json, session_id), False
+    if method == 'DELETE':
+        return (lambda data: CHEAP), functools.partial(handlers.session_delete_json, session_id), False
+    return None
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    """İstek başlığının değeri (yoksa None)"""
+    for key, value in scope.get('headers', []):
+        if key.lower() == name:
+            return value.decode('latin-1')
+    return None
+
+
+def _encoding_headers(encoding: Optional[str]) -> list:
+    """Sıkıştırılmış yanıtın başlıkları"""
+    headers = [(b'vary', b'Accept-Encoding')]
+    if encoding:
+        headers.append((b'content-encoding', encoding.encode()))
+    return headers
+
+
+def _encode(payload, accept: Optional[str]) -> tuple:
+    """Yükü serileştir, büyükse istemcinin kabul ettiği kodlamayla sıkıştır: (gövde, kodlama)"""
+    body = dumps(payload)
+    encoding = negotiate(accept, len(body))
+    return compress(body, encoding), encoding
+
+
+class OkeyASGI:
+    """Motor işleyicilerini olay döngüsünü bloklamadan sunan ASGI uygulaması"""
+
+    def __init__(self):
+        self.executors = {
+            queue: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'okey-{queue}')
+            for queue, workers in EXECUTOR_WORKERS.items()
+        }
+        self.limiters = {path: EndpointLimiter(limit) for path, limit in CONCURRENCY_LIMITS.items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        path, method = scope['path'], scope['method']
+        accept = _header(scope, b'accept-encoding')
+        if method == 'OPTIONS':
+            await self._respond(send, 204, b'')
+        elif method == 'GET' and path == '/':
+            await self._static(send, 'index.html', accept)
+        elif method == 'GET' and path == '/metrics':
+            await self._respond(send, 200, handlers.okey_metrics.REGISTRY.render().encode(),
+                                [(b'content-type', b'text/plain; version=0.0.4')])
+        elif method == 'POST' and path in ROUTES:
+            await self._api(path, ROUTES[path], receive, send, accept)
+        else:
+            route = _session_route(method, path[len(SESSION_PREFIX):]) if path.startswith(SESSION_PREFIX) else None
+            if route is None:
+                await self._json(send, 404, NOT_FOUND_BODY)
+            else:
+                await self._api(SESSION_PREFIX, route, receive, send, accept)
+
+    async def _lifespan(self, receive, send):
+        """Başlatma/kapatma olayları: kapanışta havuzları kapat"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for executor in self.executors.values():
+                    executor.shutdown(wait=False)
+                if handlers.ai_engine.simulation_pool is not None:
+                    handlers.ai_engine.simulation_pool.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _api(self, path: str, route: tuple, receive, send, accept: Optional[str] = None):
+        """API isteğini sınır altında, uç noktanın kuyruğunda çalıştır"""
+        choose_queue, handler, streaming = route
+        started = False
+
+        async def tracked_send(message):
+            nonlocal started
+            if message['type'] == 'http.response.start':
+                started = True
+            await send(message)
+
+        try:
+            async with self.limiters[path]:
+                data = json.loads(await self._read_body(receive) or b'{}')
+                executor = self.executors[choose_queue(data)]
+                result = await self._run(executor, handler, data)
+                if streaming:
+                    await self._stream(tracked_send, receive, executor, result, accept)
+                else:
+                    # Büyük yanıtların serileştirmesi ve sıkıştırması da havuzda
+                    body, encoding = await self._run(executor, _encode, result, accept)
+                    await self._json(tracked_send, 200, body, encoding=encoding)
+        except Exception as e:
+            if started:
+                # Başlık gitti (ör. istemci akış ortasında koptu): ikinci yanıt başlatılamaz
+                log.warning("%s: yanıt başladıktan sonra hata: %r", path, e)
+            elif isinstance(e, Overloaded):
+                await self._json(send, 503, BUSY_BODY, [(b'retry-after', b'1')])
+            elif isinstance(e, SessionNotFound):
+                await self._json(send, 404, SESSION_GONE_BODY)
+            else:
+                await self._json(send, 500, dumps({'error': str(e)}))
+
+    @staticmethod
+    async def _run(executor: ThreadPoolExecutor, fn: Callable, *args):
+        """Motor çağrısını havuzda çalıştır, olay döngüsünü bloklama"""
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        """İstek gövdesini oku"""
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                return body
+
+    async def _stream(self, send, receive, executor: ThreadPoolExecutor, lines, accept: Optional[str] = None):
+        """İteratörün satırlarını hazır oldukça gönder (NDJSON, istemci kabul ediyorsa sıkıştırılmış)
+
+        İstemci ayrılınca sonraki satır istenmez ve iteratör kapatılır; motor
+        o an çalışan adımı bitirip durur. Başlık gönderildikten sonra çıkan
+        hata ikinci bir yanıt başlatmaz: akış hata satırıyla biter.
+        """
+        encoding = negotiate(accept)
+        lines = compress_stream(guarded_lines(lines), encoding)
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'application/x-ndjson')] + _encoding_headers(encoding) + CORS_HEADERS
+        })
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        done = object()
+        try:
+            while not disconnected.done():
+                line = await self._run(executor, next, lines, done)
+                if line is done:
+                    await send({'type': 'http.response.body', 'body': b''})
+                    break
+                await send({'type': 'http.response.body', 'body': line, 'more_body': True})
+        finally:
+            disconnected.cancel()
+            close = getattr(lines, 'close', None)
+            if close is not None:
+                await self._run(executor, close)
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        """İstemci bağlantıyı kapatana kadar bekle"""
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def _static(self, send, name: str, accept: Optional[str] = None):
+        """public/ altındaki dosyayı gönder (sıkıştırılmış halleri bir kez hazırlanır)"""
+        variants = handlers.static_variants(name)
+        encoding = negotiate(accept, len(variants[None]))
+        await self._respond(send, 200, variants[encoding],
+                            [(b'content-type', b'text/html; charset=utf-8')] + _encoding_headers(encoding))
+
+    async def _json(self, send, status: int, body: bytes, headers=None, encoding: Optional[str] = None):
+        """Kodlanmış JSON gövdesini gönder"""
+        await self._respond(send, status, body, [(b'content-type', b'application/json')] +
+                            _encoding_headers(encoding) + (headers or []))
+
+    @staticmethod
+    async def _respond(send, status: int, body: bytes, headers=None):
+        """Tek parça yanıt gönder"""
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': (headers or []) + CORS_HEADERS
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+app = OkeyASGI()
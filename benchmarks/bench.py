@@ -0,0 +1,229 @@
+"""OkeyAI motoru kıyaslamaları ve gerileme kapısı.
+
+Her işlem (dizilim, analiz, öneri, simülasyon) × el türü × el boyu için
+tohumlu eller üzerinde ölçüm yapılır: saniyedeki işlem, p50/p99 süre ve
+çağrı başına en yüksek bellek ayırımı (tracemalloc). Durumun elleri önce
+bir kez ısınma için çalıştırılır; değerlendirme önbelleği her çağrıdan önce
+boşaltılır, yani ölçülen elin önbelleksiz değerlendirmesidir.
+
+Kullanım (proje dizininden)::
+
+    python benchmarks/bench.py                          # ölç ve yazdır
+    python benchmarks/bench.py --save benchmarks/baseline.json
+    python benchmarks/bench.py --compare benchmarks/baseline.json
+
+``--compare`` p50 süresi ya da bellek ayırımı eşiği aşan durumları
+yeniden ölçer; gerileme sürerse listeler ve 1 ile çıkar. Taban çizgisi
+makineye bağlıdır; karşılaştırma aynı makinede kaydedilmiş bir dosyayla
+yapılmalıdır.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hands import GENERATORS, Hand, hands  # noqa: E402
+from okey_ai import OkeyAI  # noqa: E402
+from okey_cache import LRUCache  # noqa: E402
+from okey_solver import EVALUATOR_CACHE  # noqa: E402
+
+HAND_SIZES = (14, 21, 22)
+SIMULATIONS = 500       # Simülasyon kıyaslamasında örnek sayısı
+ALLOC_HANDS = 5         # Bellek ölçümünde kullanılan el sayısı
+
+DEFAULT_THRESHOLD = 0.25        # p50 süresinde izin verilen artış oranı
+DEFAULT_ALLOC_THRESHOLD = 0.25  # Bellek ayırımında izin verilen artış oranı
+
+# Önbelleksiz motor: her çağrı eli baştan değerlendirir
+engine = OkeyAI(evaluation_cache=LRUCache(0))
+
+
+def _find_best_arrangement(hand: Hand):
+    tiles, _, indicator = hand
+    return engine._find_best_arrangement(tiles, indicator)
+
+
+def _analyze_hand(hand: Hand):
+    return engine.analyze_hand(*hand)
+
+
+def _suggest_best_tile(hand: Hand):
+    return engine.suggest_best_tile(*hand)
+
+
+def _monte_carlo_simulation(hand: Hand):
+    return engine.monte_carlo_simulation(*hand, num_simulations=SIMULATIONS, seed=0)
+
+
+# İşlem adı → (çağrı, el başına tekrar, el sayısı)
+OPERATIONS: Dict[str, tuple] = {
+    'find_best_arrangement': (_find_best_arrangement, 5, 40),
+    'analyze_hand': (_analyze_hand, 3, 40),
+    'suggest_best_tile': (_suggest_best_tile, 3, 40),
+    'monte_carlo_simulation': (_monte_carlo_simulation, 1, 5)
+}
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Sıralı örneklerde q yüzdeliği (en yakın sıra)"""
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _time_calls(fn: Callable, case_hands: List[Hand], repeat: int) -> List[float]:
+    """Çağrı başına süreler (ms); her çağrıdan önce önbellek boşaltılır"""
+    samples = []
+    for hand in case_hands:
+        for _ in range(repeat):
+            EVALUATOR_CACHE.clear()
+            start = time.perf_counter_ns()
+            fn(hand)
+            samples.append((time.perf_counter_ns() - start) / 1e6)
+    return samples
+
+
+def _peak_allocations(fn: Callable, case_hands: List[Hand]) -> float:
+    """Çağrı başına ortalama en yüksek bellek ayırımı (KiB)"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for hand in case_hands:
+            EVALUATOR_CACHE.clear()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            fn(hand)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks) / 1024
+
+
+def run_case(operation: str, kind: str, size: int, scale: float = 1.0, seed: int = 0) -> Dict:
+    """Tek bir durumu ölç"""
+    fn, repeat, count = OPERATIONS[operation]
+    case_hands = hands(kind, size, max(1, int(count * scale)), seed)
+    # Isınma: içe aktarmalar ve maske önbellekleri dolar, ölçüm sıradan bağımsız olur
+    _time_calls(fn, case_hands, 1)
+    samples = sorted(_time_calls(fn, case_hands, repeat))
+    return {
+        'ops_per_sec': round(len(samples) / (sum(samples) / 1000), 2),
+        'p50_ms': round(_percentile(samples, 50), 4),
+        'p99_ms': round(_percentile(samples, 99), 4),
+        'alloc_peak_kib': round(_peak_allocations(fn, case_hands[:ALLOC_HANDS]), 1),
+        'samples': len(samples)
+    }
+
+
+def run(operations: List[str], kinds: List[str], sizes: List[int],
+        scale: float = 1.0, seed: int = 0, log: Optional[Callable[[str], None]] = print) -> Dict:
+    """Tüm durumları ölç: {'meta': ..., 'results': {'işlem/tür/boy': ölçüm}}"""
+    results = {}
+    for operation in operations:
+        for kind in kinds:
+            for size in sizes:
+                key = f"{operation}/{kind}/{size}"
+                results[key] = run_case(operation, kind, size, scale, seed)
+                if log:
+                    r = results[key]
+                    log(f"{key:48s} {r['ops_per_sec']:>10.1f} op/s  p50 {r['p50_ms']:>9.3f} ms  "
+                        f"p99 {r['p99_ms']:>9.3f} ms  {r['alloc_peak_kib']:>9.1f} KiB")
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'seed': seed,
+            'scale': scale,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'results': results
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD,
+            alloc_threshold: float = DEFAULT_ALLOC_THRESHOLD) -> Dict[str, str]:
+    """Taban çizgisine göre gerileyen durumlar: {durum: açıklama} (boş: gerileme yok)"""
+    regressions = {}
+    for key, result in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        reasons = []
+        ratio = result['p50_ms'] / max(base['p50_ms'], 1e-9)
+        if ratio > 1 + threshold:
+            reasons.append(f"p50 {base['p50_ms']:.3f} → {result['p50_ms']:.3f} ms (×{ratio:.2f})")
+        alloc_ratio = result['alloc_peak_kib'] / max(base['alloc_peak_kib'], 1e-9)
+        if alloc_ratio > 1 + alloc_threshold:
+            reasons.append(f"bellek {base['alloc_peak_kib']:.1f} → "
+                           f"{result['alloc_peak_kib']:.1f} KiB (×{alloc_ratio:.2f})")
+        if reasons:
+            regressions[key] = ', '.join(reasons)
+    return regressions
+
+
+def remeasure(current: Dict, keys: List[str]):
+    """Geri kalan durumları yeniden ölç, daha hızlı koşuyu tut (anlık gürültüye karşı)"""
+    meta = current['meta']
+    for key in keys:
+        operation, kind, size = key.split('/')
+        result = run_case(operation, kind, int(size), meta['scale'], meta['seed'])
+        if result['p50_ms'] < current['results'][key]['p50_ms']:
+            current['results'][key] = result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="OkeyAI kıyaslamaları")
+    parser.add_argument('--ops', default=','.join(OPERATIONS), help="virgülle ayrılmış işlemler")
+    parser.add_argument('--kinds', default=','.join(GENERATORS), help="virgülle ayrılmış el türleri")
+    parser.add_argument('--sizes', default=','.join(map(str, HAND_SIZES)), help="virgülle ayrılmış el boyları")
+    parser.add_argument('--scale', type=float, default=1.0, help="el sayısı çarpanı (hızlı koşu için < 1)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help="sonuçları bu JSON dosyasına yaz")
+    parser.add_argument('--compare', help="bu taban çizgisine göre gerileme kontrolü yap")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--alloc-threshold', type=float, default=DEFAULT_ALLOC_THRESHOLD)
+    parser.add_argument('--retries', type=int, default=2,
+                        help="geri kalan durumların yeniden ölçülme sayısı")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        # Taban çizgisiyle aynı eller ölçülür
+        args.seed = baseline['meta']['seed']
+        args.scale = baseline['meta']['scale']
+
+    current = run(args.ops.split(','), args.kinds.split(','),
+                  [int(size) for size in args.sizes.split(',')], args.scale, args.seed)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if baseline is not None:
+        if baseline['meta'].get('machine') != current['meta']['machine']:
+            print("Uyarı: taban çizgisi başka bir makinede kaydedilmiş")
+        regressions = compare(current, baseline, args.threshold, args.alloc_threshold)
+        for _ in range(args.retries):
+            if not regressions:
+                break
+            remeasure(current, list(regressions))
+            regressions = compare(current, baseline, args.threshold, args.alloc_threshold)
+        for key, reason in regressions.items():
+            print(f"GERİLEME {key}: {reason}")
+        if regressions:
+            return 1
+        print("Gerileme yok")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
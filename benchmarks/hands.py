@@ -0,0 +1,108 @@
+"""Tohumlu el üreteçleri (kıyaslama için).
+
+Her üreteç ``(taşlar, atılan taşlar, gösterge)`` döndürür; aynı tohum ve el
+boyu her zaman aynı eli verir. Fiziksel sınırlara uyulur: her taş tipinden en
+fazla iki kopya, okey jokeri en fazla iki.
+"""
+import random
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from okey_tiles import JOKER_OFFSET, NUM_NORMAL, SAHTE_OKEY, face_type, okey_index
+
+Hand = Tuple[List[int], List[int], Optional[int]]
+
+DISCARDED = 8  # Her elle birlikte atılmış taş sayısı
+
+
+def _deal(rng: random.Random, size: int, indicator: int, exclude=()) -> List[int]:
+    """Göstergeyi ve okey tipini dışarıda bırakarak size taş çek"""
+    okey = okey_index(indicator)
+    pool = [t for t in range(NUM_NORMAL) for _ in range(2)
+            if t not in (indicator, okey) and t not in exclude]
+    return rng.sample(pool, size)
+
+
+def _discards(rng: random.Random, tiles: List[int], indicator: int) -> List[int]:
+    """Elde ve göstergede kalmayan kopyalardan atılmış taşlar"""
+    used = Counter(face_type(code) for code in tiles)
+    pool = [t for t in range(NUM_NORMAL) for _ in range(2 - used.get(t, 0) - (t == indicator))]
+    return rng.sample(pool, DISCARDED)
+
+
+def _with_jokers(rng: random.Random, size: int, jokers: int) -> Hand:
+    indicator = rng.randrange(NUM_NORMAL)
+    okey = okey_index(indicator)
+    tiles = _deal(rng, size - jokers, indicator)
+    tiles += [JOKER_OFFSET + okey, SAHTE_OKEY][:jokers]
+    return tiles, _discards(rng, tiles, indicator), indicator
+
+
+def no_joker(rng: random.Random, size: int) -> Hand:
+    """Jokersiz rastgele el"""
+    return _with_jokers(rng, size, 0)
+
+
+def one_joker(rng: random.Random, size: int) -> Hand:
+    """Bir okey jokerli rastgele el"""
+    return _with_jokers(rng, size, 1)
+
+
+def two_joker(rng: random.Random, size: int) -> Hand:
+    """Okey ve sahte okeyli rastgele el"""
+    return _with_jokers(rng, size, 2)
+
+
+def near_101(rng: random.Random, size: int) -> Hand:
+    """Çoğu taşı yüksek sayılı seri ve gruplarda olan, açmaya yakın el"""
+    indicator = rng.randrange(NUM_NORMAL)
+    okey = okey_index(indicator)
+    blocked = (indicator, okey)
+    tiles: List[int] = []
+    while len(tiles) < size - 3:
+        if rng.random() < 0.5:
+            # 9-13 arası bir seri
+            color = rng.randrange(4)
+            start = rng.randrange(8, 11)
+            meld = [color * 13 + n for n in range(start, start + 3)]
+        else:
+            # 10-13 arası bir grup
+            number = rng.randrange(9, 13)
+            meld = [color * 13 + number for color in rng.sample(range(4), 3)]
+        if all(tiles.count(t) < 2 and t not in blocked for t in meld):
+            tiles += meld
+    tiles = tiles[:size - 3]
+    tiles += _deal(rng, size - len(tiles), indicator, exclude=set(tiles))
+    return tiles, _discards(rng, tiles, indicator), indicator
+
+
+def duplicates(rng: random.Random, size: int) -> Hand:
+    """Patolojik el: her tipten iki kopya, birbirine komşu sayılar"""
+    indicator = rng.randrange(NUM_NORMAL)
+    okey = okey_index(indicator)
+    tiles: List[int] = []
+    color, number = rng.randrange(4), rng.randrange(13)
+    while len(tiles) < size - 1:
+        t = color * 13 + number
+        if t not in (indicator, okey):
+            tiles += [t, t]
+        number = (number + 1) % 13
+        if number == 0:
+            color = (color + 1) % 4
+    tiles = tiles[:size - 1] + [JOKER_OFFSET + okey]
+    return tiles, _discards(rng, tiles, indicator), indicator
+
+
+GENERATORS: Dict[str, Callable[[random.Random, int], Hand]] = {
+    'no_joker': no_joker,
+    'one_joker': one_joker,
+    'two_joker': two_joker,
+    'near_101': near_101,
+    'duplicates': duplicates
+}
+
+
+def hands(kind: str, size: int, count: int, seed: int = 0) -> List[Hand]:
+    """Aynı türden count adet tohumlu el"""
+    rng = random.Random(f"{kind}-{size}-{seed}")
+    return [GENERATORS[kind](rng, size) for _ in range(count)]
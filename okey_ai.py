@@ -1,593 +1,707 @@
-import numpy as np
-from collections import defaultdict, Counter
-import random
-from typing import List, Dict, Tuple, Optional
-import json
-import itertools
+from typing import TYPE_CHECKING, List, Dict, Tuple, Optional, Iterable, Iterator
+
+from okey_tiles import (
+    COLORS, NUMBERS, NUM_NORMAL, SAHTE_OKEY, NUM_SLOTS, NUM_PHYSICAL, JOKER_OFFSET,
+    TILE_COLOR, TILE_NUMBER, TILE_KEYS, face_type, is_joker, to_counts, counts_to_tiles, okey_index
+)
+from okey_melds import MELDS, MELD_SCORES, find_runs, find_sets, meld_id
+from okey_cache import LRUCache
+from okey_metrics import SIMULATION_SAMPLES, phase
+from okey_infer import NUM_OPPONENTS, OpponentModel, remaining_copies
+from okey_opening import (OPEN_THRESHOLD, PAIRS_TO_OPEN, can_open_with_pers, cheapest_per_opening,
+                          count_pairs, pair_opening)
+from okey_solver import EVALUATOR_CACHE, HandEvaluator, cached_evaluator, hand_signature
+from okey_pool import SimulationPool
+from okey_store import EvaluationStore, simulation_key
+
+if TYPE_CHECKING:
+    from okey_policy import DiscardPolicy
+
+# play_turn alanları: analiz alanları analyze_hand sonucundan aynen gelir
+ANALYSIS_FIELDS = ('best_arrangement', 'tile_values', 'opponent_prediction',
+                   'risk_analysis', 'recommendations')
+TURN_FIELDS = ANALYSIS_FIELDS + ('suggestion', 'what_ifs', 'outs', 'opening', 'simulation')
+DEFAULT_TURN_FIELDS = ANALYSIS_FIELDS + ('suggestion',)
+
+# Rakip başına tahmin edilen taş sayısı ve modelin riski en fazla kaç katına çıkarabileceği
+PREDICTED_TILES = 8
+MAX_RISK_FACTOR = 1.5
+
+# analyze_many: işçiye tek seferde gönderilen benzersiz el sayısı
+BATCH_CHUNK_SIZE = 64
+
+# Taş değeri: taban (sayı, okey için JOKER_VALUE) + durumun tip başına düzeltmesi
+JOKER_VALUE = 50
+DISCARD_PENALTY = 5     # Atılmış her kopya
+SAME_BONUS = 2          # Eldeki her kopya
+NEIGHBOR_BONUS = 3      # Eldeki her ardışık komşu
+
+# Tip başına komşu indeksleri (kenar sayılarda ve sahte okeyde komşu yok: None)
+PREVIOUS_TYPE = [t - 1 if t < NUM_NORMAL and TILE_NUMBER[t] > 1 else None for t in range(NUM_SLOTS)]
+NEXT_TYPE = [t + 1 if t < NUM_NORMAL and TILE_NUMBER[t] < 13 else None for t in range(NUM_SLOTS)]
+
+
+def value_adjustments(player_counts: List[int], discard_counts: List[int]) -> List[int]:
+    """Tüm taş tipleri için tek geçişte değer düzeltmesi
+
+    Atılmış kopyalar değeri düşürür; eldeki kopyalar ve ardışık komşular artırır.
+    """
+    adjustments = [SAME_BONUS * player_counts[t] - DISCARD_PENALTY * discard_counts[t]
+                   for t in range(NUM_SLOTS)]
+    for t in range(NUM_NORMAL):
+        previous, following = PREVIOUS_TYPE[t], NEXT_TYPE[t]
+        if previous is not None:
+            adjustments[t] += NEIGHBOR_BONUS * player_counts[previous]
+        if following is not None:
+            adjustments[t] += NEIGHBOR_BONUS * player_counts[following]
+    return adjustments
+
+
+def discard_risk(code: int, discard_counts: List[int]) -> int:
+    """Taşı atmanın temel riski (rakip modeli olmadan, atılmış kopya sayısından)"""
+    # Okey taşını atmak çok riskli
+    if is_joker(code) or code == SAHTE_OKEY:
+        return 15
+    # Diğer oyuncuların atıp atmadığına bak
+    discarded_count = discard_counts[code]
+    if discarded_count >= 2:
+        return 10  # Çok riskli
+    if discarded_count == 1:
+        return 5   # Orta risk
+    return 2       # Düşük risk
+
 
 class OkeyAI:
-    def __init__(self):
-        self.colors = ['kirmizi', 'sari', 'mavi', 'siyah']
-        self.numbers = list(range(1, 14))  # 1-13
+    def __init__(self, simulation_pool: Optional[SimulationPool] = None,
+                 evaluation_cache: Optional[LRUCache] = None,
+                 store: Optional[EvaluationStore] = None):
+        self.colors = COLORS
+        self.numbers = NUMBERS
         self.all_tiles = self._generate_all_tiles()
-        
-    def _generate_all_tiles(self) -> List[Dict]:
-        """Tüm taşları oluştur"""
-        tiles = []
-        for color in self.colors:
-            for number in self.numbers:
-                # Her sayıdan her renkten 2 adet
-                for _ in range(2):
-                    tiles.append({
-                        'color': color,
-                        'number': number,
-                        'id': f"{color}_{number}_{_}"
-                    })
-        # 2 adet sahte okey ekle
-        for i in range(2):
-            tiles.append({
-                'color': 'sahte_okey',
-                'number': 0,
-                'id': f"sahte_okey_{i}"
-            })
-        return tiles
+        self.simulation_pool = simulation_pool
+        # Varsayılan önbellek simülasyon tablosuyla paylaşılır
+        self.evaluation_cache = EVALUATOR_CACHE if evaluation_cache is None else evaluation_cache
+        # Kalıcı depo (isteğe bağlı): dizilimler ve yakınsamış simülasyonlar süreçler arası paylaşılır
+        self.store = store
+        
+    def _generate_all_tiles(self) -> List[int]:
+        """Tüm taşları oluştur (fiziksel taş id'leri: tip × 2 + kopya)"""
+        # 52 normal tip × 2 kopya + 2 adet sahte okey
+        return list(range(NUM_PHYSICAL))
     
-    def _get_okey_value(self, indicator_tile: Dict) -> Dict:
-        """Gösterge taşına göre okey taşının değerini hesapla"""
-        if indicator_tile['number'] == 13:
-            # 13'ten sonra 1'e döner
-            okey_number = 1
-        else:
-            okey_number = indicator_tile['number'] + 1
-            
-        return {
-            'color': indicator_tile['color'],
-            'number': okey_number,
-            'is_okey': True
-        }
+    def cache_stats(self) -> Dict:
+        """Değerlendirme önbelleğinin boyut ve isabet sayaçları"""
+        return self.evaluation_cache.stats()
     
-    def _calculate_per_score(self, per: List[Dict]) -> int:
+    def _get_okey_value(self, indicator_tile: int) -> int:
+        """Gösterge taşına göre okey taşının tipini hesapla"""
+        # 13'ten sonra 1'e döner
+        return okey_index(indicator_tile)
+    
+    def _calculate_per_score(self, per: List[int]) -> int:
         """Per puanını hesapla"""
-        if len(per) < 3:
-            return 0
-            
-        # Aynı renk ardışık sayılar
-        if len(set(tile['color'] for tile in per)) == 1:
-            numbers = sorted([tile['number'] for tile in per])
-            if numbers == list(range(numbers[0], numbers[0] + len(numbers))):
-                return sum(numbers)
-        
-        # Farklı renkler aynı sayı
-        if len(set(tile['number'] for tile in per)) == 1:
-            return per[0]['number'] * len(per)
-            
-        return 0
+        # Jokerler temsil ettikleri taşın puanını alır
+        meld = meld_id([face_type(code) for code in per])
+        return MELD_SCORES[meld] if meld >= 0 else 0
     
-    def _is_valid_per(self, per: List[Dict]) -> bool:
-        """Per geçerli mi kontrol et"""
-        if len(per) < 3:
-            return False
-            
-        # Aynı renk ardışık sayılar
-        if len(set(tile['color'] for tile in per)) == 1:
-            numbers = sorted([tile['number'] for tile in per])
-            # 12-13-1 geçersiz
-            if 12 in numbers and 13 in numbers and 1 in numbers:
-                return False
-            return numbers == list(range(numbers[0], numbers[0] + len(numbers)))
-        
-        # Farklı renkler aynı sayı
-        if len(set(tile['number'] for tile in per)) == 1:
-            return True
-            
-        return False
+    def _is_valid_per(self, per: List[int]) -> bool:
+        """Per geçerli mi kontrol et (12-13-1 gibi dönen seriler tabloda yok)"""
+        return meld_id([face_type(code) for code in per]) >= 0
     
-    def _find_sequential_pers(self, tiles: List[Dict]) -> List[List[Dict]]:
-        """Aynı renk ardışık sayı perlerini bul (optimize edilmiş)"""
-        pers = []
-        
-        # Renklere göre grupla
-        color_groups = defaultdict(list)
-        for tile in tiles:
-            color_groups[tile['color']].append(tile)
-        
-        # Her renk için ardışık perler bul
-        for color, color_tiles in color_groups.items():
-            numbers = sorted([t['number'] for t in color_tiles])
-            
-            # 3'lü ardışık kombinasyonlar
-            for i in range(len(numbers) - 2):
-                for j in range(i + 2, len(numbers)):
-                    seq = numbers[i:j+1]
-                    if len(seq) >= 3 and seq == list(range(seq[0], seq[0] + len(seq))):
-                        # Bu sayıları içeren taşları bul
-                        per_tiles = []
-                        for num in seq:
-                            matching_tiles = [t for t in color_tiles if t['number'] == num]
-                            if matching_tiles:
-                                per_tiles.append(matching_tiles[0])
-                        if len(per_tiles) >= 3:
-                            pers.append(per_tiles)
-        
-        return pers
+    def _find_sequential_pers(self, counts: List[int]) -> List[List[int]]:
+        """Aynı renk ardışık sayı perlerini bul (renk başına seri indeksi)"""
+        return [list(MELDS[i]) for i in find_runs(counts)]
     
-    def _find_same_number_pers(self, tiles: List[Dict]) -> List[List[Dict]]:
-        """Aynı sayı farklı renk perlerini bul (optimize edilmiş)"""
-        pers = []
-        
-        # Sayılara göre grupla
-        number_groups = defaultdict(list)
-        for tile in tiles:
-            number_groups[tile['number']].append(tile)
-        
-        # Her sayı için farklı renk kombinasyonları
-        for number, number_tiles in number_groups.items():
-            if len(number_tiles) >= 3:
-                # 3'lü ve 4'lü kombinasyonlar
-                for size in [3, 4]:
-                    if len(number_tiles) >= size:
-                        for combo in itertools.combinations(number_tiles, size):
-                            # Farklı renkler mi kontrol et
-                            colors = [t['color'] for t in combo]
-                            if len(set(colors)) == len(colors):  # Tüm renkler farklı
-                                pers.append(list(combo))
-        
-        return pers
+    def _find_same_number_pers(self, counts: List[int]) -> List[List[int]]:
+        """Aynı sayı farklı renk perlerini bul (sayı başına grup indeksi)"""
+        return [list(MELDS[i]) for i in find_sets(counts)]
     
-    def _find_all_pers_optimized(self, tiles: List[Dict]) -> List[List[Dict]]:
+    def _find_all_pers_optimized(self, counts: List[int]) -> List[List[int]]:
         """Optimize edilmiş per bulma algoritması"""
         pers = []
         
         # Ardışık perler
-        sequential_pers = self._find_sequential_pers(tiles)
-        pers.extend(sequential_pers)
+        pers.extend(self._find_sequential_pers(counts))
         
         # Aynı sayı perler
-        same_number_pers = self._find_same_number_pers(tiles)
-        pers.extend(same_number_pers)
+        pers.extend(self._find_same_number_pers(counts))
         
         return pers
     
-    def _find_all_pers_with_okey(self, tiles: List[Dict], okey_tile: Optional[Dict] = None) -> List[List[Dict]]:
-        """Okey taşı dahil tüm geçerli perleri bul (optimize edilmiş)"""
-        if not okey_tile:
-            return self._find_all_pers_optimized(tiles)
-        
-        # Okey taşını bul
-        okey_tiles = [t for t in tiles if t.get('is_okey') or t['color'] == 'sahte_okey']
-        normal_tiles = [t for t in tiles if not t.get('is_okey') and t['color'] != 'sahte_okey']
-        
-        if not okey_tiles:
-            return self._find_all_pers_optimized(tiles)
-        
-        pers = []
-        okey_value = self._get_okey_value(okey_tile)
-        
-        # Okey taşını joker olarak kullanarak perler oluştur
-        for okey in okey_tiles:
-            # Okey taşını en yararlı olabileceği yerlerde dene
-            useful_positions = self._find_useful_okey_positions(normal_tiles, okey_value)
-            
-            for position in useful_positions:
-                temp_tiles = normal_tiles.copy()
-                temp_okey = {
-                    'color': position['color'],
-                    'number': position['number'],
-                    'is_okey': True,
-                    'original_okey': okey
-                }
-                temp_tiles.append(temp_okey)
-                
-                # Bu kombinasyonla perler bul
-                temp_pers = self._find_all_pers_optimized(temp_tiles)
-                for per in temp_pers:
-                    # Perde okey taşını gerçek değeriyle değiştir
-                    final_per = []
-                    for tile in per:
-                        if tile.get('is_okey'):
-                            final_per.append(okey)
-                        else:
-                            final_per.append(tile)
-                    pers.append(final_per)
-        
-        # Normal perleri de ekle
-        normal_pers = self._find_all_pers_optimized(normal_tiles)
-        pers.extend(normal_pers)
-        
-        return pers
+    def _hand_evaluator(self, tiles: List[int], okey_tile: Optional[int] = None) -> HandEvaluator:
+        """Elin dizilimini tutan, atış/çekiş senaryolarını hesaplayan nesne (önbellekli)"""
+        counts, jokers = self._process_okey_tiles(tiles, okey_tile)
+        with phase('arrangement'):
+            return cached_evaluator(counts, jokers, okey_tile is not None, self.evaluation_cache, self.store)
     
-    def _find_useful_okey_positions(self, tiles: List[Dict], okey_value: Dict) -> List[Dict]:
-        """Okey taşının en yararlı olabileceği pozisyonları bul"""
-        positions = []
-        
-        # Mevcut taşları analiz et
-        color_groups = defaultdict(list)
-        number_groups = defaultdict(list)
-        
-        for tile in tiles:
-            color_groups[tile['color']].append(tile['number'])
-            number_groups[tile['number']].append(tile['color'])
-        
-        # Ardışık seriler için uygun pozisyonlar
-        for color, numbers in color_groups.items():
-            numbers = sorted(numbers)
-            for i in range(len(numbers) - 1):
-                if numbers[i+1] - numbers[i] == 2:  # Arada bir sayı eksik
-                    positions.append({
-                        'color': color,
-                        'number': numbers[i] + 1
-                    })
-        
-        # Aynı sayı serileri için uygun pozisyonlar
-        for number, colors in number_groups.items():
-            if len(colors) == 2:  # 2 renk varsa, 3. renk eklenebilir
-                missing_colors = [c for c in self.colors if c not in colors]
-                for color in missing_colors:
-                    positions.append({
-                        'color': color,
-                        'number': number
-                    })
-        
-        # Eğer hiç uygun pozisyon bulunamazsa, okey'in kendi değerini kullan
-        if not positions:
-            positions.append(okey_value)
-        
-        return positions[:10]  # En fazla 10 pozisyon dene
-    
-    def _find_best_arrangement(self, tiles: List[Dict], okey_tile: Optional[Dict] = None) -> Dict:
-        """En iyi taş dizilimini bul (optimize edilmiş)"""
-        # Okey taşını işle
-        processed_tiles = self._process_okey_tiles(tiles, okey_tile)
-        
-        # Tüm perleri bul
-        all_pers = self._find_all_pers_with_okey(processed_tiles, okey_tile)
-        
-        if not all_pers:
-            return {
-                'pers': [],
-                'score': 0,
-                'unused_tiles': processed_tiles,
-                'total_tiles_used': 0
-            }
-        
-        # En yüksek puanlı kombinasyonu bul (greedy algoritma)
-        best_score = 0
-        best_arrangement = []
-        best_unused = processed_tiles.copy()
-        
-        # Perleri puana göre sırala
-        pers_with_scores = [(per, self._calculate_per_score(per)) for per in all_pers]
-        pers_with_scores.sort(key=lambda x: x[1], reverse=True)
-        
-        used_tiles = set()
-        current_pers = []
-        
-        for per, score in pers_with_scores:
-            # Bu per kullanılabilir mi kontrol et
-            per_tiles = set()
-            for tile in per:
-                tile_id = f"{tile['color']}_{tile['number']}"
-                per_tiles.add(tile_id)
-            
-            # Çakışma var mı kontrol et
-            if not per_tiles.intersection(used_tiles):
-                current_pers.append(per)
-                used_tiles.update(per_tiles)
+    def _find_best_arrangement(self, tiles: List[int], okey_tile: Optional[int] = None,
+                               evaluator: Optional[HandEvaluator] = None) -> Dict:
+        """En iyi taş dizilimini bul (kesin çözücü)"""
+        if evaluator is None:
+            evaluator = self._hand_evaluator(tiles, okey_tile)
+        
+        # Toplam per puanını en büyükleyen dizilim
+        total_score, pers = evaluator.score, evaluator.pers
         
-        # Toplam puanı hesapla
-        total_score = sum(self._calculate_per_score(per) for per in current_pers)
+        remaining = evaluator.spare
+        jokers_left = len(tiles) - sum(evaluator.counts)
+        for per in pers:
+            jokers_left -= sum(1 for code in per if is_joker(code))
         
-        # Kullanılmayan taşları bul
-        unused_tiles = []
-        for tile in processed_tiles:
-            tile_id = f"{tile['color']}_{tile['number']}"
-            if tile_id not in used_tiles:
-                unused_tiles.append(tile)
+        # Kullanılmayan taşlar (kullanılmayan jokerler okey değeriyle)
+        unused_tiles = [t for t in range(NUM_SLOTS) for _ in range(remaining[t])]
+        if jokers_left:
+            unused_tiles.extend([JOKER_OFFSET + self._get_okey_value(okey_tile)] * jokers_left)
         
         return {
-            'pers': current_pers,
+            'pers': [list(per) for per in pers],
             'score': total_score,
             'unused_tiles': unused_tiles,
-            'total_tiles_used': len(processed_tiles) - len(unused_tiles)
+            'total_tiles_used': len(tiles) - len(unused_tiles)
         }
     
-    def _process_okey_tiles(self, tiles: List[Dict], okey_tile: Optional[Dict] = None) -> List[Dict]:
-        """Okey taşlarını işle"""
-        if not okey_tile:
-            return tiles
-        
-        processed_tiles = []
-        okey_value = self._get_okey_value(okey_tile)
-        
-        for tile in tiles:
-            if tile['color'] == 'sahte_okey':
-                # Sahte okey'i gerçek okey değeriyle değiştir
-                processed_tiles.append({
-                    'color': okey_value['color'],
-                    'number': okey_value['number'],
-                    'is_okey': True,
-                    'original': tile
-                })
+    def _process_okey_tiles(self, tiles: List[int], okey_tile: Optional[int] = None) -> Tuple[List[int], int]:
+        """Okey taşlarını işle: normal taşların sayım vektörü ve joker sayısı"""
+        if okey_tile is None:
+            return to_counts(tiles), 0
+        
+        counts = [0] * NUM_SLOTS
+        jokers = 0
+        for code in tiles:
+            # Sahte okey ve işaretli okey taşları joker olur
+            if code == SAHTE_OKEY or is_joker(code):
+                jokers += 1
             else:
-                processed_tiles.append(tile)
+                counts[code] += 1
         
-        return processed_tiles
+        return counts, jokers
     
-    def _calculate_tile_value(self, tile: Dict, player_tiles: List[Dict], 
-                            discarded_tiles: List[Dict], okey_tile: Optional[Dict] = None) -> float:
-        """Taşın değerini hesapla"""
-        value = 0
-        
+    def _calculate_tile_value(self, tile: int, player_counts: List[int],
+                            discard_counts: List[int], okey_tile: Optional[int] = None,
+                            adjustments: Optional[List[int]] = None) -> float:
+        """Taşın değerini hesapla (durumun düzeltme tablosu verilirse oradan okunur)"""
         # Okey taşını işle
-        if tile['color'] == 'sahte_okey' and okey_tile:
-            okey_value = self._get_okey_value(okey_tile)
-            tile = {
-                'color': okey_value['color'],
-                'number': okey_value['number'],
-                'is_okey': True
-            }
-        
-        # Temel değer
-        if tile.get('is_okey'):
-            value += 50  # Okey taşı çok değerli
-        else:
-            value += tile['number']
-        
-        # Diğer oyuncuların attığı taşlarla uyumluluk
-        for discarded in discarded_tiles:
-            if discarded['color'] == tile['color'] and discarded['number'] == tile['number']:
-                value -= 5  # Aynı taş atılmış, değeri düşük
-        
-        # Oyuncunun elindeki taşlarla uyumluluk
-        for player_tile in player_tiles:
-            if player_tile['color'] == tile['color']:
-                if abs(player_tile['number'] - tile['number']) == 1:
-                    value += 3  # Ardışık sayı
-                elif player_tile['number'] == tile['number']:
-                    value += 2  # Aynı sayı
-        
-        return value
-    
-    def _predict_opponent_tiles(self, discarded_tiles: List[Dict], 
-                              player_tiles: List[Dict], okey_tile: Optional[Dict] = None) -> Dict:
-        """Rakip taşlarını tahmin et"""
-        all_tiles = self.all_tiles.copy()
-        
-        # Oyuncunun taşlarını çıkar
-        for tile in player_tiles:
-            all_tiles = [t for t in all_tiles if not (
-                t['color'] == tile['color'] and t['number'] == tile['number']
-            )]
-        
-        # Atılan taşları çıkar
-        for tile in discarded_tiles:
-            all_tiles = [t for t in all_tiles if not (
-                t['color'] == tile['color'] and t['number'] == tile['number']
-            )]
-        
-        # Okey taşını çıkar (eğer varsa)
-        if okey_tile:
-            okey_value = self._get_okey_value(okey_tile)
-            all_tiles = [t for t in all_tiles if not (
-                t['color'] == okey_value['color'] and t['number'] == okey_value['number']
-            )]
+        if tile == SAHTE_OKEY and okey_tile is not None:
+            tile = JOKER_OFFSET + self._get_okey_value(okey_tile)
         
-        # Kalan taşları rastgele dağıt
-        random.shuffle(all_tiles)
+        if adjustments is None:
+            adjustments = value_adjustments(player_counts, discard_counts)
         
-        opponent_tiles = all_tiles[:39]  # 3 rakip × 13 taş
-        
-        return {
-            'opponent1': opponent_tiles[:13],
-            'opponent2': opponent_tiles[13:26],
-            'opponent3': opponent_tiles[26:39],
-            'remaining_deck': opponent_tiles[39:]
+        # Temel değer: okey taşı çok değerli
+        t = face_type(tile)
+        return (JOKER_VALUE if is_joker(tile) else TILE_NUMBER[t]) + adjustments[t]
+    
+    def _opponent_model(self, player_tiles: List[int], discarded_tiles: List[int],
+                        okey_tile: Optional[int] = None,
+                        discard_history: Optional[List[Tuple[int, int]]] = None) -> OpponentModel:
+        """Görülmeyen taşlar ve atılan taş geçmişinden rakip modeli"""
+        return OpponentModel.from_tiles(player_tiles, discarded_tiles, okey_tile, discard_history)
+    
+    def _predict_opponent_tiles(self, model: OpponentModel) -> Dict:
+        """Rakip taşlarını tahmin et: her rakibin elinde olma olasılığı en yüksek taşlar"""
+        prediction = {
+            f'opponent{o + 1}': model.likely_tiles(o, PREDICTED_TILES) if model.observed else []
+            for o in range(NUM_OPPONENTS)
         }
+        # Görülmeyen taşların hepsi (kopya başına bir kez)
+        prediction['remaining_deck'] = counts_to_tiles(model.remaining)
+        return prediction
     
-    def analyze_hand(self, player_tiles: List[Dict], 
-                    discarded_tiles: Optional[List[Dict]] = None,
-                    okey_tile: Optional[Dict] = None) -> Dict:
-        """Eli analiz et (optimize edilmiş)"""
+    def analyze_hand(self, player_tiles: List[int],
+                    discarded_tiles: Optional[List[int]] = None,
+                    okey_tile: Optional[int] = None,
+                    discard_history: Optional[List[Tuple[int, int]]] = None,
+                    model: Optional[OpponentModel] = None,
+                    player_counts: Optional[List[int]] = None) -> Dict:
+        """Eli analiz et
+
+        ``discard_history``: (rakip, taş) çiftleri; rakip 0 sıradaki oyuncudur.
+        Bu taşlar ``discarded_tiles``'a ek olarak görülmüş sayılır. Rakip
+        modeli ve elin sayım vektörü (ör. oturumun olay başına güncellediği)
+        verilirse yeniden kurulmaz.
+        """
         if discarded_tiles is None:
             discarded_tiles = []
         
         # En iyi dizilimi bul
         arrangement = self._find_best_arrangement(player_tiles, okey_tile)
         
-        # Her taşın değerini hesapla (sadece kullanılmayan taşlar için)
-        tile_values = {}
-        for tile in arrangement['unused_tiles']:
-            tile_values[f"{tile['color']}_{tile['number']}"] = self._calculate_tile_value(
-                tile, player_tiles, discarded_tiles, okey_tile
-            )
-        
-        # Rakip tahminleri (basitleştirilmiş)
-        opponent_prediction = {
-            'opponent1': [],
-            'opponent2': [],
-            'opponent3': [],
-            'remaining_deck': []
-        }
+        with phase('valuation'):
+            if player_counts is None:
+                player_counts = to_counts(player_tiles)
+            discard_counts = to_counts(discarded_tiles + [code for _, code in discard_history or []])
+            
+            # Durumun düzeltme tablosu bir kez kurulur, kullanılmayan taşlar oradan okunur
+            adjustments = value_adjustments(player_counts, discard_counts)
+            tile_values = {}
+            for tile in arrangement['unused_tiles']:
+                tile_values[face_type(tile)] = self._calculate_tile_value(
+                    tile, player_counts, discard_counts, okey_tile, adjustments
+                )
+        
+        # Rakip tahminleri (görülmeyen taşlar ve atılan taş geçmişinden)
+        with phase('opponent_model'):
+            if model is None:
+                model = self._opponent_model(player_tiles, discarded_tiles, okey_tile, discard_history)
+            opponent_prediction = self._predict_opponent_tiles(model)
         
         # Risk analizi
-        risk_analysis = self._analyze_risks(player_tiles, discarded_tiles, arrangement, okey_tile)
+        with phase('risk'):
+            risk_analysis = self._analyze_risks(player_counts, discard_counts, arrangement, okey_tile, model)
         
         return {
             'best_arrangement': arrangement,
             'tile_values': tile_values,
             'opponent_prediction': opponent_prediction,
             'risk_analysis': risk_analysis,
-            'recommendations': self._generate_recommendations(arrangement, tile_values, risk_analysis, okey_tile)
+            'recommendations': self._generate_recommendations(
+                arrangement, tile_values, risk_analysis, okey_tile,
+                count_pairs(*self._process_okey_tiles(player_tiles, okey_tile))
+            )
         }
     
-    def _analyze_risks(self, player_tiles: List[Dict], 
-                      discarded_tiles: List[Dict],
+    def _analyze_risks(self, player_counts: List[int],
+                      discard_counts: List[int],
                       arrangement: Dict,
-                      okey_tile: Optional[Dict] = None) -> Dict:
-        """Risk analizi yap"""
+                      okey_tile: Optional[int] = None,
+                      model: Optional[OpponentModel] = None) -> Dict:
+        """Risk analizi yap
+
+        Model verilirse temel risk, sıradaki rakibin taşı kullanabilme
+        olasılığının bilgisiz bir rakibe oranıyla ölçeklenir: ölü taşlar ve
+        rakibin komşularını attığı taşlar daha güvenlidir.
+        """
         risks = {}
+        relative_use = None
+        if model is not None:
+            # Sadece aday (kullanılmayan, joker olmayan) taşlar için
+            relative_use = model.relative_use(0, {t for t in arrangement['unused_tiles']
+                                                  if not is_joker(t) and t != SAHTE_OKEY})
         
         # Kullanılmayan taşların riski
         for tile in arrangement['unused_tiles']:
-            risk_score = 0
-            
-            # Okey taşı özel değerlendirme
-            if tile.get('is_okey') or tile['color'] == 'sahte_okey':
-                risk_score += 15  # Okey taşını atmak çok riskli
-            else:
-                # Diğer oyuncuların atıp atmadığına bak
-                discarded_count = sum(1 for t in discarded_tiles 
-                                    if t['color'] == tile['color'] and t['number'] == tile['number'])
-                
-                if discarded_count >= 2:
-                    risk_score += 10  # Çok riskli
-                elif discarded_count == 1:
-                    risk_score += 5   # Orta risk
-                else:
-                    risk_score += 2   # Düşük risk
+            risk_score = discard_risk(tile, discard_counts)
+            if relative_use is not None and not is_joker(tile) and tile != SAHTE_OKEY:
+                risk_score = int(round(risk_score * min(relative_use[tile], MAX_RISK_FACTOR)))
             
-            risks[f"{tile['color']}_{tile['number']}"] = risk_score
+            risks[face_type(tile)] = risk_score
         
         return risks
     
     def _generate_recommendations(self, arrangement: Dict, 
                                 tile_values: Dict, 
                                 risk_analysis: Dict,
-                                okey_tile: Optional[Dict] = None) -> List[str]:
+                                okey_tile: Optional[int] = None,
+                                pairs: int = 0) -> List[str]:
         """Öneriler oluştur"""
         recommendations = []
         
         # Puan önerisi
-        if arrangement['score'] >= 101:
+        if arrangement['score'] >= OPEN_THRESHOLD:
             recommendations.append(f"✅ El açabilirsiniz! Puan: {arrangement['score']}")
         else:
-            needed = 101 - arrangement['score']
+            needed = OPEN_THRESHOLD - arrangement['score']
             recommendations.append(f"⚠️ El açmak için {needed} puan daha gerekli")
         
+        # Çiftle açma
+        if pairs >= PAIRS_TO_OPEN:
+            recommendations.append(f"✅ Çiftle açabilirsiniz! {pairs} çift")
+        
         # Okey taşı önerisi
-        if okey_tile:
+        if okey_tile is not None:
             okey_value = self._get_okey_value(okey_tile)
-            recommendations.append(f"🎯 Bu elde Okey taşı: {okey_value['color']} {okey_value['number']}")
+            recommendations.append(f"🎯 Bu elde Okey taşı: {TILE_COLOR[okey_value]} {TILE_NUMBER[okey_value]}")
         
         # Taş önerisi
         if arrangement['unused_tiles']:
-            best_tile_to_discard = min(arrangement['unused_tiles'], 
-                                     key=lambda t: tile_values.get(f"{t['color']}_{t['number']}", 0))
-            recommendations.append(f"🎯 Atılacak en iyi taş: {best_tile_to_discard['color']} {best_tile_to_discard['number']}")
+            best_tile_to_discard = face_type(min(arrangement['unused_tiles'],
+                                                 key=lambda t: tile_values.get(face_type(t), 0)))
+            recommendations.append(f"🎯 Atılacak en iyi taş: {TILE_COLOR[best_tile_to_discard]} {TILE_NUMBER[best_tile_to_discard]}")
         
         # Risk uyarıları
-        high_risk_tiles = [tile for tile, risk in risk_analysis.items() if risk > 7]
+        high_risk_tiles = [TILE_KEYS[tile] for tile, risk in risk_analysis.items() if risk > 7]
         if high_risk_tiles:
             recommendations.append(f"⚠️ Yüksek riskli taşlar: {', '.join(high_risk_tiles)}")
         
         return recommendations
     
-    def monte_carlo_simulation(self, player_tiles: List[Dict],
-                             discarded_tiles: Optional[List[Dict]] = None,
-                             okey_tile: Optional[Dict] = None,
-                             num_simulations: int = 100) -> Dict:
-        """Monte Carlo simülasyonu (optimize edilmiş)"""
+    def monte_carlo_simulation(self, player_tiles: List[int],
+                             discarded_tiles: Optional[List[int]] = None,
+                             okey_tile: Optional[int] = None,
+                             num_simulations: int = 2000,
+                             seed: Optional[int] = None,
+                             time_budget_ms: Optional[float] = None,
+                             target_ci_width: Optional[float] = None,
+                             discard_history: Optional[List[Tuple[int, int]]] = None,
+                             model: Optional[OpponentModel] = None) -> Dict:
+        """Monte Carlo simülasyonu (vektörel, aday atışlar toplu değerlendirilir)
+
+        Aynı ``seed`` ve örnek sayısı aynı sonucu verir; tohum verilmezse
+        üretilen tohum sonuçta döner. ``time_budget_ms`` ya da
+        ``target_ci_width`` verilirse anında-yanıt kipinde çalışır: süre
+        dolana ya da sıralama kesinleşene kadar (en fazla ``num_simulations``)
+        örnek alınır, geride kalan adaylar erkenden elenir. ``discard_history``
+        verilirse rakip elleri bu geçmişe göre ağırlıklı dağıtılır (``model``
+        verilirse ağırlıkları kullanılır). Kalıcı depoda aynı durumun
+        yakınsamış sonucu varsa simülasyon yapılmaz.
+        """
+        from okey_sim import simulate_discards  # NumPy sadece simülasyonda yüklenir
+        
+        store_key, sim_args, sim_kwargs = self._simulation_setup(
+            player_tiles, discarded_tiles, okey_tile, num_simulations, seed, time_budget_ms,
+            target_ci_width, discard_history, model
+        )
+        simulation = None if store_key is None else self.store.get_simulation(store_key)
+        if simulation is None:
+            with phase('simulation'):
+                if self.simulation_pool is not None:
+                    simulation = self.simulation_pool.run(simulate_discards, *sim_args, **sim_kwargs)
+                else:
+                    simulation = simulate_discards(*sim_args, **sim_kwargs)
+            SIMULATION_SAMPLES.inc(simulation['num_simulations'])
+            if store_key is not None:
+                self.store.put_simulation(store_key, simulation)
+        return self._simulation_results(simulation)
+    
+    def monte_carlo_stream(self, player_tiles: List[int],
+                           discarded_tiles: Optional[List[int]] = None,
+                           okey_tile: Optional[int] = None,
+                           num_simulations: int = 2000,
+                           seed: Optional[int] = None,
+                           time_budget_ms: Optional[float] = None,
+                           target_ci_width: Optional[float] = None,
+                           discard_history: Optional[List[Tuple[int, int]]] = None) -> Iterator[Dict]:
+        """Monte Carlo simülasyonu, her örnek turundan sonra ara sonuçla
+
+        Sonuçlar monte_carlo_simulation biçimindedir; ara sonuçlarda
+        ``stopped`` None'dır, sonuncusunda durma nedenidir. Üreteç
+        kapatılınca simülasyon sonraki turda durur. Aynı tohumla son sonuç
+        monte_carlo_simulation ile aynıdır.
+        """
+        from okey_sim import iter_simulate_discards  # NumPy sadece simülasyonda yüklenir
+        
+        store_key, sim_args, sim_kwargs = self._simulation_setup(
+            player_tiles, discarded_tiles, okey_tile, num_simulations, seed, time_budget_ms,
+            target_ci_width, discard_history
+        )
+        stored = None if store_key is None else self.store.get_simulation(store_key)
+        if stored is not None:
+            yield self._simulation_results(stored)
+            return
+        
+        if self.simulation_pool is not None:
+            sim_kwargs.update(executor=self.simulation_pool.executor, table_chunks=self.simulation_pool.workers)
+        simulation = None
+        try:
+            for simulation in iter_simulate_discards(*sim_args, **sim_kwargs):
+                yield self._simulation_results(simulation)
+        finally:
+            # Yarıda kesilen akışın örnekleri de sayılır
+            if simulation is not None:
+                SIMULATION_SAMPLES.inc(simulation['num_simulations'])
+        if store_key is not None:
+            self.store.put_simulation(store_key, simulation)
+    
+    def _simulation_setup(self, player_tiles: List[int], discarded_tiles: Optional[List[int]],
+                          okey_tile: Optional[int], num_simulations: int, seed: Optional[int],
+                          time_budget_ms: Optional[float], target_ci_width: Optional[float],
+                          discard_history: Optional[List[Tuple[int, int]]],
+                          model: Optional[OpponentModel] = None) -> Tuple[Optional[str], Tuple, Dict]:
+        """Simülasyonun depo anahtarı (depo yoksa None) ve simulate_discards argümanları"""
         if discarded_tiles is None:
             discarded_tiles = []
         
+        # Aday atışlar: dizilimde kullanılmayan (joker olmayan) taş tipleri
+        counts, jokers = self._process_okey_tiles(player_tiles, okey_tile)
+        arrangement = self._find_best_arrangement(player_tiles, okey_tile,
+                                                  self._hand_evaluator(player_tiles, okey_tile))
+        candidates = sorted({t for t in arrangement['unused_tiles'] if not is_joker(t)})
+        if not candidates:
+            candidates = [t for t in range(NUM_NORMAL) if counts[t]]
+        
+        store_key = None
+        if self.store is not None:
+            store_key = simulation_key(player_tiles, discarded_tiles, okey_tile, discard_history,
+                                       num_simulations, seed, target_ci_width)
+        
+        # Kimin attığı bilinen taşlar rakip ağırlıklarını belirler
+        opponent_weights = None
+        if discard_history:
+            if model is None:
+                model = self._opponent_model(player_tiles, discarded_tiles, okey_tile, discard_history)
+            opponent_weights = model.weights
+            discarded_tiles = discarded_tiles + [code for _, code in discard_history]
+        
+        # Simülasyon puanı eşit adaylar bu sırada kalır: değer tablosunun en değersiz bulduğu taş önde
+        player_counts, discard_counts = to_counts(player_tiles), to_counts(discarded_tiles)
+        adjustments = value_adjustments(player_counts, discard_counts)
+        candidates.sort(key=lambda t: (self._calculate_tile_value(t, player_counts, discard_counts, okey_tile,
+                                                                  adjustments), t))
+        
+        sim_args = (player_tiles, discarded_tiles, counts, jokers, candidates)
+        sim_kwargs = {
+            'indicator': okey_tile,
+            'num_simulations': num_simulations,
+            'seed': seed,
+            'time_budget_ms': time_budget_ms,
+            'target_ci_width': target_ci_width,
+            'opponent_weights': opponent_weights
+        }
+        return store_key, sim_args, sim_kwargs
+    
+    @staticmethod
+    def _simulation_results(simulation: Dict) -> Dict:
+        """simulate_discards sonucundan yanıt: en iyi hamlenin oranları ve tüm hamleler"""
         results = {
             'win_rate': 0,
             'avg_score': 0,
             'best_moves': [],
-            'risk_assessment': {}
+            'risk_assessment': {},
+            'num_simulations': 0,
+            'seed': simulation['seed'],
+            'stopped': simulation['stopped']
         }
-        
-        wins = 0
-        total_score = 0
-        move_scores = defaultdict(list)
-        
-        # Simülasyon sayısını azalt
-        for _ in range(min(num_simulations, 100)):
-            # Rastgele taş dağılımı
-            simulation = self._simulate_single_game(player_tiles, discarded_tiles, okey_tile)
-            
-            if simulation['won']:
-                wins += 1
-            
-            total_score += simulation['score']
-            
-            # Hamle skorlarını kaydet
-            for move, score in simulation['move_scores'].items():
-                move_scores[move].append(score)
-        
-        # Sonuçları hesapla
-        if num_simulations > 0:
-            results['win_rate'] = wins / num_simulations
-            results['avg_score'] = total_score / num_simulations
-        
-        # En iyi hamleleri bul
-        for move, scores in move_scores.items():
-            if scores:
-                avg_score = np.mean(scores)
-                results['best_moves'].append({
-                    'move': move,
-                    'avg_score': avg_score,
-                    'win_rate': sum(1 for s in scores if s > 0) / len(scores)
-                })
-        
-        # En iyi hamleleri sırala
-        results['best_moves'].sort(key=lambda x: x['avg_score'], reverse=True)
+        if not simulation['moves']:
+            return results
+        
+        # En iyi hamlenin beklenen puanı ve 101'e ulaşma oranı
+        best = simulation['moves'][0]
+        results['win_rate'] = best['win_rate']
+        results['win_rate_ci'] = best['win_rate_ci']
+        results['avg_score'] = best['avg_score']
+        results['score_ci'] = best['score_ci']
+        results['best_moves'] = simulation['moves']
+        results['risk_assessment'] = {move['move']: move['danger_rate'] for move in simulation['moves']}
+        results['num_simulations'] = simulation['num_simulations']
         
         return results
     
-    def _simulate_single_game(self, player_tiles: List[Dict],
-                            discarded_tiles: List[Dict],
-                            okey_tile: Optional[Dict] = None) -> Dict:
-        """Tek oyun simülasyonu"""
-        # Oyuncunun hamlelerini simüle et
-        arrangement = self._find_best_arrangement(player_tiles, okey_tile)
+    def _unseen(self, player_tiles: List[int], discarded_tiles: List[int], okey_tile: Optional[int],
+                discard_history: Optional[List[Tuple[int, int]]] = None,
+                model: Optional[OpponentModel] = None) -> List[int]:
+        """Görülmeyen kopya sayıları (model verilirse ondan)"""
+        if model is not None:
+            return model.remaining
+        seen = discarded_tiles + [code for _, code in discard_history or []]
+        return remaining_copies(to_counts(player_tiles), to_counts(seen), okey_tile)
+    
+    def what_if_analysis(self, player_tiles: List[int],
+                         discarded_tiles: Optional[List[int]] = None,
+                         okey_tile: Optional[int] = None,
+                         discard_history: Optional[List[Tuple[int, int]]] = None,
+                         model: Optional[OpponentModel] = None) -> Dict:
+        """Tüm atış ve çekiş senaryolarını tek çağrıda puanla
+
+        Her atış adayı için atış sonrası dizilim puanı ve görülmeyen taşların
+        kopya sayısıyla ağırlıklı, bir taş çekildikten sonraki beklenen puan.
+        Rakip modeli verilirse görülmeyen sayılar ondan okunur.
+        """
+        if discarded_tiles is None:
+            discarded_tiles = []
         
-        # Kullanılmayan taşları değerlendir
-        move_scores = {}
-        for tile in arrangement['unused_tiles']:
-            # Bu taşı atarsak ne olur simülasyonu
-            remaining_tiles = [t for t in player_tiles if t != tile]
-            new_arrangement = self._find_best_arrangement(remaining_tiles, okey_tile)
-            move_scores[f"{tile['color']}_{tile['number']}"] = new_arrangement['score']
+        evaluator = self._hand_evaluator(player_tiles, okey_tile)
+        unseen = self._unseen(player_tiles, discarded_tiles, okey_tile, discard_history, model)
+        draws = [t for t in range(NUM_SLOTS) if unseen[t]]
+        candidates = [t for t in range(NUM_SLOTS) if evaluator.counts[t]]
+        with phase('what_ifs'):
+            what_ifs = evaluator.what_ifs(draws, candidates)
+        
+        total_unseen = sum(unseen[t] for t in draws)
+        discards = []
+        for row, t in enumerate(candidates):
+            expected = 0.0
+            if total_unseen:
+                expected = sum(unseen[d] * score
+                               for d, score in zip(draws, what_ifs['swap_scores'][row])) / total_unseen
+            discards.append({
+                'tile': t,
+                'score': what_ifs['discard_scores'][t],
+                'expected_draw_score': expected
+            })
+        discards.sort(key=lambda x: (-x['expected_draw_score'], -x['score'], x['tile']))
+        
+        return {
+            'score': what_ifs['score'],
+            'discards': discards,
+            'draw_scores': what_ifs['draw_scores']
+        }
+    
+    def outs_analysis(self, player_tiles: List[int],
+                      discarded_tiles: Optional[List[int]] = None,
+                      okey_tile: Optional[int] = None,
+                      discard_history: Optional[List[Tuple[int, int]]] = None,
+                      candidates: Optional[List[int]] = None,
+                      model: Optional[OpponentModel] = None) -> Dict:
+        """Eli iyileştiren çekişler (outs) ve açmaya kalan en az çekiş sayısı
+
+        Görülmeyen kopyası kalan bir taş çekildiğinde dizilim puanı artıyorsa
+        çıkıştır; görülmeyen kopya sayısıyla ağırlıklanır. Aynı hesap her aday
+        atış için atıştan sonraki ele göre yapılır (aday verilmezse dizilimde
+        kullanılmayan taşlar). Okey ve sahte okey jokerdir; joker çekişi okey
+        koduyla tek satırdır. Rakip modeli verilirse görülmeyen sayılar ondan
+        okunur.
+        """
+        if discarded_tiles is None:
+            discarded_tiles = []
         
+        evaluator = self._hand_evaluator(player_tiles, okey_tile)
+        unseen = self._unseen(player_tiles, discarded_tiles, okey_tile, discard_history, model)
+        
+        # Çekilebilecek taşlar ve kopya sayıları (joker çekişi SAHTE_OKEY ile denenir)
+        copies = {t: unseen[t] for t in range(NUM_NORMAL) if unseen[t]}
+        if okey_tile is not None:
+            okey = self._get_okey_value(okey_tile)
+            jokers = copies.pop(okey, 0) + unseen[SAHTE_OKEY]
+            if jokers:
+                copies[SAHTE_OKEY] = jokers
+        draws = sorted(copies)
+        
+        if candidates is None:
+            candidates = [t for t in range(NUM_NORMAL) if evaluator.spare[t]] or \
+                         [t for t in range(NUM_NORMAL) if evaluator.counts[t]]
+        
+        with phase('outs'):
+            result = self._outs_entry(evaluator, draws, copies, okey_tile)
+            discards = [dict(tile=t, **self._outs_entry(evaluator, draws, copies, okey_tile, t))
+                        for t in candidates]
+        discards.sort(key=lambda x: (x['draws_to_open'] is None, x['draws_to_open'] or 0,
+                                     -x['live_outs'], -x['score'], x['tile']))
+        result['unseen'] = sum(copies.values())
+        result['discards'] = discards
+        return result
+    
+    def _outs_entry(self, evaluator: HandEvaluator, draws: List[int], copies: Dict[int, int],
+                    okey_tile: Optional[int] = None, remove: Optional[int] = None) -> Dict:
+        """Elin (remove verilirse o taş atıldıktan sonraki elin) çıkışları"""
+        score = evaluator.score if remove is None else evaluator.discard_score(remove)
+        outs = [{
+            'tile': JOKER_OFFSET + self._get_okey_value(okey_tile) if t == SAHTE_OKEY else t,
+            'score': out_score,
+            'copies': copies[t]
+        } for t, out_score in evaluator.outs(draws, remove).items()]
+        outs.sort(key=lambda out: (-out['score'], -out['copies'], out['tile']))
         return {
-            'won': arrangement['score'] >= 101,
-            'score': arrangement['score'],
-            'move_scores': move_scores
+            'score': score,
+            'draws_to_open': evaluator.draws_to_reach(OPEN_THRESHOLD, remove),
+            'outs': outs,
+            'live_outs': sum(out['copies'] for out in outs)
         }
     
-    def suggest_best_tile(self, player_tiles: List[Dict],
-                         discarded_tiles: Optional[List[Dict]] = None,
-                         okey_tile: Optional[Dict] = None) -> Dict:
-        """En iyi atılacak taşı öner"""
+    def can_open(self, player_tiles: List[int], okey_tile: Optional[int] = None) -> Dict:
+        """El açılabilir mi: {'can_open', 'pers', 'pairs'} (en iyi dizilim aranmaz)
+
+        Çiftler tek geçişte sayılır. El önbellekte değerlendirilmişse per puanı
+        oradan okunur; yoksa eşiğe ulaşan ilk dizilimde duran arama yapılır.
+        """
+        counts, jokers = self._process_okey_tiles(player_tiles, okey_tile)
+        pairs = count_pairs(counts, jokers) >= PAIRS_TO_OPEN
+        with phase('opening'):
+            # Önbelleği doldurmayan okuma: isabet/ıska sayaçlarına yazılmaz
+            evaluator = self.evaluation_cache.peek(hand_signature(counts, jokers, okey_tile is not None))
+            if evaluator is not None:
+                pers = evaluator.score >= OPEN_THRESHOLD
+            else:
+                pers = can_open_with_pers(counts, jokers)
+        return {'can_open': pers or pairs, 'pers': pers, 'pairs': pairs}
+    
+    def opening_search(self, player_tiles: List[int], okey_tile: Optional[int] = None) -> Dict:
+        """Perle (101) ve çiftle (en az 5 çift) açma yollarının en ucuzu
+
+        Her yol için yere konan taşlar ve elde kalanlar döner. En ucuz açma en
+        az taş (eşitse en az joker) kullanan yoldur; eşitlikte per tercih edilir.
+        """
+        counts, jokers = self._process_okey_tiles(player_tiles, okey_tile)
+        evaluator = self._hand_evaluator(player_tiles, okey_tile)
+        joker_code = JOKER_OFFSET + self._get_okey_value(okey_tile) if okey_tile is not None else None
+        
+        with phase('opening'):
+            found = cheapest_per_opening(counts, jokers)
+            chosen = pair_opening(counts, jokers, evaluator.spare)
+        
+        per_route = {'can_open': found is not None, 'score': 0, 'pers': []}
+        if found is not None:
+            per_route['score'], pers = found
+            per_route['pers'] = [list(per) for per in pers]
+        pair_route = {
+            'can_open': bool(chosen),
+            'available': count_pairs(counts, jokers),
+            # Jokerle tamamlanan çiftte joker eşinin kodunu alır
+            'pairs': [[joker_code, joker_code] if a is None else [a, a if b is not None else JOKER_OFFSET + a]
+                      for a, b in chosen]
+        }
+        
+        routes = {'pers': per_route, 'pairs': pair_route}
+        costs = {}
+        for name, groups in (('pers', per_route['pers']), ('pairs', pair_route['pairs'])):
+            laid = [code for group in groups for code in group]
+            routes[name]['tiles_used'] = len(laid)
+            routes[name]['remaining'] = self._without(player_tiles, laid, okey_tile)
+            if routes[name]['can_open']:
+                costs[name] = (len(laid), sum(1 for code in laid if is_joker(code)))
+        
+        best = min(costs, key=lambda name: (costs[name], name != 'pers')) if costs else None
+        return {'can_open': best is not None, 'best': best, 'pers': per_route, 'pairs': pair_route}
+    
+    def _without(self, tiles: List[int], laid: List[int], okey_tile: Optional[int] = None) -> List[int]:
+        """Yere konan taşları elden çıkar (joker kodu eldeki bir okey ya da sahte okeyle eşleşir)"""
+        remaining = list(tiles)
+        for code in laid:
+            if is_joker(code):
+                code = next(c for c in remaining if is_joker(c) or (okey_tile is not None and c == SAHTE_OKEY))
+            remaining.remove(code)
+        return remaining
+    
+    def suggest_best_tile(self, player_tiles: List[int],
+                         discarded_tiles: Optional[List[int]] = None,
+                         okey_tile: Optional[int] = None,
+                         analysis: Optional[Dict] = None,
+                         discard_history: Optional[List[Tuple[int, int]]] = None,
+                         policy: Optional['DiscardPolicy'] = None) -> Dict:
+        """En iyi atılacak taşı öner (hazır analiz verilirse yeniden hesaplanmaz)
+
+        ``policy`` verilirse seçimi o atış politikası yapar (okey_policy);
+        verilmezse tam analizin en düşük değerli taşı seçilir.
+        """
         if discarded_tiles is None:
             discarded_tiles = []
+        if policy is not None:
+            return policy.suggest(self, player_tiles, discarded_tiles, okey_tile, analysis, discard_history)
         
         # Mevcut durumu analiz et
-        analysis = self.analyze_hand(player_tiles, discarded_tiles, okey_tile)
+        if analysis is None:
+            analysis = self.analyze_hand(player_tiles, discarded_tiles, okey_tile, discard_history)
         
         # Kullanılmayan taşları değerlendir
         unused_tiles = analysis['best_arrangement']['unused_tiles']
         
         if not unused_tiles:
-            return {
-                'suggestion': 'Tüm taşlar kullanılıyor, el açabilirsiniz!',
-                'tile': None,
-                'reason': 'Mükemmel el dizilimi'
-            }
+            return self._all_used_suggestion()
         
         # En düşük değerli taşı bul
-        best_tile_to_discard = min(unused_tiles, 
-                                 key=lambda t: analysis['tile_values'].get(f"{t['color']}_{t['number']}", 0))
+        best_tile_to_discard = min(unused_tiles,
+                                 key=lambda t: analysis['tile_values'].get(face_type(t), 0))
+        best_type = face_type(best_tile_to_discard)
         
         # Risk analizi
-        risk = analysis['risk_analysis'].get(f"{best_tile_to_discard['color']}_{best_tile_to_discard['number']}", 0)
+        risk = analysis['risk_analysis'].get(best_type, 0)
         
-        tile_value = analysis['tile_values'].get(f"{best_tile_to_discard['color']}_{best_tile_to_discard['number']}", 0)
-        reason = f"En düşük değerli taş (değer: {tile_value:.1f})"
+        tile_value = analysis['tile_values'].get(best_type, 0)
+        return self._suggestion(best_tile_to_discard, f"En düşük değerli taş (değer: {tile_value:.1f})", risk)
+    
+    def _all_used_suggestion(self) -> Dict:
+        """Kullanılmayan taş kalmadığında verilen öneri"""
+        return {
+            'suggestion': 'Tüm taşlar kullanılıyor, el açabilirsiniz!',
+            'tile': None,
+            'reason': 'Mükemmel el dizilimi'
+        }
+    
+    def _suggestion(self, tile: int, reason: str, risk: int) -> Dict:
+        """Seçilen taş için öneri: gerekçeye okey uyarısı ve risk düzeyi eklenir"""
+        best_type = face_type(tile)
         
         # Okey taşı özel uyarısı
-        if best_tile_to_discard.get('is_okey') or best_tile_to_discard['color'] == 'sahte_okey':
+        if is_joker(tile) or tile == SAHTE_OKEY:
             reason += ", OKEY TAŞI - Çok dikkatli olun!"
         
         if risk > 7:
@@ -598,8 +712,109 @@ class OkeyAI:
             reason += f", Düşük risk ({risk})"
         
         return {
-            'suggestion': f"{best_tile_to_discard['color']} {best_tile_to_discard['number']} atın",
-            'tile': best_tile_to_discard,
+            'suggestion': f"{TILE_COLOR[best_type]} {TILE_NUMBER[best_type]} atın",
+            'tile': tile,
             'reason': reason,
             'risk_level': risk
-        } 
\ No newline at end of file
+        }
+    
+    def play_turn(self, player_tiles: List[int],
+                  discarded_tiles: Optional[List[int]] = None,
+                  okey_tile: Optional[int] = None,
+                  fields: Optional[List[str]] = None,
+                  simulation_options: Optional[Dict] = None,
+                  discard_history: Optional[List[Tuple[int, int]]] = None,
+                  policy: Optional['DiscardPolicy'] = None,
+                  model: Optional[OpponentModel] = None,
+                  player_counts: Optional[List[int]] = None) -> Dict:
+        """Bir turun tüm sonuçlarını tek geçişte hesapla
+
+        Dizilim bir kez bulunur; taş değerleri, riskler, öneri ve (istenirse)
+        simülasyon aynı analizden ve aynı önbellek kaydından beslenir. Sadece
+        ``fields`` içindeki alanlar hesaplanıp döner. Öneriyi ``policy``
+        seçer; analiz gerektirmeyen politikada sadece öneri istenirse tam
+        analiz yapılmaz. ``model`` ve ``player_counts`` (oturumun olay başına
+        güncellenen durumu) verilirse rakip modeli ve sayımlar yeniden kurulmaz.
+        """
+        if discarded_tiles is None:
+            discarded_tiles = []
+        if fields is None:
+            fields = DEFAULT_TURN_FIELDS
+        unknown = [field for field in fields if field not in TURN_FIELDS]
+        if unknown:
+            raise ValueError(f"Bilinmeyen alan: {', '.join(unknown)}")
+        
+        result = {}
+        analysis = None
+        needs_analysis = policy is None or policy.needs_analysis
+        if any(field in ANALYSIS_FIELDS or (field == 'suggestion' and needs_analysis) for field in fields):
+            analysis = self.analyze_hand(player_tiles, discarded_tiles, okey_tile, discard_history,
+                                         model, player_counts)
+            for field in ANALYSIS_FIELDS:
+                if field in fields:
+                    result[field] = analysis[field]
+        
+        if 'suggestion' in fields:
+            result['suggestion'] = self.suggest_best_tile(player_tiles, discarded_tiles, okey_tile, analysis,
+                                                          discard_history, policy)
+        if 'what_ifs' in fields:
+            result['what_ifs'] = self.what_if_analysis(player_tiles, discarded_tiles, okey_tile, discard_history,
+                                                       model)
+        if 'outs' in fields:
+            result['outs'] = self.outs_analysis(player_tiles, discarded_tiles, okey_tile, discard_history,
+                                                model=model)
+        if 'opening' in fields:
+            result['opening'] = self.opening_search(player_tiles, okey_tile)
+        if 'simulation' in fields:
+            result['simulation'] = self.monte_carlo_simulation(
+                player_tiles, discarded_tiles, okey_tile,
+                discard_history=discard_history, model=model, **(simulation_options or {})
+            )
+        
+        return result
+    
+    def analyze_many(self, hands: Iterable[Tuple[List[int], List[int], Optional[int]]],
+                     chunk_size: int = BATCH_CHUNK_SIZE) -> Iterator[Dict]:
+        """Çok sayıda eli (taşlar, atılanlar, gösterge) analiz et; sonuçlar giriş sırasıyla akar
+
+        Sıradan bağımsız olarak aynı olan eller bir kez analiz edilir ve aynı
+        sonuç nesnesini paylaşır. Süreç havuzu varsa benzersiz eller parçalar
+        halinde işçilere dağıtılır; biten parçanın sonuçları hemen döner.
+        """
+        hands = list(hands)
+        unique, index_of, seen = [], [], {}
+        for tiles, discarded_tiles, okey_tile in hands:
+            discarded_tiles = discarded_tiles or []
+            key = (tuple(sorted(tiles)), tuple(sorted(discarded_tiles)), okey_tile)
+            if key not in seen:
+                seen[key] = len(unique)
+                unique.append((list(tiles), list(discarded_tiles), okey_tile))
+            index_of.append(seen[key])
+        
+        chunks = [unique[i:i + chunk_size] for i in range(0, len(unique), chunk_size)]
+        executor = self.simulation_pool.executor if self.simulation_pool is not None else None
+        if executor is None or len(chunks) <= 1:
+            parts = ([self.analyze_hand(*hand) for hand in chunk] for chunk in chunks)
+        else:
+            parts = executor.map(_analyze_chunk, chunks)
+        
+        # Benzersiz sonuçlar ilk görülme sırasıyla geldiği için giriş sırası korunur
+        results = []
+        position = 0
+        for part in parts:
+            results.extend(part)
+            while position < len(hands) and index_of[position] < len(results):
+                yield results[index_of[position]]
+                position += 1
+
+
+# İşçi süreçlerinde toplu analiz için motor (ilk parçada oluşturulur)
+_worker_engine: Optional[OkeyAI] = None
+
+
+def _analyze_chunk(hands: List[Tuple[List[int], List[int], Optional[int]]]) -> List[Dict]:
+    """Havuz işçisinde bir parça eli analiz et"""
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = OkeyAI()
+    return [_worker_engine.analyze_hand(*hand) for hand in hands]
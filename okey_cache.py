@@ -0,0 +1,115 @@
+"""Boyut ve süre sınırlı LRU önbellek.
+
+Aynı el (aynı taşlar, aynı gösterge) bir tur içinde analiz, öneri ve
+simülasyon için defalarca gönderilir. El değerlendirmeleri sıradan bağımsız
+bir imza ile bu önbellekte tutulur; en eski kullanılan kayıt boyut aşılınca,
+süresi dolan kayıt ilk erişimde düşer.
+
+Ayarlar ortam değişkenlerinden okunur: ``OKEY_CACHE_SIZE`` (kayıt sayısı,
+0 önbelleği kapatır) ve ``OKEY_CACHE_TTL`` (saniye).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+DEFAULT_SIZE = 64
+DEFAULT_TTL = 600.0
+
+
+class LRUCache:
+    """İş parçacığı güvenli, boyut ve süre sınırlı LRU önbellek"""
+
+    def __init__(self, maxsize: int = DEFAULT_SIZE, ttl: Optional[float] = DEFAULT_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = max(0, maxsize)
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> 'LRUCache':
+        """Boyut ve süreyi OKEY_CACHE_SIZE / OKEY_CACHE_TTL'den oku"""
+        maxsize = int(os.environ.get('OKEY_CACHE_SIZE', DEFAULT_SIZE))
+        ttl = float(os.environ.get('OKEY_CACHE_TTL', DEFAULT_TTL))
+        return cls(maxsize, ttl if ttl > 0 else None)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Kaydı döndür (yoksa ya da süresi dolduysa None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and self._clock() - entry[1] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Kaydı sayaçlara ve LRU sırasına dokunmadan döndür (yoksa ya da süresi dolduysa None)
+
+        Önbelleği doldurmayan fırsatçı okumalar içindir; isabet oranını bozmaz.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or (self.ttl is not None and self._clock() - entry[1] > self.ttl):
+            return None
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        """Kaydı ekle; boyut aşılırsa en eski kullanılanı çıkar"""
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._entries[key] = (value, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Kayıt varsa döndür, yoksa factory ile üretip ekle"""
+        value = self.get(key)
+        if value is None:
+            # Üretim kilit dışında: yavaş bir değerlendirme diğer istekleri bekletmez
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Kaydı çıkar ve döndür (yoksa None)"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return None if entry is None else entry[0]
+
+    def clear(self):
+        """Tüm kayıtları sil"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Boyut ve isabet/ıska sayaçları"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
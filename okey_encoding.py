@@ -0,0 +1,133 @@
+"""Yanıt kodlama: hızlı JSON ve sıkıştırma pazarlığı.
+
+- ``dumps``: orjson kuruluysa onunla (NumPy sayıları dahil), değilse
+  standart json ile bayt üretir.
+- ``negotiate``: istemcinin ``Accept-Encoding`` başlığından kodlama seçer
+  (brotli kuruluysa ``br``, sonra ``gzip``). ``MIN_COMPRESS_SIZE``'dan küçük
+  gövdeler sıkıştırılmaz.
+- ``StreamCompressor``: NDJSON akışını satır satır sıkıştırır; her satırdan
+  sonra boşaltılır, ara sonuçlar gecikmeden ulaşır.
+- ``guarded_lines``: akış yarıda hata verirse yanıt bir hata satırıyla
+  düzgünce biter (başlık gönderildikten sonra durum kodu değiştirilemez).
+
+orjson ve brotli isteğe bağlıdır; yoksa davranış aynıdır, sadece daha yavaş
+ya da daha büyük yanıt üretilir.
+"""
+import gzip
+import json
+import zlib
+from typing import Any, Iterable, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_SIZE = 1024  # Bundan küçük gövdelerde sıkıştırma kazancı başlık maliyetine değmez
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4        # Yanıt başına sıkıştırma: hız oranı sıkıştırmadan önemli
+
+
+def _plain(value: Any) -> Any:
+    """Standart json'un yazamadığı NumPy sayılarını Python sayısına çevir"""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"JSON'a yazılamaz: {type(value).__name__}")
+
+
+def dumps(payload: Any) -> bytes:
+    """Yükü JSON baytlarına çevir"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=_plain).encode()
+
+
+def supported_encodings(accept_encoding: Optional[str]) -> set:
+    """Accept-Encoding başlığında kabul edilen (q > 0) kodlamalar"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def negotiate(accept_encoding: Optional[str], size: Optional[int] = None) -> Optional[str]:
+    """Yanıtın kodlaması ('br', 'gzip' ya da None); size verilmezse (akış) boyuta bakılmaz"""
+    if size is not None and size < MIN_COMPRESS_SIZE:
+        return None
+    accepted = supported_encodings(accept_encoding)
+    if brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    """Gövdeyi seçilen kodlamayla sıkıştır (None: olduğu gibi)"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+class StreamCompressor:
+    """Parça parça sıkıştırıcı; her parçadan sonra boşaltır"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits 16 + 15: gzip başlığı ve sonu
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Parçayı sıkıştır ve istemciye hemen gidecek şekilde boşalt"""
+        if self.encoding == 'br':
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        """Akışın son baytları"""
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """Parçaları sıkıştırarak aktar (None: olduğu gibi); kapatılınca kaynak da kapatılır"""
+    if encoding is None:
+        yield from chunks
+        return
+    compressor = StreamCompressor(encoding)
+    try:
+        for data in chunks:
+            yield compressor.chunk(data)
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def guarded_lines(lines: Iterable[bytes]) -> Iterator[bytes]:
+    """NDJSON satırlarını aktar; üretim hata verirse son satır {'error': ...} olur"""
+    try:
+        yield from lines
+    except Exception as e:
+        yield dumps({'error': str(e)}) + b'\n'
@@ -0,0 +1,130 @@
+"""Atılan taş geçmişinden rakip el tahmini.
+
+Her taş tipi için görülmeyen kopya sayısı tutulur (oyuncunun eli, atılan
+taşlar ve gösterge birer kopya düşer). Kimin attığı biliniyorsa o rakibin
+ağırlıkları güncellenir: bir taşı atan oyuncunun o taşla per kurabilecek
+taşları (komşular) ve taşın eşini tutma olasılığı düşer.
+
+Bir kopyanın rakip ``o``'da olma payı ``w[o] × el boyu``, destede olma payı
+``deste boyu`` ile orantılıdır. Bu paylardan rakip başına "en az bir kopya
+tutuyor" olasılığı ve simülasyonun ağırlıklı dağıtımı türetilir.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from okey_melds import MELDS
+from okey_tiles import NUM_NORMAL, NUM_SLOTS, face_type
+
+NUM_OPPONENTS = 3
+OPPONENT_HAND_SIZE = 21
+Z_95 = 1.96  # %95 güven aralığı katsayısı (simülasyon ve search politikası; NumPy'sız)
+
+# Atılan taşa göre ağırlık çarpanları
+NEIGHBOR_WEIGHT = 0.5   # Atılan taşla 3'lü per kurabilecek taşlar
+SAME_WEIGHT = 0.6       # Atılan taşın eşi
+MIN_WEIGHT = 0.05       # Hiçbir taş tamamen dışlanmaz
+
+
+def _danger_pairs(t: int) -> List[Tuple[int, int]]:
+    """t taşını 3'lü bir pere tamamlayan taş çiftleri"""
+    return [tuple(x for x in meld if x != t) for meld in MELDS if len(meld) == 3 and t in meld]
+
+
+DANGER_PAIRS = [_danger_pairs(t) for t in range(NUM_NORMAL)]
+NEIGHBORS = [sorted({x for pair in DANGER_PAIRS[t] for x in pair}) for t in range(NUM_NORMAL)]
+PAIR_COUNTS = [len(pairs) for pairs in DANGER_PAIRS]
+
+
+def remaining_copies(hand_counts: List[int], discard_counts: List[int],
+                     indicator: Optional[int] = None) -> List[int]:
+    """Görülmeyen (rakiplerde ya da destede olabilecek) kopya sayıları"""
+    remaining = [max(0, 2 - hand_counts[t] - discard_counts[t]) for t in range(NUM_SLOTS)]
+    if indicator is not None and remaining[indicator]:
+        remaining[indicator] -= 1
+    return remaining
+
+
+def _use_probability(holding: List[float], t: int) -> float:
+    """Elinde tutma olasılıkları verilen oyuncunun t'yi 3'lü pere tamamlayabilme olasılığı"""
+    miss = 1.0
+    for a, b in DANGER_PAIRS[t]:
+        miss *= 1.0 - holding[a] * holding[b]
+    return 1.0 - miss
+
+
+class OpponentModel:
+    """Görülmeyen taşlar ve rakip başına tutma ağırlıkları"""
+
+    def __init__(self, remaining: List[int]):
+        self.remaining = list(remaining)
+        self.weights = [[1.0] * NUM_SLOTS for _ in range(NUM_OPPONENTS)]
+        self.observed = 0  # Kimin attığı bilinen taş sayısı
+
+    @classmethod
+    def from_tiles(cls, player_tiles: List[int], discarded_tiles: List[int],
+                   indicator: Optional[int] = None,
+                   discard_history: Optional[List[Tuple[int, int]]] = None) -> 'OpponentModel':
+        """Oyuncunun eli, atılan taşlar ve (rakip, taş) geçmişinden model kur
+
+        ``discard_history`` taşları ``discarded_tiles``'a ek olarak sayılır.
+        """
+        hand_counts = [0] * NUM_SLOTS
+        for code in player_tiles:
+            hand_counts[face_type(code)] += 1
+        discard_counts = [0] * NUM_SLOTS
+        for code in discarded_tiles:
+            discard_counts[face_type(code)] += 1
+        model = cls(remaining_copies(hand_counts, discard_counts, indicator))
+        for opponent, code in discard_history or []:
+            model.observe_discard(code, opponent)
+        return model
+
+    def observe_discard(self, code: int, opponent: Optional[int] = None):
+        """Atılan bir taşı işle (rakip biliniyorsa onun ağırlıklarını güncelle)"""
+        t = face_type(code)
+        if self.remaining[t]:
+            self.remaining[t] -= 1
+        if opponent is None or t >= NUM_NORMAL:
+            return
+        if not 0 <= opponent < NUM_OPPONENTS:
+            raise ValueError(f"Geçersiz rakip: {opponent}")
+
+        weights = self.weights[opponent]
+        weights[t] = max(MIN_WEIGHT, weights[t] * SAME_WEIGHT)
+        for n in NEIGHBORS[t]:
+            weights[n] = max(MIN_WEIGHT, weights[n] * NEIGHBOR_WEIGHT)
+        self.observed += 1
+
+    def deck_size(self) -> int:
+        """Rakip ellerinden artan görülmeyen taş sayısı"""
+        return max(0, sum(self.remaining) - NUM_OPPONENTS * OPPONENT_HAND_SIZE)
+
+    def holding_row(self, opponent: int, deck: Optional[int] = None) -> List[float]:
+        """Rakibin her taş tipinden en az bir kopyayı elinde tutma olasılığı"""
+        if deck is None:
+            deck = self.deck_size()
+        # Diğer rakiplerin payı tip başına bir kez toplanır
+        base = [deck + OPPONENT_HAND_SIZE * sum(w[t] for w in self.weights) for t in range(NUM_SLOTS)]
+        weights = self.weights[opponent]
+        return [1.0 - (1.0 - weights[t] * OPPONENT_HAND_SIZE / base[t]) ** copies if copies else 0.0
+                for t, copies in enumerate(self.remaining)]
+
+    def relative_use(self, opponent: int = 0, tiles: Optional[Iterable[int]] = None) -> Dict[int, float]:
+        """Kullanabilme olasılığının, hiçbir kopyası görülmemiş ve geçmişi
+        bilinmeyen bir rakibe oranı (1: bilgi yok, 0: taş ölü)
+
+        ``tiles`` verilirse sadece o normal taş tipleri hesaplanır.
+        """
+        deck = self.deck_size()
+        holding = self.holding_row(opponent, deck)
+        # Bilgisiz rakipte her taşı tutma olasılığı aynıdır: çift başına kapalı biçim
+        share = OPPONENT_HAND_SIZE / (NUM_OPPONENTS * OPPONENT_HAND_SIZE + deck)
+        pair_miss = 1.0 - (1.0 - (1.0 - share) ** 2) ** 2
+        return {t: _use_probability(holding, t) / max(1.0 - pair_miss ** PAIR_COUNTS[t], 1e-9)
+                for t in (range(NUM_NORMAL) if tiles is None else tiles)}
+
+    def likely_tiles(self, opponent: int, limit: int) -> List[int]:
+        """Rakibin elinde olma olasılığı en yüksek taş tipleri"""
+        holding = self.holding_row(opponent)
+        ranked = sorted((t for t in range(NUM_SLOTS) if self.remaining[t]),
+                        key=lambda t: (-holding[t], t))
+        return ranked[:limit]
@@ -0,0 +1,179 @@
+"""Önceden hesaplanmış per tablosu.
+
+Modül yüklenirken tüm geçerli perler bir kez üretilir:
+
+- Seriler: her renkte 3-13 uzunluklu ardışık aralıklar (12-13-1 gibi
+  dönen seriler yok) → renk başına 66, toplam 264
+- Gruplar: her sayıda 3 ya da 4 farklı renk → sayı başına 5, toplam 65
+
+Her per hem taş tipi demeti hem de paketlenmiş el maskesi olarak tutulur.
+Per arama, elin renk/sayı varlık bitlerine karşı sabit bir maske taramasıdır.
+Jokerler aynı taramada yerlerini bulur: perin eldeki eksik pozisyonları
+joker sayısını aşmıyorsa o eksikler joker yuvası olur.
+
+Paketlenmiş el: her taş tipi için 4 bitlik sayım alanı, alanlar sayı-öncelikli
+sıralı (``(sayı - 1) × 4 + renk``). Bir maskenin elde olup olmadığı tek bir
+çıkarma ile anlaşılır: ``((el | GUARD) - maske) & GUARD == GUARD``.
+"""
+import itertools
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from okey_tiles import NUM_NORMAL, JOKER_OFFSET, TILE_NUMBER
+
+MAX_JOKERS = 4  # 2 sahte okey + 2 gerçek okey
+
+# Taş tipi → paket alanı
+SLOT = [(t % 13) * 4 + t // 13 for t in range(NUM_NORMAL)]
+SLOT_TYPE = [0] * NUM_NORMAL
+for _t in range(NUM_NORMAL):
+    SLOT_TYPE[SLOT[_t]] = _t
+
+UNIT = [1 << (4 * SLOT[t]) for t in range(NUM_NORMAL)]
+GUARD = sum(8 << (4 * s) for s in range(NUM_NORMAL))  # Alan taşmasını yakalayan bitler
+
+
+def pack_counts(counts: List[int]) -> int:
+    """Sayım vektörünü paketle (sadece normal taşlar, alan başına en fazla 7)"""
+    packed = 0
+    for t in range(NUM_NORMAL):
+        if counts[t]:
+            packed += UNIT[t] * min(counts[t], 7)
+    return packed
+
+
+def contains(hand: int, mask: int) -> bool:
+    """Paketlenmiş el, maskedeki taşların hepsini içeriyor mu"""
+    return ((hand | GUARD) - mask) & GUARD == GUARD
+
+
+def _build_table() -> Tuple[List[Tuple[int, ...]], List[bool]]:
+    """Tüm geçerli perleri (taş tipi demetleri) üret"""
+    melds, is_run = [], []
+    for color in range(4):
+        base = color * 13
+        for start in range(13):
+            for end in range(start + 2, 13):
+                melds.append(tuple(range(base + start, base + end + 1)))
+                is_run.append(True)
+    for number_offset in range(13):
+        column = [c * 13 + number_offset for c in range(4)]
+        for size in (3, 4):
+            for combo in itertools.combinations(column, size):
+                melds.append(combo)
+                is_run.append(False)
+    return melds, is_run
+
+
+MELDS, MELD_IS_RUN = _build_table()
+MELD_MASKS = [sum(UNIT[t] for t in meld) for meld in MELDS]
+MELD_SCORES = [sum(TILE_NUMBER[t] for t in meld) for meld in MELDS]
+MELD_ID: Dict[Tuple[int, ...], int] = {meld: i for i, meld in enumerate(MELDS)}
+
+# Renk başına seri indeksi: (13 bitlik sayı varlık maskesi, per id)
+RUN_INDEX: List[List[Tuple[int, int]]] = [[] for _ in range(4)]
+# Sayı başına grup indeksi: (4 bitlik renk varlık maskesi, per id)
+SET_INDEX: List[List[Tuple[int, int]]] = [[] for _ in range(13)]
+for _i, _meld in enumerate(MELDS):
+    if MELD_IS_RUN[_i]:
+        RUN_INDEX[_meld[0] // 13].append((sum(1 << (t % 13) for t in _meld), _i))
+    else:
+        SET_INDEX[_meld[0] % 13].append((sum(1 << (t // 13) for t in _meld), _i))
+
+
+@lru_cache(maxsize=None)
+def _bit_offsets(mask: int) -> Tuple[int, ...]:
+    """13 bitlik bir maskedeki dolu bitlerin konumları (eksik pozisyonlar için)"""
+    return tuple(n for n in range(13) if mask >> n & 1)
+
+
+def color_presence(counts: List[int]) -> List[int]:
+    """Her renk için elde bulunan sayıların bit maskesi"""
+    presence = [0, 0, 0, 0]
+    for t in range(NUM_NORMAL):
+        if counts[t]:
+            presence[t // 13] |= 1 << (t % 13)
+    return presence
+
+
+def number_presence(counts: List[int]) -> List[int]:
+    """Her sayı için elde bulunan renklerin bit maskesi"""
+    presence = [0] * 13
+    for t in range(NUM_NORMAL):
+        if counts[t]:
+            presence[t % 13] |= 1 << (t // 13)
+    return presence
+
+
+def find_runs(counts: List[int]) -> List[int]:
+    """Elde kurulabilen serilerin id'leri"""
+    found = []
+    for color, present in enumerate(color_presence(counts)):
+        if present:
+            found.extend(i for bits, i in RUN_INDEX[color] if bits & present == bits)
+    return found
+
+
+def find_sets(counts: List[int]) -> List[int]:
+    """Elde kurulabilen grupların id'leri"""
+    found = []
+    for number_offset, present in enumerate(number_presence(counts)):
+        if present:
+            found.extend(i for bits, i in SET_INDEX[number_offset] if bits & present == bits)
+    return found
+
+
+def meld_id(per_types) -> int:
+    """Taş tipi listesinin per id'si (geçersizse -1)"""
+    return MELD_ID.get(tuple(sorted(per_types)), -1)
+
+
+@lru_cache(maxsize=65536)
+def _run_options(color: int, present: int, jokers: int) -> Tuple[Tuple[int, Tuple[int, ...], Tuple[int, ...]], ...]:
+    """Bir rengin varlık maskesi ve joker sayısı için kurulabilen seriler"""
+    base = color * 13
+    options = []
+    for bits, i in RUN_INDEX[color]:
+        missing = bits & ~present
+        if missing == bits:
+            continue
+        offsets = _bit_offsets(missing)
+        if len(offsets) <= jokers:
+            slots = tuple(base + n for n in offsets)
+            codes = tuple(JOKER_OFFSET + t if t in slots else t for t in MELDS[i])
+            options.append((i, slots, codes))
+    return tuple(options)
+
+
+@lru_cache(maxsize=None)
+def _set_options(number_offset: int, present: int, jokers: int) -> Tuple[Tuple[int, Tuple[int, ...], Tuple[int, ...]], ...]:
+    """Bir sayının renk varlık maskesi ve joker sayısı için kurulabilen gruplar"""
+    options = []
+    for bits, i in SET_INDEX[number_offset]:
+        missing = bits & ~present
+        if missing == bits or len(_bit_offsets(missing)) > jokers:
+            continue
+        slots = tuple(c * 13 + number_offset for c in _bit_offsets(missing))
+        codes = tuple(JOKER_OFFSET + t if t in slots else t for t in MELDS[i])
+        options.append((i, slots, codes))
+    return tuple(options)
+
+
+def find_joker_melds(counts: List[int], jokers: int) -> List[Tuple[int, Tuple[int, ...], Tuple[int, ...]]]:
+    """Jokerlerle tamamlanabilen perleri tek geçişte bul
+
+    Her sonuç: (per id, joker yuvalarındaki taş tipleri, kodlar). Perin eldeki
+    eksik pozisyonları joker yuvası olur; jokersiz kurulabilen perler boş
+    yuva demetiyle döner ve en az bir gerçek taş şarttır. Sonuçlar renk/sayı
+    varlık maskesine göre önbelleklenir.
+    """
+    jokers = min(jokers, MAX_JOKERS)
+    found = []
+    for color, present in enumerate(color_presence(counts)):
+        if present:
+            found.extend(_run_options(color, present, jokers))
+    for number_offset, present in enumerate(number_presence(counts)):
+        if present:
+            found.extend(_set_options(number_offset, present, jokers))
+    return found
+
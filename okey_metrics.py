@@ -0,0 +1,302 @@
+"""Motor ölçümleri: aşama süreleri, sayaçlar, Prometheus çıktısı ve yavaş istek profili.
+
+Aşamalar (``phase``) süreyi süreç genelindeki histograma yazar; istek
+içinde ``collect`` açıksa aynı süre isteğin ``timings`` bloğuna da eklenir.
+Ölçüm bir ``perf_counter`` çifti ve kilitli bir toplamadır, sıcak yolda
+ihmal edilebilir maliyettedir.
+
+Yavaş istek profili isteğe bağlıdır (``OKEY_PROFILE_SLOW_MS``): açıkken
+ayrı bir iş parçacığı istekleri işleyen iş parçacıklarının yığınını
+``OKEY_PROFILE_INTERVAL_MS`` aralıkla örnekler; eşikten uzun süren isteğin
+örnekleri ``OKEY_PROFILE_DIR`` altına katlanmış yığın (flamegraph.pl /
+speedscope) biçiminde yazılır.
+
+Ölçümler süreç içindedir: birden çok worker ile her worker kendi
+değerlerini sunar.
+"""
+import bisect
+import collections
+import contextvars
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Süre histogramı sınırları (saniye)
+TIME_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Sayı histogramı sınırları (arama durumu)
+COUNT_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: str = '') -> str:
+    """Prometheus etiket bloğu: {a="1",b="2"}"""
+    parts = [f'{name}="{value}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    """Etiketli, artan sayaç"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float, str]]:
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, labels, value, ''
+
+
+class Histogram:
+    """Etiketli, sabit sınırlı histogram"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = TIME_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        # Etiket → (sınır başına sayım, toplam, adet)
+        self._values: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float, str]]:
+        with self._lock:
+            items = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._values.items()]
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                yield self.name + '_bucket', labels, cumulative, f'le="{bound}"'
+            yield self.name + '_bucket', labels, count, 'le="+Inf"'
+            yield self.name + '_sum', labels, total, ''
+            yield self.name + '_count', labels, count, ''
+
+
+class Registry:
+    """Ölçümler ve okuma anında değer üreten toplayıcılar (önbellek istatistikleri gibi)"""
+
+    def __init__(self):
+        self.metrics: List = []
+        # Toplayıcı: [(ad, açıklama, tür, [(etiketler, değer)])] döndüren çağrı
+        self.collectors: List[Callable[[], List[Tuple[str, str, str, List[Tuple[Dict, float]]]]]] = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        metric = Counter(name, help_text)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = TIME_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus metin biçimi (0.0.4)"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value, extra in metric.samples():
+                lines.append(f"{name}{_format_labels(labels, extra)} {value:g}")
+        for collector in self.collectors:
+            for name, help_text, kind, values in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in values:
+                    lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {value:g}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+PHASE_SECONDS = REGISTRY.histogram('okey_phase_seconds', "Motor aşamalarının süresi")
+REQUEST_SECONDS = REGISTRY.histogram('okey_request_seconds', "Uç nokta başına istek süresi")
+REQUESTS = REGISTRY.counter('okey_requests_total', "Uç nokta ve sonuç başına istek sayısı")
+SEARCH_STATES = REGISTRY.histogram('okey_search_states', "Dizilim aramasında ziyaret edilen alt el sayısı",
+                                   COUNT_BUCKETS)
+SIMULATION_SAMPLES = REGISTRY.counter('okey_simulation_samples_total', "Alınan Monte Carlo örneği sayısı")
+SLOW_PROFILES = REGISTRY.counter('okey_slow_profiles_total', "Yazılan yavaş istek profili sayısı")
+
+# Okuma anında istatistikleri toplanan önbellekler: ad → stats() çağrısı
+_caches: Dict[str, Callable[[], Dict]] = {}
+
+
+def register_cache(name: str, stats: Callable[[], Dict]):
+    """Önbelleğin sayaçlarını /metrics çıktısına ekle (LRUCache.stats biçimi)"""
+    _caches[name] = stats
+
+
+def _cache_families():
+    """Önbellek başına kayıt sayısı, isabet/ıska ve düşürme sayaçları"""
+    stats = {name: fn() for name, fn in list(_caches.items())}
+    families = [
+        ('okey_cache_entries', "Önbellekteki kayıt sayısı", 'gauge', 'size'),
+        ('okey_cache_hits_total', "Önbellek isabetleri", 'counter', 'hits'),
+        ('okey_cache_misses_total', "Önbellek ıskaları", 'counter', 'misses'),
+        ('okey_cache_evictions_total', "Boyut aşımıyla düşen kayıtlar", 'counter', 'evictions'),
+        ('okey_cache_expirations_total', "Süresi dolan kayıtlar", 'counter', 'expirations'),
+        ('okey_cache_hit_ratio', "İsabet oranı", 'gauge', 'hit_rate')
+    ]
+    return [(name, help_text, kind, [({'cache': cache}, values[field]) for cache, values in stats.items()])
+            for name, help_text, kind, field in families]
+
+
+REGISTRY.register_collector(_cache_families)
+
+# İsteğin aşama süreleri (collect açıkken)
+_timings: contextvars.ContextVar = contextvars.ContextVar('okey_timings', default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Aşamanın süresini ölç (histogram ve varsa isteğin timings bloğu)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        PHASE_SECONDS.observe(elapsed, phase=name)
+        timings = _timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed * 1000
+
+
+@contextmanager
+def collect() -> Iterator[Dict[str, float]]:
+    """İstek boyunca aşama sürelerini (ms) topla"""
+    timings: Dict[str, float] = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def _frame_stack(frame) -> str:
+    """Yığını kökten yaprağa katlanmış biçimde yaz: dosya:fonksiyon;..."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SlowRequestProfiler:
+    """İstekleri örnekleyen ve eşikten uzun sürenlerin yığınlarını yazan profil aracı"""
+
+    def __init__(self, threshold_ms: float, interval_ms: float = 5.0, directory: str = '/tmp/okey-profiles'):
+        self.threshold_ms = threshold_ms
+        self.interval = interval_ms / 1000
+        self.directory = directory
+        self._active: Dict[int, collections.Counter] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> Optional['SlowRequestProfiler']:
+        """OKEY_PROFILE_SLOW_MS verilmişse profil aracı (yoksa None: kapalı)"""
+        threshold = os.environ.get('OKEY_PROFILE_SLOW_MS')
+        if not threshold:
+            return None
+        return cls(float(threshold),
+                   float(os.environ.get('OKEY_PROFILE_INTERVAL_MS', 5)),
+                   os.environ.get('OKEY_PROFILE_DIR', '/tmp/okey-profiles'))
+
+    def _run(self):
+        """Örnekleyici: etkin istek varken her aralıkta yığınları say"""
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                if not self._active:
+                    self._wake.clear()
+                    continue
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[_frame_stack(frame)] += 1
+
+    @contextmanager
+    def track(self, name: str):
+        """Bu iş parçacığındaki isteği örnekle; eşik aşılırsa yığınları yaz"""
+        thread_id = threading.get_ident()
+        stacks: collections.Counter = collections.Counter()
+        with self._lock:
+            self._active[thread_id] = stacks
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='okey-profiler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                del self._active[thread_id]
+            if elapsed_ms >= self.threshold_ms and stacks:
+                self._dump(name, elapsed_ms, stacks)
+
+    def _dump(self, name: str, elapsed_ms: float, stacks: collections.Counter):
+        """Katlanmış yığınları dosyaya yaz: her satır 'yığın sayı'"""
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(self.directory, f"{stamp}-{name}-{elapsed_ms:.0f}ms-{threading.get_ident()}.folded")
+        with open(path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        SLOW_PROFILES.inc(endpoint=name)
+
+
+PROFILER = SlowRequestProfiler.from_env()
+
+
+@contextmanager
+def request(endpoint: str) -> Iterator[Dict[str, float]]:
+    """Bir API isteğini ölç: süre, sonuç sayacı, aşama süreleri ve (açıksa) profil"""
+    start = time.perf_counter()
+    status = 'error'
+    try:
+        with PROFILER.track(endpoint) if PROFILER is not None else nullcontext(), collect() as timings:
+            yield timings
+            timings['total'] = (time.perf_counter() - start) * 1000
+        status = 'ok'
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+        REQUESTS.inc(endpoint=endpoint, status=status)
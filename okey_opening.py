@@ -0,0 +1,175 @@
+"""El açma araması: perlerle 101 ve çiftle (en az beş çift) açma.
+
+Perle açma için iki arama vardır:
+
+- ``can_open_with_pers``: eşiğe ulaşan bir dizilim bulunduğu anda durur.
+  Kalan taşlar ve jokerlerle eşiğe ulaşılamayacak dallar (taş değerleri
+  toplamı + 13 × joker < gereken puan) açılmaz; başarısız alt eller gereken
+  puanla birlikte hatırlanır.
+- ``cheapest_per_opening``: eşiğe ulaşan dizilimler içinden en az taş (sonra
+  en az joker, sonra en yüksek puan) kullananı bulur; aynı eşik budaması
+  uygulanır.
+
+Her iki aramadan önce hiçbir pere giremeyen taşlar elden çıkarılır. Perler
+çözücünün (okey_solver) joker yuvalı per tablosundan gelir.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from okey_melds import GUARD, MAX_JOKERS, SLOT_TYPE, UNIT, pack_counts
+from okey_solver import MELDS_BY_FIRST, HandEvaluator
+from okey_tiles import NUM_NORMAL, TILE_NUMBER
+
+OPEN_THRESHOLD = 101    # Perle açmak için gereken puan
+PAIRS_TO_OPEN = 5       # Çiftle açmak için gereken çift sayısı
+
+
+def _joinable_counts(counts: List[int], jokers: int) -> List[int]:
+    """Hiçbir pere giremeyen taşları çıkarılmış sayım vektörü
+
+    Bir 3'lü perin taşları birbirine girebildiği için tek geçiş yeterlidir.
+    """
+    hand = pack_counts(counts)
+    return [counts[t] if counts[t] and HandEvaluator._can_join(hand, jokers, t) else 0
+            for t in range(NUM_NORMAL)]
+
+
+def _hand_value(counts: List[int]) -> int:
+    return sum(TILE_NUMBER[t] * counts[t] for t in range(NUM_NORMAL) if counts[t])
+
+
+def _lowest(hand: int) -> int:
+    """Paketteki en düşük dolu alanın taş tipi"""
+    return SLOT_TYPE[((hand & -hand).bit_length() - 1) >> 2]
+
+
+def _reaches(hand: int, jokers_left: int, remaining_value: int, need: int, failed: Dict) -> bool:
+    """Alt elden need puanlık perler kurulabilir mi (başarısızlıklar failed'e yazılır)"""
+    if need <= 0:
+        return True
+    if not hand or remaining_value + 13 * jokers_left < need:
+        return False
+    key = (hand, jokers_left)
+    # Daha az puanla başarısız olan alt el bu puanla da başarısızdır
+    if failed.get(key, need + 1) <= need:
+        return False
+
+    t = _lowest(hand)
+    guarded = hand | GUARD
+    for mask, used, joker_fields, score, real_value, _ in MELDS_BY_FIRST[t]:
+        if used > jokers_left or (guarded - mask) & GUARD != GUARD:
+            continue
+        if joker_fields and (hand - mask) & joker_fields:
+            continue
+        if _reaches(hand - mask, jokers_left - used, remaining_value - real_value, need - score, failed):
+            return True
+    if _reaches(hand - UNIT[t], jokers_left, remaining_value - TILE_NUMBER[t], need, failed):
+        return True
+
+    failed[key] = min(failed.get(key, need), need)
+    return False
+
+
+def can_open_with_pers(counts: List[int], jokers: int, threshold: int = OPEN_THRESHOLD) -> bool:
+    """Perlerle threshold puana ulaşılabilir mi (ilk bulunan dizilimde durur)"""
+    jokers = min(jokers, MAX_JOKERS)
+    counts = _joinable_counts(counts, jokers)
+    return _reaches(pack_counts(counts), jokers, _hand_value(counts), threshold, {})
+
+
+def _cheapest(hand: int, jokers_left: int, remaining_value: int, need: int,
+              memo: Dict) -> Optional[Tuple[int, int, int]]:
+    """need puana ulaşan en ucuz seçim: (taş sayısı, joker sayısı, -puan); ulaşılamıyorsa None"""
+    if need <= 0:
+        return 0, 0, 0
+    if not hand or remaining_value + 13 * jokers_left < need:
+        return None
+    key = (hand, jokers_left, need)
+    cached = memo.get(key)
+    if cached is not None:
+        return cached[0]
+
+    t = _lowest(hand)
+    guarded = hand | GUARD
+    best, best_choice = None, None
+    for meld in MELDS_BY_FIRST[t]:
+        mask, used, joker_fields, score, real_value, codes = meld
+        if used > jokers_left or (guarded - mask) & GUARD != GUARD:
+            continue
+        if joker_fields and (hand - mask) & joker_fields:
+            continue
+        # Bu per tek başına bile bulunan seçimden fazla taş kullanıyorsa atla
+        if best is not None and len(codes) > best[0]:
+            continue
+        rest = _cheapest(hand - mask, jokers_left - used, remaining_value - real_value, need - score, memo)
+        if rest is None:
+            continue
+        cost = (rest[0] + len(codes), rest[1] + used, rest[2] - score)
+        if best is None or cost < best:
+            best, best_choice = cost, meld
+
+    # Taşı kullanmadan bırak
+    rest = _cheapest(hand - UNIT[t], jokers_left, remaining_value - TILE_NUMBER[t], need, memo)
+    if rest is not None and (best is None or rest < best):
+        best, best_choice = rest, None
+
+    memo[key] = (best, (t, best_choice))
+    return best
+
+
+def cheapest_per_opening(counts: List[int], jokers: int,
+                         threshold: int = OPEN_THRESHOLD) -> Optional[Tuple[int, List[Tuple[int, ...]]]]:
+    """Eşiğe ulaşan en az taşlı per seçimi: (puan, perler); ulaşılamıyorsa None"""
+    jokers = min(jokers, MAX_JOKERS)
+    counts = _joinable_counts(counts, jokers)
+    hand = pack_counts(counts)
+    memo: Dict = {}
+    if _cheapest(hand, jokers, _hand_value(counts), threshold, memo) is None:
+        return None
+
+    # Seçimleri takip ederek perleri çıkar
+    score, pers, need = 0, [], threshold
+    while need > 0:
+        t, meld = memo[(hand, jokers, need)][1]
+        if meld is None:
+            hand -= UNIT[t]
+        else:
+            hand -= meld[0]
+            jokers -= meld[1]
+            need -= meld[3]
+            score += meld[3]
+            pers.append(meld[5])
+    return score, pers
+
+
+def count_pairs(counts: List[int], jokers: int) -> int:
+    """Elden kurulabilecek çift sayısı (joker tek taşla ya da diğer jokerle çift olur)"""
+    pairs = sum(1 for t in range(NUM_NORMAL) if counts[t] >= 2)
+    singles = sum(1 for t in range(NUM_NORMAL) if counts[t] == 1)
+    with_single = min(jokers, singles)
+    return pairs + with_single + (jokers - with_single) // 2
+
+
+def pair_opening(counts: List[int], jokers: int, spare: Optional[List[int]] = None,
+                 pairs_needed: int = PAIRS_TO_OPEN) -> List[Tuple[Optional[int], Optional[int]]]:
+    """Çiftle açmak için seçilen çiftler (açılamıyorsa boş liste)
+
+    Önce gerçek çiftler (dizilimde boşta kalanlar, sonra yüksek sayılılar),
+    yetmezse jokerle tamamlanan yüksek tek taşlar, en son iki joker seçilir.
+    Çiftin joker tarafı None'dır.
+    """
+    if count_pairs(counts, jokers) < pairs_needed:
+        return []
+    if spare is None:
+        spare = [0] * NUM_NORMAL
+    real = sorted((t for t in range(NUM_NORMAL) if counts[t] >= 2),
+                  key=lambda t: (spare[t] < 2, -TILE_NUMBER[t], t))
+    chosen: List[Tuple[Optional[int], Optional[int]]] = [(t, t) for t in real[:pairs_needed]]
+    singles = sorted((t for t in range(NUM_NORMAL) if counts[t] == 1), key=lambda t: (-TILE_NUMBER[t], t))
+    for t in singles:
+        if len(chosen) == pairs_needed or not jokers:
+            break
+        chosen.append((t, None))
+        jokers -= 1
+    while len(chosen) < pairs_needed:
+        chosen.append((None, None))
+    return chosen
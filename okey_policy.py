@@ -0,0 +1,299 @@
+"""Atış politikaları: elden atılacak taşı seçen, birbirinin yerine geçen stratejiler.
+
+- ``heuristic``: tam analiz (dizilim, taş değerleri, rakip modeli, risk);
+  en düşük değerli taş atılır. Varsayılan politika.
+- ``rollout``: sadece dizilim ve tip başına değer tablosu; rakip modeli,
+  risk ve öneri metinleri hesaplanmaz. Seçimi heuristic ile aynıdır, maliyeti
+  çok daha düşüktür; self-play turlarında da bu tablo kullanılır.
+- ``search``: değer tablosuna göre en iyi birkaç adayı self-play ile oyun
+  sonuna kadar oynatır (turlarda rollout politikası), cezası en düşük adayı
+  seçer. Oyunlar ardışık elemeyle ``OKEY_SEARCH_BUDGET_MS`` süresi içinde
+  dağıtılır; gerekçede cezanın güven aralığı verilir. En pahalı politika.
+
+Politika istek başına ``policy`` alanıyla seçilir. ``compare_policies`` iki
+politikayı self-play'de koltuk değiştirerek karşılaştırır (kalite ve karar
+başına süre)::
+
+    python okey_policy.py heuristic rollout --games 200 --workers 4
+"""
+import argparse
+import json
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Tuple
+
+from okey_ai import OkeyAI, discard_risk, value_adjustments
+from okey_infer import Z_95
+from okey_selfplay import PlayerState, SolverAgent, position_from_tiles, rollout_discards, self_play
+from okey_solver import HandEvaluator
+from okey_tiles import (JOKER_OFFSET, NUM_NORMAL, SAHTE_OKEY, counts_to_tiles, is_joker,
+                        okey_index, to_counts)
+
+SEARCH_CANDIDATES = 3     # search: oyun sonuna kadar oynatılan aday sayısı
+SEARCH_ROUND = 4          # search: eleme turunda kalan aday başına oyun sayısı
+SEARCH_MAX_ROLLOUTS = 64  # search: aday başına en fazla oyun
+SEARCH_SEED = 0           # Aynı durum aynı seçimi versin diye sabit tohum
+# search: öneri başına süre bütçesi (ms); dolunca o ana kadarki en iyi aday seçilir
+SEARCH_TIME_BUDGET_MS = float(os.environ.get('OKEY_SEARCH_BUDGET_MS', 1000))
+
+
+class DiscardPolicy(ABC):
+    """Atış politikası: durumdan öneri ({'suggestion', 'tile', 'reason', 'risk_level'}) üretir"""
+
+    name = ''
+    needs_analysis = False  # Tam analiz (rakip modeli, risk) gerekiyor mu
+    expensive = False       # Pahalı kuyrukta mı çalışmalı
+
+    @abstractmethod
+    def suggest(self, engine: OkeyAI, player_tiles: List[int], discarded_tiles: List[int],
+                okey_tile: Optional[int] = None, analysis: Optional[Dict] = None,
+                discard_history: Optional[List[Tuple[int, int]]] = None) -> Dict:
+        """Atılacak taşın önerisi"""
+
+
+class HeuristicPolicy(DiscardPolicy):
+    """Tam analizin en düşük değerli taşı (motorun varsayılan seçimi)"""
+
+    name = 'heuristic'
+    needs_analysis = True
+
+    def suggest(self, engine, player_tiles, discarded_tiles, okey_tile=None, analysis=None,
+                discard_history=None):
+        return engine.suggest_best_tile(player_tiles, discarded_tiles, okey_tile, analysis, discard_history)
+
+
+class RolloutPolicy(DiscardPolicy):
+    """Dizilim + değer tablosu: rakip modeli ve risk hesabı olmadan en düşük değerli taş"""
+
+    name = 'rollout'
+
+    def suggest(self, engine, player_tiles, discarded_tiles, okey_tile=None, analysis=None,
+                discard_history=None):
+        arrangement = engine._find_best_arrangement(player_tiles, okey_tile)
+        if not arrangement['unused_tiles']:
+            return engine._all_used_suggestion()
+        player_counts = to_counts(player_tiles)
+        discard_counts = _discard_counts(discarded_tiles, discard_history)
+        tile, value = _lowest_value(engine, arrangement['unused_tiles'], player_counts, discard_counts,
+                                    okey_tile)
+        return engine._suggestion(tile, f"En düşük değerli taş (değer: {value:.1f})",
+                                  discard_risk(tile, discard_counts))
+
+
+class SearchPolicy(DiscardPolicy):
+    """Değer tablosunun en iyi adaylarını oyun sonuna kadar oynatıp en düşük cezalıyı seç
+
+    Adaylar turlar halinde aynı dağıtımlarla oynatılır; lidere göre ceza
+    farkının güven aralığı sıfırın üstünde kalan aday elenir (simülasyondaki
+    ardışık eleme, eşli farklarla). Tek aday kalınca, aday başına oyun
+    sınırına ya da süre bütçesine ulaşınca durulur; bütçe dolmadıkça seçim
+    tohumdan belirlenir. Gösterge yoksa (okey yok) self-play kurulamaz;
+    rollout politikasına düşer.
+    """
+
+    name = 'search'
+    expensive = True
+
+    def __init__(self, candidates: int = SEARCH_CANDIDATES, round_rollouts: int = SEARCH_ROUND,
+                 max_rollouts: int = SEARCH_MAX_ROLLOUTS, time_budget_ms: Optional[float] = SEARCH_TIME_BUDGET_MS,
+                 seed: int = SEARCH_SEED):
+        self.candidates = candidates
+        self.round_rollouts = round_rollouts
+        self.max_rollouts = max_rollouts
+        self.time_budget_ms = time_budget_ms
+        self.seed = seed
+
+    def suggest(self, engine, player_tiles, discarded_tiles, okey_tile=None, analysis=None,
+                discard_history=None):
+        if okey_tile is None:
+            return POLICIES['rollout'].suggest(engine, player_tiles, discarded_tiles, okey_tile,
+                                               analysis, discard_history)
+        evaluator = engine._hand_evaluator(player_tiles, okey_tile)
+        arrangement = engine._find_best_arrangement(player_tiles, okey_tile, evaluator)
+        if not arrangement['unused_tiles']:
+            return engine._all_used_suggestion()
+
+        player_counts = to_counts(player_tiles)
+        discard_counts = _discard_counts(discarded_tiles, discard_history)
+        adjustments = value_adjustments(player_counts, discard_counts)
+        candidates = sorted({t for t in arrangement['unused_tiles'] if not is_joker(t) and t != SAHTE_OKEY},
+                            key=lambda t: (engine._calculate_tile_value(t, player_counts, discard_counts,
+                                                                        okey_tile, adjustments), t))
+        if not candidates:
+            tile, value = _lowest_value(engine, arrangement['unused_tiles'], player_counts,
+                                        discard_counts, okey_tile)
+            return engine._suggestion(tile, f"En düşük değerli taş (değer: {value:.1f})",
+                                      discard_risk(tile, discard_counts))
+        candidates = candidates[:self.candidates]
+
+        # Self-play'de okey joker, sahte okey okeyin yerine geçtiği taştır
+        counts, jokers, seen = position_from_tiles(
+            player_tiles, discarded_tiles + [code for _, code in discard_history or []], okey_tile)
+        outcomes, active = self._search(counts, jokers, seen, okey_tile, candidates)
+        intervals = {t: _interval(outcomes[t]['penalties']) for t in active}
+        tile = min(active, key=lambda t: (intervals[t][0], -outcomes[t]['wins'], candidates.index(t)))
+        mean, half = intervals[tile]
+        outcome = outcomes[tile]
+        reason = (f"Oyun sonu simülasyonu: ortalama ceza {mean:.1f} ± {half:.1f}, "
+                  f"kazanma %{outcome['wins'] / outcome['rollouts'] * 100:.0f} "
+                  f"({outcome['rollouts']} oyun, {len(candidates) - len(active)} aday elendi)")
+        return engine._suggestion(tile, reason, discard_risk(tile, discard_counts))
+
+    def _search(self, counts: List[int], jokers: int, seen: List[int], indicator: int,
+                candidates: List[int]) -> Tuple[Dict[int, Dict], List[int]]:
+        """Ardışık eleme: kalan adayları turlar halinde oynat; (aday sonuçları, kalan adaylar)"""
+        started = time.perf_counter()
+        deadline = None if self.time_budget_ms is None else started + self.time_budget_ms / 1000.0
+        outcomes = {t: {'wins': 0, 'penalties': [], 'rollouts': 0} for t in candidates}
+        active = list(candidates)
+        played = 0
+        while played < self.max_rollouts:
+            size = min(self.round_rollouts, self.max_rollouts - played)
+            # Her turda kalan adaylar aynı dağıtımlarla oynar (ortak rastgele sayılar)
+            for t, shard in rollout_discards(counts, jokers, seen, indicator, active, size, self.seed,
+                                             first=played).items():
+                for key, value in shard.items():
+                    outcomes[t][key] += value
+            played += size
+            active = _prune_penalties(outcomes, active)
+            if len(active) == 1 or (deadline is not None and time.perf_counter() >= deadline):
+                break
+        return outcomes, active
+
+
+def _discard_counts(discarded_tiles: List[int],
+                    discard_history: Optional[List[Tuple[int, int]]] = None) -> List[int]:
+    """Görülen (atılmış) taşların sayım vektörü"""
+    return to_counts(discarded_tiles + [code for _, code in discard_history or []])
+
+
+def _interval(values: List[float]) -> Tuple[float, float]:
+    """Örneklerin ortalaması ve %95 güven aralığının yarı genişliği"""
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, float('inf')
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return mean, Z_95 * math.sqrt(variance / n)
+
+
+def _prune_penalties(outcomes: Dict[int, Dict], active: List[int]) -> List[int]:
+    """Lidere (en düşük ortalama ceza) göre eşli ceza farkı kesin olarak pozitif olan adayları çıkar"""
+    leader = min(active, key=lambda t: _interval(outcomes[t]['penalties'])[0])
+    kept = []
+    for t in active:
+        if t != leader:
+            diffs = [a - b for a, b in zip(outcomes[t]['penalties'], outcomes[leader]['penalties'])]
+            mean, half = _interval(diffs)
+            if mean - half > 0:
+                continue
+        kept.append(t)
+    return kept
+
+
+def _lowest_value(engine: OkeyAI, unused_tiles: List[int], player_counts: List[int],
+                  discard_counts: List[int], okey_tile: Optional[int]) -> Tuple[int, float]:
+    """Kullanılmayan taşlardan değer tablosuna göre en değersizi ve değeri"""
+    adjustments = value_adjustments(player_counts, discard_counts)
+    values = {tile: engine._calculate_tile_value(tile, player_counts, discard_counts, okey_tile, adjustments)
+              for tile in unused_tiles}
+    tile = min(unused_tiles, key=lambda t: values[t])
+    return tile, values[tile]
+
+
+POLICIES: Dict[str, DiscardPolicy] = {
+    policy.name: policy for policy in (HeuristicPolicy(), RolloutPolicy(), SearchPolicy())
+}
+DEFAULT_POLICY = 'heuristic'
+
+
+def get_policy(name: Optional[str] = None) -> DiscardPolicy:
+    """Adıyla politika (boş: varsayılan)"""
+    policy = POLICIES.get(name or DEFAULT_POLICY)
+    if policy is None:
+        raise ValueError(f"Bilinmeyen politika: {name} (seçenekler: {', '.join(POLICIES)})")
+    return policy
+
+
+# Self-play işçilerinde politikaların kullandığı motor (ilk kararda oluşturulur)
+_engine: Optional[OkeyAI] = None
+
+
+class PolicyAgent(SolverAgent):
+    """Atış kararını bir politikaya soran self-play oyuncusu (yerden alma SolverAgent'tan)"""
+
+    def __init__(self, policy: str):
+        self.policy = policy
+
+    def choose_discard(self, player: PlayerState, evaluator: HandEvaluator, game) -> int:
+        global _engine
+        if _engine is None:
+            _engine = OkeyAI()
+        # Oyuncunun sayımları motorun taş kodlarına: jokerler okey kodlu işaretli taşlardır
+        okey = okey_index(game.indicator)
+        tiles = counts_to_tiles(player.counts) + [JOKER_OFFSET + okey] * player.jokers
+        suggestion = get_policy(self.policy).suggest(_engine, tiles, list(game.discards), game.indicator)
+        tile = suggestion['tile']
+        if tile is None or is_joker(tile) or tile >= NUM_NORMAL or not player.counts[tile]:
+            return SolverAgent.choose_discard(self, player, evaluator, game)
+        return tile
+
+
+def compare_policies(first: str, second: str, num_games: int, seed: int = 0,
+                     executor: Optional[Executor] = None) -> Dict:
+    """İki politikayı self-play'de karşılaştır
+
+    Politikalar karşılıklı koltuklarda oynar; aynı tohumlarla koltuklar
+    değiştirilip tekrar oynanır, böylece dağıtım ve koltuk şansı dengelenir.
+    Politika başına kazanma/açma oranı, ortalama ceza ve saniyedeki karar
+    sayısı döner.
+    """
+    get_policy(first), get_policy(second)
+    stats = {name: {'seats': 0, 'wins': 0.0, 'opened': 0.0, 'penalty': 0.0,
+                    'decisions_per_sec': []} for name in (first, second)}
+    for layout in ((first, second) * 2, (second, first) * 2):
+        summary = self_play(num_games, seed, executor, agents=[PolicyAgent(name) for name in layout])
+        for name, seat in zip(layout, summary['seats']):
+            entry = stats[name]
+            entry['seats'] += 1
+            entry['wins'] += seat['win_rate']
+            entry['opened'] += seat['open_rate']
+            entry['penalty'] += seat['avg_penalty']
+            if seat['decisions_per_sec']:
+                entry['decisions_per_sec'].append(seat['decisions_per_sec'])
+    return {
+        'games': 2 * num_games,
+        'seed': seed,
+        'policies': {name: {
+            'win_rate': entry['wins'] / entry['seats'],
+            'open_rate': entry['opened'] / entry['seats'],
+            'avg_penalty': entry['penalty'] / entry['seats'],
+            'decisions_per_sec': (sum(entry['decisions_per_sec']) / len(entry['decisions_per_sec'])
+                                  if entry['decisions_per_sec'] else None)
+        } for name, entry in stats.items()}
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Atış politikalarını self-play'de karşılaştır")
+    parser.add_argument('first', choices=list(POLICIES))
+    parser.add_argument('second', choices=list(POLICIES))
+    parser.add_argument('--games', type=int, default=200, help="koltuk düzeni başına oyun sayısı")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="süreç sayısı (varsayılan: çekirdek sayısı)")
+    args = parser.parse_args(argv)
+
+    from okey_pool import SimulationPool
+    pool = SimulationPool(args.workers)
+    try:
+        print(json.dumps(compare_policies(args.first, args.second, args.games, args.seed, pool.executor),
+                         indent=2))
+    finally:
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
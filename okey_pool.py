@@ -0,0 +1,55 @@
+"""Simülasyonlar için kalıcı süreç havuzu.
+
+Havuz ilk kullanımda oluşturulur (gunicorn ana süreci çatallamadan önce
+süreç açılmasın diye) ve worker yaşadıkça yeniden kullanılır. Tek işçili
+havuz hiç süreç açmaz; simülasyon çağıran süreçte çalışır.
+"""
+import os
+import threading
+from concurrent.futures import Executor
+from typing import Optional
+
+
+class SimulationPool:
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'SimulationPool':
+        """OKEY_SIM_WORKERS ortam değişkeninden havuz oluştur (varsayılan: çekirdek sayısı)"""
+        workers = os.environ.get('OKEY_SIM_WORKERS')
+        return cls(int(workers) if workers else None)
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        """Süreç havuzu (tek işçide None)"""
+        if self.workers <= 1:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # multiprocessing ancak havuz gerçekten açılırken yüklenir
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def reset(self):
+        """Bozulan havuzu kapat; sonraki kullanımda yenisi açılır"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def run(self, fn, *args, **kwargs):
+        """fn'i havuzun executor'ü ile çağır; havuz bozulmuşsa bir kez yenile"""
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            return fn(*args, executor=self.executor, table_chunks=self.workers, **kwargs)
+        except BrokenProcessPool:
+            self.reset()
+            return fn(*args, executor=self.executor, table_chunks=self.workers, **kwargs)
+
+    def shutdown(self):
+        """Havuzu kapat"""
+        self.reset()
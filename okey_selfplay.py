@@ -0,0 +1,412 @@
+"""Dört oyunculu tam oyun simülasyonu (self-play).
+
+Gerçek 106 taşlık deste karılır, gösterge açılır (sahte okey gösterge
+olamaz), dağıtan 22, diğerleri 21 taş alır. Sırası gelen oyuncu bir önceki
+oyuncunun attığı taşı alır ya da desteden çeker, sonra bir taş atar. Okey
+taşları joker, sahte okey okeyin yerine geçtiği taş olarak oynanır.
+
+Kurallar sadeleştirilmiştir: dizilim puanı 101'e ulaşan oyuncu açmış sayılır
+(perler elde kalır); bir taş dışındaki tüm taşları perlere giren oyuncu o taşı
+atıp biter. Deste biterse oyun berabere biter.
+
+Oyuncular ``Agent`` arayüzünü uygular; varsayılan ajan kesin çözücüyle
+karar verir. Her oyunun tohumu (kök tohum, oyun sırası) çiftinden türetilir:
+aynı tohum işçi sayısından bağımsız olarak aynı sonuçları verir.
+
+Komut satırı: ``python okey_selfplay.py --games 1000 --workers 4``
+"""
+import argparse
+import json
+import random
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Tuple
+
+from okey_ai import value_adjustments
+from okey_melds import MAX_JOKERS, pack_counts
+from okey_solver import HandEvaluator
+from okey_tiles import NUM_NORMAL, NUM_PHYSICAL, NUM_SLOTS, SAHTE_OKEY, TILE_NUMBER, is_joker, okey_index
+
+NUM_PLAYERS = 4
+HAND_SIZE = 21
+OPEN_THRESHOLD = 101
+UNOPENED_PENALTY = 202      # Açamayan oyuncunun ceza puanı
+WIN_BONUS = -101            # Biten oyuncunun puanı
+GAMES_PER_SHARD = 50        # İşçiye tek seferde gönderilen oyun sayısı
+
+# Destedeki okey taşlarının tipi (sahte okey ise okeyin yerine geçtiği normal tiptir)
+JOKER = NUM_SLOTS
+
+
+def position_from_tiles(player_tiles: List[int], seen_tiles: List[int],
+                        indicator: int) -> Tuple[List[int], int, List[int]]:
+    """Motorun taş kodlarından self-play konumu: (sayımlar, okey sayısı, görülen taş tipleri)
+
+    Motor okeyi de sahte okeyi de joker sayar; burada ayrılırlar: işaretli
+    okey (joker kodu) ``JOKER``, sahte okey okeyin yerine geçtiği taş olur.
+    """
+    okey = okey_index(indicator)
+
+    def convert(code: int) -> int:
+        if is_joker(code):
+            return JOKER
+        return okey if code == SAHTE_OKEY else code
+
+    counts, jokers = [0] * NUM_SLOTS, 0
+    for code in player_tiles:
+        t = convert(code)
+        if t == JOKER:
+            jokers += 1
+        else:
+            counts[t] += 1
+    return counts, jokers, [convert(code) for code in seen_tiles]
+
+
+class PlayerState:
+    """Bir oyuncunun eli: normal taş sayımları ve joker sayısı"""
+
+    def __init__(self, seat: int):
+        self.seat = seat
+        self.counts = [0] * NUM_SLOTS
+        self.jokers = 0
+        self.score = 0              # Son atıştan sonraki dizilim puanı
+        self.opened_turn: Optional[int] = None
+        self.memo: Dict = {}        # Oyun boyunca paylaşılan çözücü belleği
+
+    def add(self, t: int):
+        """Taşı ele ekle"""
+        if t == JOKER:
+            self.jokers += 1
+        else:
+            self.counts[t] += 1
+
+    def evaluator(self) -> HandEvaluator:
+        """Elin güncel değerlendiricisi"""
+        return HandEvaluator(self.counts, self.jokers, True, self.memo)
+
+    def size(self) -> int:
+        return sum(self.counts) + self.jokers
+
+
+class Agent(ABC):
+    """Self-play oyuncusu: yerden alma ve atış kararları"""
+
+    @abstractmethod
+    def take_discard(self, player: PlayerState, t: int, game: 'Game') -> Optional[HandEvaluator]:
+        """Yerdeki t alınacaksa t eklenmiş elin değerlendiricisi, alınmayacaksa None"""
+
+    @abstractmethod
+    def choose_discard(self, player: PlayerState, evaluator: HandEvaluator, game: 'Game') -> int:
+        """Atılacak taş tipi (evaluator: çekilmiş elin değerlendiricisi)"""
+
+
+class SolverAgent(Agent):
+    """Dizilim puanını en büyükleyen ajan (rollout politikasının self-play karşılığı)
+
+    Yerdeki taşı sadece dizilim puanını artırıyorsa alır. Dizilimde boşta
+    kalan taşlardan değer tablosuna göre en değersizini atar; boşta taş
+    yoksa puanı en az düşüreni.
+    """
+
+    def take_discard(self, player: PlayerState, t: int, game: 'Game') -> Optional[HandEvaluator]:
+        counts = list(player.counts)
+        if not HandEvaluator._can_join(pack_counts(counts), min(player.jokers, MAX_JOKERS), t):
+            # Hiçbir pere giremeyen taş puanı artıramaz
+            return None
+        counts[t] += 1
+        evaluator = HandEvaluator(counts, player.jokers, True, player.memo)
+        return evaluator if evaluator.score > player.score else None
+
+    def choose_discard(self, player: PlayerState, evaluator: HandEvaluator, game: 'Game') -> int:
+        candidates = [t for t in range(NUM_SLOTS) if player.counts[t]]
+        spare = [t for t in candidates if evaluator.spare[t]]
+        adjustments = value_adjustments(player.counts, game.discard_counts)
+        if spare:
+            return min(spare, key=lambda t: (TILE_NUMBER[t] + adjustments[t], t))
+        return max(candidates, key=lambda t: (evaluator.discard_score(t), -TILE_NUMBER[t] - adjustments[t], -t))
+
+
+class Game:
+    """Tek bir oyunun durumu"""
+
+    def __init__(self, agents: List[Agent], indicator: int, deck: List[int]):
+        self.agents = agents
+        self.indicator = indicator
+        self.okey = okey_index(indicator)
+        self.deck = deck
+        self.players = [PlayerState(seat) for seat in range(NUM_PLAYERS)]
+        self.discards: List[int] = []
+        self.discard_counts = [0] * NUM_SLOTS
+        self.turns = 0
+        self.winner: Optional[int] = None
+        # Koltuk başına atış kararı sayısı ve süresi (politika verimi)
+        self.decisions = [0] * NUM_PLAYERS
+        self.decision_seconds = [0.0] * NUM_PLAYERS
+
+    @classmethod
+    def deal(cls, rng: random.Random, agents: List[Agent]) -> 'Game':
+        """Desteyi kar, göstergeyi aç ve dağıt"""
+        tiles = list(range(NUM_PHYSICAL))
+        rng.shuffle(tiles)
+        # Gösterge: sahte okey olmayan ilk taş
+        position = next(i for i, tile in enumerate(tiles) if tile // 2 != SAHTE_OKEY)
+        indicator = tiles.pop(position) // 2
+        okey = okey_index(indicator)
+        # Okey taşları joker, sahte okey okeyin tipidir
+        deck = [JOKER if tile // 2 == okey else okey if tile // 2 == SAHTE_OKEY else tile // 2
+                for tile in tiles]
+        game = cls(agents, indicator, deck)
+        for seat, player in enumerate(game.players):
+            for _ in range(HAND_SIZE + (seat == 0)):
+                player.add(game.deck.pop())
+        return game
+
+    @classmethod
+    def from_position(cls, rng: random.Random, agents: List[Agent], counts: List[int], jokers: int,
+                      discarded: List[int], indicator: int) -> 'Game':
+        """Oyuncunun (koltuk 0) eli ve görülen taşlarla ortadan başlayan oyun
+
+        Konum self-play terimleriyledir (bkz. position_from_tiles): okey tipinin
+        sayımı sahte okeylerdir, ``jokers`` gerçek okeylerdir; görülen taşlarda
+        atılmış okeyler ``JOKER``'dir. Görülmeyen taşlar rakiplere ve desteye
+        rastgele dağıtılır; koltuk 0 çekmiş haldedir, sıradaki adım atıştır.
+        """
+        okey = okey_index(indicator)
+        unseen = [2] * NUM_NORMAL
+        unseen[indicator] -= 1
+        unseen[okey] = 2                    # Okey tipindeki iki taş sahte okeylerdir
+        for t in range(NUM_NORMAL):
+            unseen[t] -= counts[t] + discarded.count(t)
+        pool = [t for t in range(NUM_NORMAL) for _ in range(max(0, unseen[t]))]
+        pool += [JOKER] * max(0, 2 - jokers - discarded.count(JOKER))
+        rng.shuffle(pool)
+
+        game = cls(agents, indicator, pool)
+        game.players[0].counts = list(counts[:NUM_SLOTS])
+        game.players[0].jokers = jokers
+        for player in game.players[1:]:
+            for _ in range(min(HAND_SIZE, len(game.deck))):
+                player.add(game.deck.pop())
+        for t in discarded:
+            if t == JOKER:
+                continue                    # Atılmış okey yerden alınmaz, sadece desteden düşer
+            game.discards.append(t)
+            game.discard_counts[t] += 1
+        return game
+
+    def _turn(self, seat: int) -> bool:
+        """Bir oyuncunun turu; oyun bittiyse True"""
+        player, agent = self.players[seat], self.agents[seat]
+        evaluator = None
+        if self.turns:
+            if self.discards:
+                evaluator = agent.take_discard(player, self.discards[-1], self)
+            if evaluator is not None:
+                last = self.discards.pop()
+                self.discard_counts[last] -= 1
+                player.add(last)
+            elif not self.deck:
+                return True
+            else:
+                player.add(self.deck.pop())
+        if evaluator is None:
+            evaluator = player.evaluator()
+
+        if evaluator.score >= OPEN_THRESHOLD and player.opened_turn is None:
+            player.opened_turn = self.turns
+        used = sum(len(per) for per in evaluator.pers)
+        if used >= player.size() - 1:
+            self.winner = seat
+            return True
+
+        start = time.perf_counter()
+        t = agent.choose_discard(player, evaluator, self)
+        self.decision_seconds[seat] += time.perf_counter() - start
+        self.decisions[seat] += 1
+        self.discard(player, t, evaluator)
+        return False
+
+    def discard(self, player: PlayerState, t: int, evaluator: HandEvaluator):
+        """Oyuncunun t taşını at (evaluator: atıştan önceki elin değerlendiricisi)"""
+        player.score = evaluator.discard_score(t)
+        player.counts[t] -= 1
+        self.discards.append(t)
+        self.discard_counts[t] += 1
+
+    def play(self, seat: int = 0) -> Dict:
+        """Oyunu (seat'in turundan) sonuna kadar oyna, oyuncu başına sonuçları döndür"""
+        while not self._turn(seat):
+            self.turns += 1
+            seat = (seat + 1) % NUM_PLAYERS
+        return self.result()
+
+    def penalty(self, player: PlayerState) -> int:
+        """Oyun sonu ceza puanı (düşük iyi); pere girmeyen okeyler okeyin sayısıyla sayılır"""
+        if player.seat == self.winner:
+            return WIN_BONUS
+        if player.opened_turn is None:
+            return UNOPENED_PENALTY
+        evaluator = player.evaluator()
+        jokers_left = evaluator.jokers - sum(is_joker(code) for per in evaluator.pers for code in per)
+        return (sum(TILE_NUMBER[t] * evaluator.spare[t] for t in range(NUM_NORMAL)) +
+                TILE_NUMBER[self.okey] * jokers_left)
+
+    def result(self) -> Dict:
+        return {
+            'winner': self.winner,
+            'turns': self.turns,
+            'opened_turns': [player.opened_turn for player in self.players],
+            'penalties': [self.penalty(player) for player in self.players],
+            'decisions': self.decisions,
+            'decision_seconds': self.decision_seconds
+        }
+
+
+def rollout_discards(counts: List[int], jokers: int, discarded: List[int], indicator: int,
+                     candidates: List[int], num_rollouts: int, seed: int,
+                     agents: Optional[List[Agent]] = None, first: int = 0) -> Dict[int, Dict]:
+    """Her aday atıştan sonra oyunu sonuna kadar oyna (koltuk 0 = oyuncu)
+
+    counts/jokers/discarded self-play konumudur (çekilmiş el; bkz.
+    position_from_tiles). Adaylar aynı tohumlu dağıtımlarla oynanır (ortak rastgele sayılar);
+    farklar dağıtım şansından değil atıştan gelir. first'ten başlayan oyun
+    sıraları oynanır; ardışık çağrıların sonuçları birleştirilebilir. Dönüş:
+    aday → kazanma sayısı, oyun sırasıyla cezalar ve oyun sayısı.
+    """
+    if agents is None:
+        agents = [SolverAgent() for _ in range(NUM_PLAYERS)]
+    results = {}
+    for t in candidates:
+        wins = 0
+        penalties = []
+        for index in range(first, first + num_rollouts):
+            game = Game.from_position(random.Random(f"{seed}-{index}"), agents, counts, jokers,
+                                      discarded, indicator)
+            player = game.players[0]
+            game.discard(player, t, player.evaluator())
+            game.turns = 1
+            result = game.play(seat=1)
+            wins += result['winner'] == 0
+            penalties.append(result['penalties'][0])
+        results[t] = {
+            'wins': wins,
+            'penalties': penalties,
+            'rollouts': num_rollouts
+        }
+    return results
+
+
+def _empty_totals() -> Dict:
+    return {
+        'games': 0,
+        'draws': 0,
+        'turns': 0,
+        'wins': [0] * NUM_PLAYERS,
+        'opened': [0] * NUM_PLAYERS,
+        'open_turns': [0] * NUM_PLAYERS,
+        'penalties': [0] * NUM_PLAYERS,
+        'decisions': [0] * NUM_PLAYERS,
+        'decision_seconds': [0.0] * NUM_PLAYERS
+    }
+
+
+def _accumulate(totals: Dict, result: Dict):
+    totals['games'] += 1
+    totals['turns'] += result['turns']
+    if result['winner'] is None:
+        totals['draws'] += 1
+    else:
+        totals['wins'][result['winner']] += 1
+    for seat in range(NUM_PLAYERS):
+        opened_turn = result['opened_turns'][seat]
+        if opened_turn is not None:
+            totals['opened'][seat] += 1
+            totals['open_turns'][seat] += opened_turn
+        totals['penalties'][seat] += result['penalties'][seat]
+        totals['decisions'][seat] += result['decisions'][seat]
+        totals['decision_seconds'][seat] += result['decision_seconds'][seat]
+
+
+def _merge(totals: Dict, part: Dict):
+    for key, value in part.items():
+        if isinstance(value, list):
+            totals[key] = [a + b for a, b in zip(totals[key], value)]
+        else:
+            totals[key] += value
+
+
+def play_games(seed: int, start: int, stop: int, agents: Optional[List[Agent]] = None) -> Dict:
+    """[start, stop) sıralı oyunları oyna, toplamları döndür (işçi görevi)"""
+    if agents is None:
+        agents = [SolverAgent() for _ in range(NUM_PLAYERS)]
+    totals = _empty_totals()
+    for index in range(start, stop):
+        game = Game.deal(random.Random(f"{seed}-{index}"), agents)
+        _accumulate(totals, game.play())
+    return totals
+
+
+def _play_task(args: Tuple[int, int, int, Optional[List[Agent]]]) -> Dict:
+    return play_games(*args)
+
+
+def summarize(totals: Dict, elapsed: float) -> Dict:
+    """Toplamlardan koltuk başına oranlar ve ortalamalar"""
+    games = totals['games']
+    return {
+        'games': games,
+        'games_per_sec': games / elapsed if elapsed > 0 else 0.0,
+        'draw_rate': totals['draws'] / games if games else 0.0,
+        'avg_turns': totals['turns'] / games if games else 0.0,
+        'seats': [{
+            'seat': seat,
+            'win_rate': totals['wins'][seat] / games if games else 0.0,
+            'open_rate': totals['opened'][seat] / games if games else 0.0,
+            'avg_open_turn': (totals['open_turns'][seat] / totals['opened'][seat]
+                              if totals['opened'][seat] else None),
+            'avg_penalty': totals['penalties'][seat] / games if games else 0.0,
+            'decisions_per_sec': (totals['decisions'][seat] / totals['decision_seconds'][seat]
+                                  if totals['decision_seconds'][seat] else None)
+        } for seat in range(NUM_PLAYERS)]
+    }
+
+
+def self_play(num_games: int, seed: Optional[int] = None, executor: Optional[Executor] = None,
+              games_per_shard: int = GAMES_PER_SHARD, agents: Optional[List[Agent]] = None) -> Dict:
+    """num_games oyun oyna (executor verilirse parçalar işçilere dağıtılır)
+
+    ``agents`` koltuk sırasıyla oyuncular (varsayılan: dört SolverAgent);
+    işçilere gönderildikleri için seçilebilir (pickle) olmalıdır.
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+    start_time = time.perf_counter()
+    tasks = [(seed, start, min(start + games_per_shard, num_games), agents)
+             for start in range(0, num_games, games_per_shard)]
+    parts = executor.map(_play_task, tasks) if executor is not None else map(_play_task, tasks)
+    totals = _empty_totals()
+    for part in parts:
+        _merge(totals, part)
+    result = summarize(totals, time.perf_counter() - start_time)
+    result['seed'] = seed
+    return result
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Dört oyunculu self-play simülasyonu")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None, help="süreç sayısı (varsayılan: çekirdek sayısı)")
+    args = parser.parse_args(argv)
+
+    from okey_pool import SimulationPool
+    pool = SimulationPool(args.workers)
+    try:
+        print(json.dumps(self_play(args.games, args.seed, pool.executor), indent=2))
+    finally:
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
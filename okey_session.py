@@ -0,0 +1,181 @@
+"""Oyun oturumları: elin ve atılan taşların sunucuda tutulan durumu.
+
+İstemci oyunu bir kez başlatır, sonra sadece değişiklikleri gönderir
+(taş çekti, taş attı, rakip taş attı). Oturum elin sayım vektörünü, atılan
+taşları ve rakip modelini olay başına günceller; sorgular bu durumdan
+cevaplanır. Oturumlar boyut ve süre sınırlı LRU önbellekte tutulur.
+
+Oturumlar süreç içindedir: birden çok worker ile çalışırken aynı oturumun
+istekleri aynı worker'a gitmelidir.
+"""
+import copy
+import os
+import secrets
+import threading
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from okey_cache import LRUCache
+from okey_infer import OpponentModel
+from okey_tiles import face_type, to_counts
+
+DEFAULT_SESSION_LIMIT = 1000
+DEFAULT_SESSION_TTL = 3600.0
+
+class SessionNotFound(KeyError):
+    """Oturum yok ya da süresi dolmuş"""
+
+
+class GameSession:
+    """Bir oyuncunun eli, görülen taşlar ve rakip modeli"""
+
+    def __init__(self, tiles: List[int], discarded_tiles: Optional[List[int]] = None,
+                 indicator: Optional[int] = None,
+                 discard_history: Optional[List[Tuple[int, int]]] = None):
+        self.tiles = list(tiles)
+        self.discarded_tiles = list(discarded_tiles or [])
+        self.indicator = indicator
+        self.discard_history = list(discard_history or [])
+        self.hand_counts = to_counts(self.tiles)
+        self.model = OpponentModel.from_tiles(self.tiles, self.discarded_tiles, indicator,
+                                              self.discard_history)
+        self.version = 0
+        self.lock = threading.Lock()
+        self._results: Dict[Hashable, Dict] = {}
+
+    def draw(self, code: int, from_discard: bool = False):
+        """Desteden ya da (from_discard) yerden taş çek"""
+        t = face_type(code)
+        rebuild = False
+        if from_discard:
+            # Yerdeki taş zaten görülmüştü; görülmeyen sayısı değişmez
+            rebuild = self._take_discard(t)
+        elif not self.model.remaining[t]:
+            raise ValueError("Bu taşın görülmemiş kopyası yok")
+        else:
+            self.model.remaining[t] -= 1
+        self.tiles.append(code)
+        self.hand_counts[t] += 1
+        if rebuild:
+            # Geçmişten düşen atışın ağırlık güncellemesi (alt sınırla kırpıldığı için)
+            # tersine çevrilemez; model kalan geçmişten yeniden kurulur
+            self.model = OpponentModel.from_tiles(self.tiles, self.discarded_tiles, self.indicator,
+                                                  self.discard_history)
+        self._changed()
+
+    def _take_discard(self, t: int) -> bool:
+        """Yerden alınan taşı atılanlardan düş (önce en son atılan); geçmişten düştüyse True"""
+        for i in range(len(self.discard_history) - 1, -1, -1):
+            if face_type(self.discard_history[i][1]) == t:
+                del self.discard_history[i]
+                return True
+        for i in range(len(self.discarded_tiles) - 1, -1, -1):
+            if face_type(self.discarded_tiles[i]) == t:
+                del self.discarded_tiles[i]
+                return False
+        raise ValueError("Bu taş yerde yok")
+
+    def discard(self, code: int):
+        """Elden taş at (atılan taş herkesçe görülür)"""
+        if code not in self.tiles:
+            raise ValueError("Elde olmayan taş atılamaz")
+        self.tiles.remove(code)
+        self.hand_counts[face_type(code)] -= 1
+        self.discarded_tiles.append(code)
+        self._changed()
+
+    def opponent_discard(self, code: int, player: Optional[int] = None):
+        """Rakibin attığı taşı işle (rakip biliniyorsa geçmişe eklenir)"""
+        self.model.observe_discard(code, player)
+        if player is None:
+            self.discarded_tiles.append(code)
+        else:
+            self.discard_history.append((player, code))
+        self._changed()
+
+    def apply(self, events: List[Dict]):
+        """Olayları sırayla uygula: {'type', 'tile', 'player', 'from_discard'}
+
+        Olaylardan biri geçersizse hiçbiri uygulanmaz.
+        """
+        if not events:
+            return
+        saved = copy.deepcopy((self.tiles, self.discarded_tiles, self.discard_history,
+                               self.hand_counts, self.model))
+        try:
+            for event in events:
+                kind = event['type']
+                if kind == 'draw':
+                    self.draw(event['tile'], event.get('from_discard', False))
+                elif kind == 'discard':
+                    self.discard(event['tile'])
+                elif kind == 'opponent_discard':
+                    self.opponent_discard(event['tile'], event.get('player'))
+                else:
+                    raise ValueError(f"Bilinmeyen olay: {kind}")
+        except Exception:
+            self.tiles, self.discarded_tiles, self.discard_history, self.hand_counts, self.model = saved
+            self._changed()
+            raise
+
+    def _changed(self):
+        """Durum değişti: önbelleklenen sorgu sonuçları geçersiz"""
+        self.version += 1
+        self._results.clear()
+
+    def cached(self, key: Hashable, compute: Callable[[], Dict]) -> Dict:
+        """Aynı durumda tekrarlanan sorguyu hesaplamadan cevapla"""
+        if key not in self._results:
+            self._results[key] = compute()
+        return self._results[key]
+
+    def state(self) -> Dict:
+        """Oturumun özeti: sürüm, el boyu, görülen ve görülmeyen taş sayıları"""
+        return {
+            'version': self.version,
+            'hand_size': len(self.tiles),
+            'discarded': len(self.discarded_tiles) + len(self.discard_history),
+            'unseen': sum(self.model.remaining)
+        }
+
+
+class SessionStore:
+    """Boyut ve süre sınırlı oturum deposu"""
+
+    def __init__(self, limit: int = DEFAULT_SESSION_LIMIT, ttl: Optional[float] = DEFAULT_SESSION_TTL):
+        self._sessions = LRUCache(limit, ttl)
+
+    @classmethod
+    def from_env(cls) -> 'SessionStore':
+        """Sınırları OKEY_SESSION_LIMIT / OKEY_SESSION_TTL'den oku"""
+        limit = int(os.environ.get('OKEY_SESSION_LIMIT', DEFAULT_SESSION_LIMIT))
+        ttl = float(os.environ.get('OKEY_SESSION_TTL', DEFAULT_SESSION_TTL))
+        return cls(limit, ttl if ttl > 0 else None)
+
+    def create(self, tiles: List[int], discarded_tiles: Optional[List[int]] = None,
+               indicator: Optional[int] = None,
+               discard_history: Optional[List[Tuple[int, int]]] = None) -> Tuple[str, GameSession]:
+        """Yeni oturum aç"""
+        session_id = secrets.token_urlsafe(12)
+        session = GameSession(tiles, discarded_tiles, indicator, discard_history)
+        self._sessions.put(session_id, session)
+        return session_id, session
+
+    def get(self, session_id: str) -> GameSession:
+        """Oturumu döndür (yoksa ya da süresi dolduysa SessionNotFound)
+
+        Her erişim oturumun süresini yeniler; süre boşta geçen zamandır.
+        """
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionNotFound(session_id)
+        self._sessions.put(session_id, session)
+        return session
+
+    def delete(self, session_id: str):
+        """Oturumu kapat (yoksa SessionNotFound)"""
+        if self._sessions.pop(session_id) is None:
+            raise SessionNotFound(session_id)
+
+    def stats(self) -> Dict:
+        """Oturum sayısı ve isabet sayaçları"""
+        return self._sessions.stats()
@@ -0,0 +1,374 @@
+"""Vektörel Monte Carlo simülasyonu.
+
+Her aday atış için (atılan taş d), elin d'siz hali ile desteden çekilebilecek
+her taş tipi x için kesin dizilim puanı bir kez hesaplanır: ``G[d, x]``.
+Ardından binlerce örnek tek seferde NumPy dizileri olarak dağıtılır:
+
+- Rakip elleri: ``örnek × rakip × 53`` sayım dizisi
+- Çekiş dizileri: ``örnek × çekiş`` taş tipi dizisi
+
+Bir örnekte adayın puanı, sonraki çekişlerden en yararlısının verdiği
+puandır (``G[d, çekişler].max()``); kazanma 101'e ulaşmaktır. Bu bilerek
+tek çekişlik bir ölçüdür: çekişlerin birlikte kurduğu el (örnek başına
+çözüm) tablodan onlarca kat pahalıdır. Bu yüzden hiçbir tek çekişin pere
+sokamadığı taşlar (ör. komşusuz taşlar) aynı satırı ve aynı ortalamayı
+alır; eşitlik çağıranın verdiği aday sırasıyla bozulur (okey_ai: değer
+tablosunun en değersiz bulduğu taş önde). Rakip elleri,
+atılan taşın sıradaki rakibe per tamamlatma oranını (tehlike) ölçer; atılan
+taş geçmişi biliniyorsa eller okey_infer ağırlıklarıyla dağıtılır.
+
+Örnekler sabit boyutlu, kendi tohumuna sahip parçalarla üretilir; parça
+toplamları birleştirilebildiği için parçalar işçi süreçlere dağıtılabilir.
+"""
+import secrets
+import time
+from concurrent.futures import Executor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from okey_tiles import NUM_NORMAL, NUM_SLOTS, SAHTE_OKEY, okey_index, to_counts
+from okey_infer import DANGER_PAIRS, NUM_OPPONENTS, OPPONENT_HAND_SIZE, Z_95, remaining_copies
+from okey_solver import HandEvaluator, cached_evaluator
+
+OPEN_THRESHOLD = 101
+SHARD_SIZE = 1000   # Parça başına örnek (tohumlama bu boyuta bağlı)
+TABLE_CHUNKS = 4    # Varsayılan: tablo hesabının bölündüğü aday dilimi sayısı
+ROUND_SHARDS = 2    # Tur başına parça: eleme ve ara sonuç aralığı (işçi sayısından bağımsız)
+INDIFFERENCE_POINTS = 1.0  # Bu kadar puan farkı içindeki adaylar eşit sayılır
+
+
+def draw_value_table(counts: List[int], jokers: int, candidates: List[int],
+                     unseen: np.ndarray, okey: Optional[int] = None, memo: Optional[Dict] = None) -> np.ndarray:
+    """Aday × çekilen taş tipi için kesin dizilim puanı tablosu
+
+    ``okey`` (okeyin taş tipi) verilirse çekilen okey jokerdir: sütunu sahte
+    okey çekişiyle aynıdır. ``memo`` verilmezse elin değerlendiricisi
+    önbellekten gelir; aynı el için tekrarlanan simülasyonlar önceki senaryo
+    puanlarını yeniden kullanır.
+    """
+    okey_active = okey is not None
+    if memo is None:
+        evaluator = cached_evaluator(counts, jokers, okey_active)
+    else:
+        evaluator = HandEvaluator(counts, jokers, okey_active, memo)
+    table = np.zeros((len(candidates), NUM_SLOTS), dtype=np.float64)
+    drawable = [int(t) for t in np.flatnonzero(unseen)]
+    okey_drawable = okey_active and okey in drawable
+    if okey_drawable:
+        # Joker çekişi sahte okey koduyla bir kez puanlanır
+        drawable = sorted(set(drawable) - {okey} | {SAHTE_OKEY})
+    scores = evaluator.what_ifs(drawable, candidates)['swap_scores']
+    if drawable:
+        table[:, drawable] = np.asarray(scores, dtype=np.float64).reshape(len(candidates), len(drawable))
+    if okey_drawable:
+        table[:, okey] = table[:, SAHTE_OKEY]
+    return table
+
+
+def _weighted_order(pool: np.ndarray, weights: np.ndarray, hand_size: int,
+                    num_sims: int, rng: np.random.Generator) -> np.ndarray:
+    """Ağırlıklı dağıtım sırası: rakipler sırayla ağırlıklı iadesiz seçimle
+    (Efraimidis-Spirakis anahtarları) el alır, kalanlar karışık desteyi oluşturur"""
+    size = len(pool)
+    taken = np.zeros((num_sims, size), dtype=bool)
+    rows = np.arange(num_sims)[:, None]
+    parts = []
+    for o in range(NUM_OPPONENTS):
+        if not hand_size:
+            break
+        keys = np.log(1.0 - rng.random((num_sims, size))) / weights[o][pool]
+        keys[taken] = -np.inf
+        chosen = np.argpartition(-keys, hand_size - 1, axis=1)[:, :hand_size]
+        taken[rows, chosen] = True
+        parts.append(chosen)
+
+    keys = rng.random((num_sims, size))
+    keys[taken] = 2.0  # Rakiplere gidenler sıranın sonuna
+    parts.append(np.argsort(keys, axis=1)[:, :size - NUM_OPPONENTS * hand_size])
+    return np.concatenate(parts, axis=1)
+
+
+def deal(unseen: np.ndarray, num_sims: int, num_draws: int, rng: np.random.Generator,
+         weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Görülmeyen taşları örnek başına rakiplere ve desteye dağıt
+
+    ``weights`` (rakip × 53) verilirse rakip elleri bu ağırlıklarla seçilir
+    (okey_infer.OpponentModel); verilmezse dağıtım tekdüzedir.
+
+    Dönüş: (rakip sayımları ``örnek × rakip × 53``, çekişler ``örnek × çekiş``)
+    """
+    pool = np.repeat(np.arange(NUM_SLOTS), unseen)
+    num_draws = max(1, min(num_draws, len(pool)))
+    hand_size = max(0, min(OPPONENT_HAND_SIZE, (len(pool) - num_draws) // NUM_OPPONENTS))
+
+    if weights is None:
+        # Her satır havuzun bağımsız bir permütasyonu
+        order = np.argsort(rng.random((num_sims, len(pool))), axis=1)
+    else:
+        order = _weighted_order(pool, weights, hand_size, num_sims, rng)
+    dealt = pool[order]
+
+    hands = dealt[:, :NUM_OPPONENTS * hand_size].reshape(num_sims, NUM_OPPONENTS, hand_size)
+    offsets = (np.arange(num_sims * NUM_OPPONENTS) * NUM_SLOTS).reshape(num_sims, NUM_OPPONENTS, 1)
+    opponent_counts = np.bincount((hands + offsets).ravel(),
+                                  minlength=num_sims * NUM_OPPONENTS * NUM_SLOTS)
+    opponent_counts = opponent_counts.reshape(num_sims, NUM_OPPONENTS, NUM_SLOTS)
+
+    draws = dealt[:, NUM_OPPONENTS * hand_size:NUM_OPPONENTS * hand_size + num_draws]
+    return opponent_counts, draws
+
+
+def _wilson_ci(successes: int, n: int) -> Tuple[float, float]:
+    """Oran için Wilson %95 güven aralığı (sınırlar [0, 1] içinde)"""
+    if n == 0:
+        return 0.0, 0.0
+    p = successes / n
+    denom = 1 + Z_95 ** 2 / n
+    center = (p + Z_95 ** 2 / (2 * n)) / denom
+    half = Z_95 * np.sqrt(p * (1 - p) / n + Z_95 ** 2 / (4 * n * n)) / denom
+    # p 0 ya da 1 iken kayan nokta hatası sınırı aralığın dışına taşıyabilir
+    return max(0.0, float(center - half)), min(1.0, float(center + half))
+
+
+def sample_shard(table: np.ndarray, unseen: np.ndarray, candidates: List[int],
+                 num_sims: int, num_draws: int, seed: np.random.SeedSequence,
+                 weights: Optional[np.ndarray] = None) -> Dict:
+    """Bir parça örneği dağıt ve aday başına toplamları döndür
+
+    Toplamlar parçalar arasında toplanabilir; aynı tohum aynı sonucu verir.
+    """
+    rng = np.random.default_rng(seed)
+    opponent_counts, draws = deal(unseen, num_sims, num_draws, rng, weights)
+
+    # Aday × örnek puanları: sonraki çekişlerden en yararlısı tutulur
+    scores = table[:, draws].max(axis=2)
+
+    # Sıradaki rakip atılan taşı pere tamamlayabiliyor mu
+    next_opponent = opponent_counts[:, 0, :] > 0
+    danger = np.zeros(len(candidates), dtype=np.int64)
+    for row, discard in enumerate(candidates):
+        if discard < NUM_NORMAL:
+            hit = np.zeros(num_sims, dtype=bool)
+            for a, b in DANGER_PAIRS[discard]:
+                hit |= next_opponent[:, a] & next_opponent[:, b]
+            danger[row] = int(hit.sum())
+
+    return {
+        'n': num_sims,
+        'score_sum': scores.sum(axis=1),
+        'score_sq_sum': (scores * scores).sum(axis=1),
+        'wins': (scores >= OPEN_THRESHOLD).sum(axis=1),
+        'danger': danger
+    }
+
+
+def _empty_totals(num_candidates: int) -> Dict:
+    """Aday başına boş toplamlar"""
+    return {
+        'n': np.zeros(num_candidates, dtype=np.int64),
+        'score_sum': np.zeros(num_candidates, dtype=np.float64),
+        'score_sq_sum': np.zeros(num_candidates, dtype=np.float64),
+        'wins': np.zeros(num_candidates, dtype=np.int64),
+        'danger': np.zeros(num_candidates, dtype=np.int64)
+    }
+
+
+def _accumulate(totals: Dict, shard: Dict, rows: List[int]):
+    """Bir parçanın toplamlarını, değerlendirdiği aday satırlarına ekle"""
+    totals['n'][rows] += shard['n']
+    for key in ('score_sum', 'score_sq_sum', 'wins', 'danger'):
+        totals[key][rows] += shard[key]
+
+
+def _rows(shard: Dict, rows: List[int]) -> Dict:
+    """Bütün adaylarla puanlanmış parçanın verilen aday satırları"""
+    return dict(shard, **{key: shard[key][rows] for key in ('score_sum', 'score_sq_sum', 'wins', 'danger')})
+
+
+def _score_interval(totals: Dict, row: int) -> Tuple[float, float]:
+    """Adayın ortalama puanı ve %95 güven aralığının yarı genişliği"""
+    n = int(totals['n'][row])
+    mean = float(totals['score_sum'][row]) / n
+    if n < 2:
+        return mean, float('inf')
+    variance = max(0.0, (float(totals['score_sq_sum'][row]) - n * mean * mean) / (n - 1))
+    return mean, Z_95 * float(np.sqrt(variance / n))
+
+
+def summarize(totals: Dict, candidates: List[int], active: Optional[List[int]] = None) -> List[Dict]:
+    """Toplamlardan aday başına ortalama, oran ve güven aralıkları"""
+    moves = []
+    for row, discard in enumerate(candidates):
+        n = int(totals['n'][row])
+        if not n:
+            continue
+        mean, half = _score_interval(totals, row)
+        if half == float('inf'):
+            half = 0.0
+        win_count = int(totals['wins'][row])
+        win_low, win_high = _wilson_ci(win_count, n)
+        move = {
+            'move': discard,
+            'avg_score': mean,
+            'score_ci': [mean - half, mean + half],
+            'win_rate': win_count / n,
+            'win_rate_ci': [win_low, win_high],
+            'danger_rate': int(totals['danger'][row]) / n,
+            'num_simulations': n
+        }
+        if active is not None:
+            move['eliminated'] = row not in active
+        moves.append(move)
+
+    # Elenmeyenler önde; sonra puan, kazanma oranı, düşük tehlike ve eşitlikte aday sırası
+    order = {discard: row for row, discard in enumerate(candidates)}
+    moves.sort(key=lambda m: (m.get('eliminated', False), -m['avg_score'], -m['win_rate'],
+                              m['danger_rate'], order[m['move']]))
+    return moves
+
+
+def _prune(totals: Dict, active: List[int]) -> List[int]:
+    """Ardışık eleme: üst sınırı en iyinin alt sınırının altında kalan adayları çıkar"""
+    intervals = {row: _score_interval(totals, row) for row in active}
+    leader = max(active, key=lambda row: intervals[row][0])
+    floor = intervals[leader][0] - intervals[leader][1]
+    return [row for row in active if row == leader or intervals[row][0] + intervals[row][1] >= floor]
+
+
+def _settled(totals: Dict, active: List[int], target_ci_width: Optional[float]) -> bool:
+    """Sıralama kesinleşti mi ya da lider istenen güven genişliğine ulaştı mı"""
+    if len(active) == 1:
+        return True
+    intervals = [_score_interval(totals, row) for row in active]
+    # Kalan adayların hepsi pratikte eşitse daha fazla örnek sıralamayı değiştirmez
+    if max(m + h for m, h in intervals) - min(m - h for m, h in intervals) <= INDIFFERENCE_POINTS:
+        return True
+    if target_ci_width is None:
+        return False
+    return 2 * max(intervals)[1] <= target_ci_width
+
+
+def _table_task(args) -> np.ndarray:
+    """Havuz işçisi: adayların bir diliminin tablo satırları"""
+    return draw_value_table(*args)
+
+
+def shard_sizes(num_simulations: int) -> List[int]:
+    """Örnek sayısını sabit boyutlu parçalara böl (sonuç işçi sayısından bağımsız)"""
+    full, rest = divmod(num_simulations, SHARD_SIZE)
+    return [SHARD_SIZE] * full + ([rest] if rest else [])
+
+
+def simulate_discards(*args, **kwargs) -> Dict:
+    """Aday atışları toplu örneklerle değerlendir, son sonucu döndür (bkz. iter_simulate_discards)"""
+    for result in iter_simulate_discards(*args, **kwargs):
+        pass
+    return result
+
+
+def iter_simulate_discards(player_tiles: List[int], discarded_tiles: List[int],
+                           counts: List[int], jokers: int, candidates: List[int],
+                           indicator: Optional[int] = None, num_simulations: int = 2000,
+                           num_draws: int = 3, seed: Optional[int] = None,
+                           time_budget_ms: Optional[float] = None,
+                           target_ci_width: Optional[float] = None,
+                           opponent_weights: Optional[List[List[float]]] = None,
+                           executor: Optional[Executor] = None,
+                           table_chunks: int = TABLE_CHUNKS) -> Iterator[Dict]:
+    """Aday atışları toplu örneklerle değerlendir, her turdan sonra ara sonuç ver
+
+    Örnekler ``SHARD_SIZE``'lık parçalara bölünür ve i. parça kök tohumun
+    i. çocuğuyla dağıtılır; aynı tohum ve parça sayısı, işçi sayısından
+    bağımsız olarak aynı sonucu verir. Her tur ``ROUND_SHARDS`` parçadır.
+    ``executor`` verilirse tablo satırları işçilere dağıtılır ve kalan tüm
+    parçalar baştan gönderilir; havuz turun boyundan bağımsız olarak dolu
+    kalır. Önden gönderilen parçalar bütün adayları puanlar, toplamlara
+    sadece o ana kadar elenmemiş adayların satırları eklenir (bir adayın
+    satırı diğer adaylardan bağımsızdır); eleme noktaları ve ara sonuçlar bu
+    yüzden işçi sayısından etkilenmez. Durunca bekleyen parçalar iptal edilir.
+
+    Anında-yanıt kipi (``time_budget_ms`` ya da ``target_ci_width``): parçalar
+    turlar halinde eklenir; her turdan sonra puan güven aralığı liderin alt
+    sınırına yetişemeyen adaylar elenir ve sonraki örnekler sadece yakın
+    adaylara harcanır. Süre dolunca, tek aday kalınca ya da liderin güven
+    aralığı ``target_ci_width``'e inince durulur (en fazla ``num_simulations``).
+
+    ``opponent_weights`` (rakip × 53, okey_infer) verilirse rakip elleri
+    atılan taş geçmişine göre ağırlıklı dağıtılır.
+
+    Her turdan sonra o ana kadarki sonuç (``stopped``: None) üretilir, son
+    sonuç durma nedeniyle gelir. Üreteç kapatılırsa (istemci ayrıldı)
+    sonraki tur başlamaz.
+    """
+    started = time.perf_counter()
+    if seed is None:
+        seed = secrets.randbits(53)  # JSON/JavaScript'te kayıpsız taşınabilir
+    root = np.random.SeedSequence(seed)
+    result = {'num_simulations': 0, 'moves': [], 'seed': seed, 'num_shards': 0, 'stopped': 'complete'}
+
+    unseen = np.asarray(remaining_copies(to_counts(player_tiles), to_counts(discarded_tiles), indicator),
+                        dtype=np.int64)
+    if not candidates or not unseen.any() or num_simulations <= 0:
+        yield result
+        return
+
+    weights = None if opponent_weights is None else np.asarray(opponent_weights, dtype=np.float64)
+    okey = None if indicator is None else okey_index(indicator)
+    if executor is None:
+        table = draw_value_table(counts, jokers, candidates, unseen, okey)
+    else:
+        # Aynı dilimdeki adaylar çözücü memo'sunu paylaşır
+        table_chunks = max(1, min(table_chunks, len(candidates)))
+        chunks = [candidates[i::table_chunks] for i in range(table_chunks)]
+        parts = executor.map(_table_task, [(counts, jokers, chunk, unseen, okey) for chunk in chunks])
+        table = np.zeros((len(candidates), NUM_SLOTS), dtype=np.float64)
+        for i, part in enumerate(parts):
+            table[i::table_chunks] = part
+
+    anytime = time_budget_ms is not None or target_ci_width is not None
+    deadline = None if time_budget_ms is None else started + time_budget_ms / 1000.0
+    sizes = shard_sizes(num_simulations)
+    seeds = root.spawn(len(sizes))
+
+    totals = _empty_totals(len(candidates))
+    active = list(range(len(candidates)))
+    pending = []
+    if executor is not None:
+        pending = [executor.submit(sample_shard, table, unseen, candidates, size, num_draws, shard_seed, weights)
+                   for size, shard_seed in zip(sizes, seeds)]
+    try:
+        shard_index = 0
+        while shard_index < len(sizes):
+            batch = range(shard_index, min(shard_index + ROUND_SHARDS, len(sizes)))
+            if executor is None:
+                rows_table = table[active]
+                active_candidates = [candidates[row] for row in active]
+                for i in batch:
+                    _accumulate(totals, sample_shard(rows_table, unseen, active_candidates, sizes[i],
+                                                     num_draws, seeds[i], weights), active)
+            else:
+                for i in batch:
+                    _accumulate(totals, _rows(pending[i].result(), active), active)
+            shard_index = batch.stop
+
+            if deadline is not None and time.perf_counter() >= deadline:
+                result['stopped'] = 'budget'
+                break
+            if anytime:
+                active = _prune(totals, active)
+                if _settled(totals, active, target_ci_width):
+                    result['stopped'] = 'settled'
+                    break
+            if shard_index < len(sizes):
+                yield dict(result, stopped=None, num_simulations=int(totals['n'].max()), num_shards=shard_index,
+                           moves=summarize(totals, candidates, active if anytime else None))
+    finally:
+        # Durunca ya da üreteç kapatılınca başlamamış parçalar çalışmaz
+        for future in pending:
+            future.cancel()
+
+    result['num_simulations'] = int(totals['n'].max())
+    result['num_shards'] = shard_index
+    result['moves'] = summarize(totals, candidates, active if anytime else None)
+    yield result
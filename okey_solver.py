@@ -0,0 +1,406 @@
+"""Kesin (optimal) per dizilimi çözücüsü.
+
+El, okey_melds'teki gibi tek bir tamsayıya paketlenir. Alanlar
+sayı-öncelikli sıralı olduğu için en düşük dolu alan, rengindeki en küçük sayılı taş olur ve bu taşı
+içeren her per o taştan başlar (önündeki pozisyonlar sadece jokerle dolabilir).
+
+Arama her adımda en düşük taşı ya kullanılmamış bırakır ya da onu içeren
+bir pere koyar; alt eller (paket, kalan joker) anahtarıyla hatırlanır.
+6 ve üzeri uzunluktaki seriler aynı puanlı iki seriye bölünebildiği için
+sadece 3-5 uzunluktaki seriler denenir.
+
+Joker (okey/sahte okey) her yerin yerine geçebildiği için iki kısıt sonucu
+değiştirmez, sadece aramayı küçültür: joker elde gerçeği kalan bir taşın
+yerine konmaz (yer değiştirme aynı puanı verir) ve serinin altına ancak seri
+13'e dayanıyorsa konur.
+"""
+import itertools
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import okey_metrics
+from okey_tiles import NUM_NORMAL, JOKER_OFFSET, TILE_NUMBER, face_type
+from okey_cache import LRUCache
+from okey_melds import MAX_JOKERS, MELDS, MELD_IS_RUN, MELD_SCORES, SLOT_TYPE, UNIT, GUARD, pack_counts
+
+if TYPE_CHECKING:
+    from okey_store import EvaluationStore
+
+
+def _meld_entry(i: int, slots: Tuple[int, ...]) -> Tuple[int, int, int, int, int, Tuple[int, ...]]:
+    """Per ve joker yuvalarından çözücü girdisi"""
+    meld = MELDS[i]
+    real = [t for t in meld if t not in slots]
+    codes = tuple(JOKER_OFFSET + t if t in slots else t for t in meld)
+    return (
+        sum(UNIT[t] for t in real),
+        len(slots),
+        sum(7 * UNIT[t] for t in slots),
+        MELD_SCORES[i],
+        sum(TILE_NUMBER[t] for t in real),
+        codes
+    )
+
+
+def _build_melds() -> List[List[Tuple[int, int, int, int, int, Tuple[int, ...]]]]:
+    """Per tablosundan, her taş tipinin en düşük gerçek taş olduğu joker yuvalı perleri üret
+
+    Her per: (maske, joker sayısı, joker alanları, puan, gerçek taşların değeri, kodlar).
+    """
+    melds = [[] for _ in range(NUM_NORMAL)]
+    for i, meld in enumerate(MELDS):
+        if MELD_IS_RUN[i] and len(meld) > 5:
+            continue
+        for jokers in range(min(len(meld) - 1, MAX_JOKERS) + 1):
+            for slots in itertools.combinations(meld, jokers):
+                real = [t for t in meld if t not in slots]
+                first = real[0]
+                # Alttaki jokerler ancak seri 13'e dayanıyorsa anlamlı; yoksa aynı
+                # jokerleri üste koymak daha yüksek puan verir
+                below = first - meld[0]
+                if MELD_IS_RUN[i] and below and TILE_NUMBER[meld[-1]] + below <= 13:
+                    continue
+                melds[first].append(_meld_entry(i, slots))
+
+    # Yüksek puanlı perler önce: iyi alt sınır erken bulunur
+    for first_melds in melds:
+        first_melds.sort(key=lambda m: (-m[3], m[1]))
+    return melds
+
+
+MELDS_BY_FIRST = _build_melds()
+
+
+def _best(hand: int, jokers_left: int, remaining_value: int, memo: Dict) -> int:
+    """Alt elin en yüksek per puanı (seçim memo'ya yazılır)"""
+    if not hand:
+        return 0
+    key = (hand, jokers_left)
+    cached = memo.get(key)
+    if cached is not None:
+        return cached[0]
+
+    t = SLOT_TYPE[((hand & -hand).bit_length() - 1) >> 2]
+    guarded = hand | GUARD
+    best_score, best_choice = 0, None
+
+    for meld in MELDS_BY_FIRST[t]:
+        mask, need, joker_fields, score, real_value, _ = meld
+        if need > jokers_left or (guarded - mask) & GUARD != GUARD:
+            continue
+        # Joker, elde hâlâ gerçeği bulunan bir taşın yerine geçmez
+        if joker_fields and (hand - mask) & joker_fields:
+            continue
+        rest_value = remaining_value - real_value
+        # Üst sınır: kalan taşların hepsi ve jokerler 13'lük olarak kullanılsa bile yetmiyorsa atla
+        if score + rest_value + 13 * (jokers_left - need) <= best_score:
+            continue
+        total = score + _best(hand - mask, jokers_left - need, rest_value, memo)
+        if total > best_score:
+            best_score, best_choice = total, meld
+
+    # Taşı kullanmadan bırak
+    rest_value = remaining_value - TILE_NUMBER[t]
+    if rest_value + 13 * jokers_left > best_score:
+        total = _best(hand - UNIT[t], jokers_left, rest_value, memo)
+        if total > best_score:
+            best_score, best_choice = total, None
+
+    memo[key] = (best_score, (t, best_choice))
+    return best_score
+
+
+def solve_score(counts: List[int], jokers: int, memo: Optional[Dict] = None) -> int:
+    """Sadece en yüksek toplam per puanını hesapla
+
+    ``memo`` verilirse çağrılar arasında paylaşılır; alt el değerleri elden
+    bağımsız olduğu için birbirine yakın ellerin çözümleri birbirini hızlandırır.
+    """
+    if memo is None:
+        memo = {}
+    hand = pack_counts(counts)
+    total_value = sum(TILE_NUMBER[t] * counts[t] for t in range(NUM_NORMAL) if counts[t])
+    return _best(hand, min(jokers, MAX_JOKERS), total_value, memo)
+
+
+def solve(counts: List[int], jokers: int, memo: Optional[Dict] = None) -> Tuple[int, List[Tuple[int, ...]]]:
+    """En yüksek toplam per puanını ve bu puanı veren perleri bul"""
+    if memo is None:
+        memo = {}
+    jokers = min(jokers, MAX_JOKERS)
+    score = solve_score(counts, jokers, memo)
+
+    # Seçimleri takip ederek perleri çıkar
+    pers = []
+    hand = pack_counts(counts)
+    jokers_left = jokers
+    while hand:
+        cached = memo.get((hand, jokers_left))
+        if cached is None:
+            break
+        t, meld = cached[1]
+        if meld is None:
+            hand -= UNIT[t]
+        else:
+            hand -= meld[0]
+            jokers_left -= meld[1]
+            pers.append(meld[5])
+
+    return score, _merge_runs(pers)
+
+
+def _merge_runs(pers: List[Tuple[int, ...]]) -> List[Tuple[int, ...]]:
+    """Uç uca eklenen aynı renk serileri tek seri olarak birleştir"""
+    runs, groups = [], []
+    for per in pers:
+        types = [face_type(code) for code in per]
+        if types[1] == types[0] + 1:
+            runs.append(list(per))
+        else:
+            groups.append(per)
+
+    runs.sort(key=lambda per: face_type(per[0]))
+    merged = []
+    for run in runs:
+        for previous in merged:
+            last = face_type(previous[-1])
+            if face_type(run[0]) == last + 1 and TILE_NUMBER[last] != 13:
+                previous.extend(run)
+                break
+        else:
+            merged.append(run)
+
+    return [tuple(run) for run in merged] + groups
+
+
+def _joinable_pairs() -> List[List[List[int]]]:
+    """Her taş tipi için onu içeren 3'lü perlerin diğer iki taşının paket maskeleri"""
+    pairs = [[] for _ in range(NUM_NORMAL)]
+    for meld in MELDS:
+        if len(meld) != 3:
+            continue
+        for t in meld:
+            pairs[t].append([UNIT[o] for o in meld if o != t])
+    return pairs
+
+
+# Bir taş bir pere girebiliyorsa onu içeren 3'lü bir per de kurulabilir
+JOINABLE_PAIRS = _joinable_pairs()
+
+# draws_to_reach: aranan en fazla çekiş sayısı
+MAX_DRAWS = 6
+
+
+class HandEvaluator:
+    """Bir elin dizilimini tutar ve taş çıkarma/ekleme senaryolarını hesaplar
+
+    Tam yeniden çözüm sadece gerektiğinde yapılır. Bir dizilimde kullanılmayan
+    taşı atmak puanı değiştirmez; bu yüzden önce elin ve her çekişin dizilimi
+    bulunur, atılan taş o dizilimde boştaysa sonuç hazırdır. Hiçbir pere
+    giremeyecek bir taşı çekmek de puanı değiştirmez. Kalan senaryolar, bu elin
+    tüm senaryolarıyla paylaşılan memo ile çözülür.
+    """
+
+    def __init__(self, counts: List[int], jokers: int, okey_active: bool = True,
+                 memo: Optional[Dict] = None):
+        self.counts = list(counts)
+        self.jokers = min(jokers, MAX_JOKERS)
+        self.okey_active = okey_active
+        self.memo = {} if memo is None else memo
+        self.score, self.pers = solve(self.counts, self.jokers, self.memo)
+        self.spare = self._spare(self.counts, self.pers)
+        self._discard_cache: Dict[int, int] = {}
+        self._draw_cache: Dict[int, Tuple[int, List[int]]] = {}
+
+    @classmethod
+    def from_arrangement(cls, counts: List[int], jokers: int, okey_active: bool, score: int,
+                         pers: List[Tuple[int, ...]]) -> 'HandEvaluator':
+        """Bilinen dizilimden (ör. kalıcı depodan) çözüm yapmadan değerlendirici"""
+        evaluator = cls.__new__(cls)
+        evaluator.counts = list(counts)
+        evaluator.jokers = min(jokers, MAX_JOKERS)
+        evaluator.okey_active = okey_active
+        evaluator.memo = {}
+        evaluator.score, evaluator.pers = score, list(pers)
+        evaluator.spare = cls._spare(evaluator.counts, evaluator.pers)
+        evaluator._discard_cache = {}
+        evaluator._draw_cache = {}
+        return evaluator
+
+    @staticmethod
+    def _spare(counts: List[int], pers: List[Tuple[int, ...]]) -> List[int]:
+        """Dizilimde kullanılmayan gerçek taş sayıları"""
+        spare = list(counts)
+        for per in pers:
+            for code in per:
+                if code < JOKER_OFFSET:
+                    spare[code] -= 1
+        return spare
+
+    @staticmethod
+    def _can_join(hand: int, jokers: int, t: int) -> bool:
+        """t taşı, elin kalanı ve jokerlerle bir 3'lü pere girebilir mi"""
+        if jokers >= 2:
+            return True
+        for a, b in JOINABLE_PAIRS[t]:
+            missing = (not hand & (7 * a)) + (not hand & (7 * b))
+            if missing <= jokers:
+                return True
+        return False
+
+    def _after(self, remove: Optional[int], add: Optional[int]) -> Tuple[List[int], int]:
+        """Değişiklik sonrası sayım vektörü ve joker sayısı"""
+        counts = list(self.counts)
+        jokers = self.jokers
+        if remove is not None and remove < NUM_NORMAL:
+            counts[remove] -= 1
+        if add is not None:
+            if add < NUM_NORMAL:
+                counts[add] += 1
+            elif self.okey_active:
+                jokers = min(jokers + 1, MAX_JOKERS)
+        return counts, jokers
+
+    def discard_score(self, t: int) -> int:
+        """t taşı atılırsa dizilim puanı"""
+        if t >= NUM_NORMAL or self.spare[t]:
+            return self.score
+        if t not in self._discard_cache:
+            counts, jokers = self._after(t, None)
+            self._discard_cache[t] = solve_score(counts, jokers, self.memo)
+        return self._discard_cache[t]
+
+    def _draw_state(self, t: int) -> Tuple[int, List[int]]:
+        """t çekilirse dizilim puanı ve boşta kalan taşlar"""
+        if t not in self._draw_cache:
+            if t < NUM_NORMAL and not self._can_join(pack_counts(self.counts), self.jokers, t):
+                spare = list(self.spare)
+                spare[t] += 1
+                self._draw_cache[t] = (self.score, spare)
+            else:
+                counts, jokers = self._after(None, t)
+                score, pers = solve(counts, jokers, self.memo)
+                self._draw_cache[t] = (score, self._spare(counts, pers))
+        return self._draw_cache[t]
+
+    def draw_score(self, t: int) -> int:
+        """t çekilirse dizilim puanı"""
+        return self._draw_state(t)[0]
+
+    def swap_score(self, remove: Optional[int], add: Optional[int]) -> int:
+        """remove atılıp add çekilirse dizilim puanı (None: o adım yok)"""
+        if add is None:
+            return self.score if remove is None else self.discard_score(remove)
+        if remove == add:
+            return self.score
+        if remove is None:
+            return self.draw_score(add)
+
+        drawn_score, drawn_spare = self._draw_state(add)
+        # Çekilen elin diziliminde boşta kalan taşı atmak puanı değiştirmez
+        if remove >= NUM_NORMAL or drawn_spare[remove]:
+            return drawn_score
+        base = self.discard_score(remove)
+        # Puan, atılmış elin puanı ile çekilmiş elin puanı arasındadır
+        if base == drawn_score:
+            return base
+
+        counts, jokers = self._after(remove, add)
+        if add < NUM_NORMAL and not self._can_join(pack_counts(counts), jokers, add):
+            return base
+        return solve_score(counts, jokers, self.memo)
+
+    def outs(self, draws: List[int], remove: Optional[int] = None) -> Dict[int, int]:
+        """Puanı artıran çekişler: {taş: çekiş sonrası puan} (remove: önce atılan taş)
+
+        Bir ek jokerle bile puan artmıyorsa hiçbir çekiş artıramaz; çekişler
+        denenmez. Atılan taş çekilen elin diziliminde boştaysa ya da çekilen
+        taş kalan ele giremiyorsa puan yeniden çözülmeden bulunur (swap_score).
+        """
+        base = self.score if remove is None else self.discard_score(remove)
+        if self._joker_bound(remove) <= base:
+            return {}
+        result = {}
+        for t in draws:
+            score = self.swap_score(remove, t)
+            if score > base:
+                result[t] = score
+        return result
+
+    def _joker_bound(self, remove: Optional[int] = None) -> int:
+        """Tek çekişle ulaşılabilecek puanın üst sınırı: bir ek jokerle puan"""
+        counts, jokers = self._after(remove, None)
+        total_value = sum(TILE_NUMBER[t] * counts[t] for t in range(NUM_NORMAL) if counts[t])
+        return _best(pack_counts(counts), jokers + 1, total_value, self.memo)
+
+    def draws_to_reach(self, target: int, remove: Optional[int] = None,
+                       max_draws: int = MAX_DRAWS) -> Optional[int]:
+        """Dizilim puanını target'a çıkarmak için gereken en az çekiş (max_draws'tan fazlaysa None)
+
+        Her çekiş bir joker gibi sayılır: k çekişle ulaşılabilen en yüksek puan,
+        k ek jokerle ulaşılan puandır (joker çekilecek taşın yerini tutar).
+        Çekişlerin arasındaki atışların boştaki taşlardan yapıldığı varsayılır;
+        görülmeyen kopya sınırı uygulanmaz. İki çekişe kadar kesindir; daha
+        fazlasında tamamı çekilecek taşlardan oluşan perler sayılmadığı için
+        üst tahmindir.
+        """
+        counts, jokers = self._after(remove, None)
+        hand = pack_counts(counts)
+        total_value = sum(TILE_NUMBER[t] * counts[t] for t in range(NUM_NORMAL) if counts[t])
+        for k in range(max_draws + 1):
+            # Alt el değerleri joker sayısıyla anahtarlandığı için memo gerçek çözümle paylaşılır
+            if _best(hand, jokers + k, total_value, self.memo) >= target:
+                return k
+        return None
+
+    def what_ifs(self, draws: List[int], candidates: Optional[List[int]] = None) -> Dict:
+        """Tüm atış ve çekiş senaryolarını tek çağrıda puanla
+
+        Dönüş: {'score', 'discard_scores': {t: puan}, 'draw_scores': {t: puan},
+        'swap_scores': [[aday × çekiş puanları]]}
+        """
+        if candidates is None:
+            candidates = [t for t in range(len(self.counts)) if self.counts[t]]
+        return {
+            'score': self.score,
+            'discard_scores': {t: self.discard_score(t) for t in candidates},
+            'draw_scores': {t: self.draw_score(t) for t in draws},
+            'swap_scores': [[self.swap_score(d, t) for t in draws] for d in candidates]
+        }
+
+
+# Analiz, öneri ve simülasyonun paylaştığı değerlendirme önbelleği
+EVALUATOR_CACHE = LRUCache.from_env()
+
+
+def hand_signature(counts: List[int], jokers: int, okey_active: bool) -> Tuple:
+    """Elin sıradan bağımsız imzası
+
+    Gösterge çözücüye sadece jokerlerin etkin olup olmadığı olarak yansır;
+    aynı taşlar farklı göstergelerle aynı dizilimi veriyorsa imza da aynıdır.
+    """
+    return tuple(counts), min(jokers, MAX_JOKERS), okey_active
+
+
+def cached_evaluator(counts: List[int], jokers: int, okey_active: bool = True,
+                     cache: Optional[LRUCache] = None,
+                     store: Optional['EvaluationStore'] = None) -> HandEvaluator:
+    """Elin değerlendiricisini önbellekten al ya da oluştur (depo verilirse önce depoya bakılır)"""
+    if cache is None:
+        cache = EVALUATOR_CACHE
+    signature = hand_signature(counts, jokers, okey_active)
+    return cache.get_or_create(signature, lambda: _new_evaluator(counts, jokers, okey_active, store))
+
+
+def _new_evaluator(counts: List[int], jokers: int, okey_active: bool,
+                   store: Optional['EvaluationStore'] = None) -> HandEvaluator:
+    """Değerlendiriciyi depodaki dizilimden ya da çözerek oluştur, arama büyüklüğünü ölçümlere yaz"""
+    signature = hand_signature(counts, jokers, okey_active)
+    if store is not None:
+        stored = store.get_arrangement(signature)
+        if stored is not None:
+            return HandEvaluator.from_arrangement(counts, jokers, okey_active, *stored)
+    evaluator = HandEvaluator(counts, jokers, okey_active)
+    okey_metrics.SEARCH_STATES.observe(len(evaluator.memo))
+    if store is not None:
+        store.put_arrangement(signature, evaluator.score, evaluator.pers)
+    return evaluator
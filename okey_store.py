@@ -0,0 +1,245 @@
+"""Tekrar eden durumlar için diskte kalıcı değerlendirme deposu (SQLite).
+
+Aynı eller (özellikle dağıtımdan hemen sonraki açılış elleri) farklı
+kullanıcılardan ve yeniden başlatmalardan sonra tekrar tekrar gelir. Depo,
+elin sıradan bağımsız imzasıyla dizilim sonucunu (puan ve perler), durum
+imzasıyla da yakınsamış simülasyon sonuçlarını tutar. Dosya worker'lar
+arasında ve dağıtımlar arasında paylaşılır.
+
+- Dizilim kaydından değerlendirici çözüm yapılmadan kurulur; atış/çekiş
+  senaryoları yine gerektiğinde çözülür.
+- Simülasyonlardan sadece süre dolmadan biten (``complete`` / ``settled``)
+  sonuçlar yazılır; süre bütçeli bir istek aynı durumun yakınsamış sonucunu
+  alır.
+- Tablo başına kayıt sayısı sınırlıdır; aşılınca en uzun süredir
+  kullanılmayan kayıtlar silinir. Kullanım zamanı okumalarda en fazla
+  ``TOUCH_INTERVAL`` saniyede bir yazılır.
+- Kaynak parmak izi (çözücü, simülasyon, rakip modeli) değişirse depo
+  açılışta boşaltılır.
+- ``warm`` worker açılışında en son kullanılan dizilimleri bellek içi
+  önbelleğe yükler.
+
+Depo isteğe bağlıdır: ``OKEY_STORE`` (dosya yolu) verilmezse kapalıdır.
+Kayıt sınırı ``OKEY_STORE_SIZE``. Veritabanı hataları isteği bozmaz; kayıt
+yok sayılır.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from okey_cache import LRUCache
+from okey_solver import HandEvaluator
+
+DEFAULT_SIZE = 100000
+TOUCH_INTERVAL = 300.0  # Kullanım zamanı en fazla bu aralıkta güncellenir (saniye)
+EVICT_INTERVAL = 256    # Süreç başına bu kadar yazmada bir boyut kontrolü
+BUSY_TIMEOUT = 1.0      # Kilitli veritabanında en fazla bekleme (saniye)
+CONVERGED = ('complete', 'settled')
+
+# Kayıtları üreten kaynaklar; biri değişirse depo boşaltılır
+SOURCES = ('okey_tiles.py', 'okey_melds.py', 'okey_solver.py', 'okey_sim.py', 'okey_infer.py',
+           'okey_store.py')
+TABLES = ('arrangements', 'simulations')
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def fingerprint(sources: Tuple[str, ...] = SOURCES) -> str:
+    """Kaynak dosyaların özeti"""
+    digest = hashlib.sha1()
+    for name in sources:
+        with open(os.path.join(_HERE, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def signature_key(signature: Tuple) -> str:
+    """El imzasının (hand_signature) metin anahtarı: sayımlar, joker sayısı, okey etkin mi"""
+    counts, jokers, okey_active = signature
+    return f"{''.join(map(str, counts))}:{jokers}:{int(okey_active)}"
+
+
+def simulation_key(player_tiles: List[int], discarded_tiles: List[int], okey_tile: Optional[int],
+                   discard_history: Optional[List[Tuple[int, int]]], num_simulations: int,
+                   seed: Optional[int], target_ci_width: Optional[float]) -> str:
+    """Simülasyon durumunun sıradan bağımsız anahtarı (süre bütçesi anahtarda yok)"""
+    state = (sorted(player_tiles), sorted(discarded_tiles), okey_tile,
+             [list(entry) for entry in discard_history or []], num_simulations, seed, target_ci_width)
+    return hashlib.sha1(json.dumps(state).encode()).hexdigest()
+
+
+def _plain(value: Any) -> Any:
+    """JSON'a yazılamayan NumPy sayılarını Python sayısına çevir"""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"JSON'a yazılamaz: {type(value).__name__}")
+
+
+class EvaluationStore:
+    """Dizilim ve simülasyon sonuçlarının kalıcı, boyut sınırlı deposu"""
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_SIZE):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> Optional['EvaluationStore']:
+        """OKEY_STORE / OKEY_STORE_SIZE'dan depo (yol verilmezse None)"""
+        path = os.environ.get('OKEY_STORE')
+        if not path:
+            return None
+        return cls(path, int(os.environ.get('OKEY_STORE_SIZE', DEFAULT_SIZE)))
+
+    def _connect(self) -> sqlite3.Connection:
+        """Sürecin bağlantısı (çatallanan süreç kendi bağlantısını açar)"""
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                                     check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+        connection.execute('CREATE TABLE IF NOT EXISTS arrangements '
+                           '(key TEXT PRIMARY KEY, score INTEGER, pers TEXT, used REAL)')
+        connection.execute('CREATE TABLE IF NOT EXISTS simulations '
+                           '(key TEXT PRIMARY KEY, result TEXT, used REAL)')
+        for table in TABLES:
+            connection.execute(f'CREATE INDEX IF NOT EXISTS {table}_used ON {table} (used)')
+
+        # Kaynaklar değiştiyse eski sonuçlar geçersiz
+        current = fingerprint()
+        row = connection.execute("SELECT value FROM meta WHERE name = 'fingerprint'").fetchone()
+        if row is None or row[0] != current:
+            for table in TABLES:
+                connection.execute(f'DELETE FROM {table}')
+            connection.execute("INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)", (current,))
+
+        self._connection, self._pid = connection, os.getpid()
+        self._evict(connection)
+        return connection
+
+    def _read(self, table: str, columns: str, key: str) -> Optional[Tuple]:
+        """Kaydı oku, gerekiyorsa kullanım zamanını güncelle (hata ya da yoksa None)"""
+        with self._lock:
+            try:
+                connection = self._connect()
+                row = connection.execute(f'SELECT {columns}, used FROM {table} WHERE key = ?',
+                                         (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                now = time.time()
+                if now - row[-1] > TOUCH_INTERVAL:
+                    connection.execute(f'UPDATE {table} SET used = ? WHERE key = ?', (now, key))
+            except sqlite3.Error:
+                self.errors += 1
+                return None
+            self.hits += 1
+            return row[:-1]
+
+    def _write(self, table: str, values: Tuple):
+        """Kaydı yaz; belli aralıklarla boyutu kontrol et"""
+        with self._lock:
+            try:
+                connection = self._connect()
+                marks = ', '.join('?' * (len(values) + 1))
+                connection.execute(f'INSERT OR REPLACE INTO {table} VALUES ({marks})', values + (time.time(),))
+                self._writes += 1
+                if self._writes % EVICT_INTERVAL == 0:
+                    self._evict(connection)
+            except sqlite3.Error:
+                self.errors += 1
+
+    def _evict(self, connection: sqlite3.Connection):
+        """Sınırı aşan tablolarda en uzun süredir kullanılmayan kayıtları sil"""
+        for table in TABLES:
+            (size,) = connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()
+            excess = size - self.max_entries
+            if excess > 0:
+                connection.execute(f'DELETE FROM {table} WHERE key IN '
+                                   f'(SELECT key FROM {table} ORDER BY used LIMIT ?)', (excess,))
+                self.evictions += excess
+
+    def get_arrangement(self, signature: Tuple) -> Optional[Tuple[int, List[Tuple[int, ...]]]]:
+        """El imzasının dizilimi: (puan, perler); yoksa None"""
+        row = self._read('arrangements', 'score, pers', signature_key(signature))
+        if row is None:
+            return None
+        return row[0], [tuple(per) for per in json.loads(row[1])]
+
+    def put_arrangement(self, signature: Tuple, score: int, pers: List[Tuple[int, ...]]):
+        """El imzasının dizilimini yaz"""
+        self._write('arrangements', (signature_key(signature), score, json.dumps(pers)))
+
+    def get_simulation(self, key: str) -> Optional[Dict]:
+        """Durumun yakınsamış simülasyon sonucu (yoksa None)"""
+        row = self._read('simulations', 'result', key)
+        return None if row is None else json.loads(row[0])
+
+    def put_simulation(self, key: str, simulation: Dict):
+        """Simülasyon sonucunu yaz (süre dolup kesilen sonuçlar yazılmaz)"""
+        if simulation.get('stopped') in CONVERGED and simulation.get('moves'):
+            self._write('simulations', (key, json.dumps(simulation, default=_plain)))
+
+    def recent_arrangements(self, limit: int) -> List[Tuple[Tuple, int, List[Tuple[int, ...]]]]:
+        """En son kullanılan dizilimler: (el imzası, puan, perler)"""
+        with self._lock:
+            try:
+                rows = self._connect().execute(
+                    'SELECT key, score, pers FROM arrangements ORDER BY used DESC LIMIT ?', (limit,)
+                ).fetchall()
+            except sqlite3.Error:
+                self.errors += 1
+                return []
+        arrangements = []
+        for key, score, pers in rows:
+            counts, jokers, okey_active = key.split(':')
+            signature = (tuple(map(int, counts)), int(jokers), okey_active == '1')
+            arrangements.append((signature, score, [tuple(per) for per in json.loads(pers)]))
+        return arrangements
+
+    def warm(self, cache: LRUCache, limit: Optional[int] = None) -> int:
+        """En son kullanılan dizilimlerden değerlendiricileri önbelleğe yükle, yüklenen sayıyı döndür"""
+        if limit is None:
+            limit = cache.maxsize
+        arrangements = self.recent_arrangements(limit)
+        # En son kullanılan, LRU sırasında en yeni olsun
+        for signature, score, pers in reversed(arrangements):
+            counts, jokers, okey_active = signature
+            cache.put(signature, HandEvaluator.from_arrangement(list(counts), jokers, okey_active, score, pers))
+        return len(arrangements)
+
+    def stats(self) -> Dict:
+        """Kayıt sayısı ve isabet/ıska sayaçları (LRUCache.stats biçimi)"""
+        with self._lock:
+            try:
+                connection = self._connect()
+                size = sum(connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                           for table in TABLES)
+            except sqlite3.Error:
+                self.errors += 1
+                size = 0
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'maxsize': self.max_entries * len(TABLES),
+            'ttl': None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': 0,
+            'errors': self.errors
+        }
@@ -0,0 +1,134 @@
+"""Taş kodlama yardımcıları.
+
+Motor içinde taşlar küçük tamsayılarla temsil edilir:
+
+- Taş tipi: ``renk × 13 + (sayı - 1)`` → 0..51, sahte okey → 52
+- Fiziksel taş: ``tip × 2 + kopya`` → 0..105
+- Sayım vektörü: 53 elemanlı liste, her tipten kaç taş olduğu
+- Joker olarak kullanılan taş: ``JOKER_OFFSET + temsil ettiği tip``
+
+JSON sözlüklerine dönüşüm sadece API sınırında (app.py) yapılır. API'nin
+kısa (compact) biçimi taşları doğrudan bu tamsayı kodlarla taşır.
+"""
+from typing import Dict, Iterable, List, Optional, Union
+
+COLORS = ['kirmizi', 'sari', 'mavi', 'siyah']
+NUMBERS = list(range(1, 14))
+SAHTE_OKEY_COLOR = 'sahte_okey'
+
+NUM_NORMAL = 52      # 4 renk × 13 sayı
+SAHTE_OKEY = 52      # Sahte okey'in taş tipi
+NUM_SLOTS = 53       # Sayım vektörünün uzunluğu
+NUM_PHYSICAL = 106   # Toplam fiziksel taş sayısı
+JOKER_OFFSET = 64    # Joker kodları: JOKER_OFFSET + tip
+
+COLOR_INDEX = {color: i for i, color in enumerate(COLORS)}
+
+# Tip → renk / sayı / anahtar tabloları (tekrar tekrar string üretmemek için)
+TILE_COLOR = [COLORS[t // 13] for t in range(NUM_NORMAL)] + [SAHTE_OKEY_COLOR]
+TILE_NUMBER = [t % 13 + 1 for t in range(NUM_NORMAL)] + [0]
+TILE_KEYS = [f"{TILE_COLOR[t]}_{TILE_NUMBER[t]}" for t in range(NUM_SLOTS)]
+
+
+def tile_index(color: str, number: int) -> int:
+    """Renk ve sayıdan taş tipini hesapla"""
+    if color == SAHTE_OKEY_COLOR:
+        return SAHTE_OKEY
+    if color not in COLOR_INDEX or number not in NUMBERS:
+        raise ValueError(f"Geçersiz taş: {color} {number}")
+    return COLOR_INDEX[color] * 13 + number - 1
+
+
+def tile_from_code(code: int) -> int:
+    """Kısa biçimdeki tamsayı kodu doğrula (0..52 ya da JOKER_OFFSET + 0..51)"""
+    if isinstance(code, bool) or not (0 <= code <= SAHTE_OKEY or JOKER_OFFSET <= code < JOKER_OFFSET + NUM_NORMAL):
+        raise ValueError(f"Geçersiz taş kodu: {code}")
+    return code
+
+
+def parse_tile(tile: Union[Dict, int]) -> int:
+    """JSON taşını (sözlük ya da kısa kod) tamsayı koda çevir"""
+    if isinstance(tile, int):
+        return tile_from_code(tile)
+    index = tile_index(tile.get('color'), tile.get('number'))
+    if tile.get('is_okey') and index != SAHTE_OKEY:
+        return JOKER_OFFSET + index
+    return index
+
+
+def parse_tiles(tiles: Iterable[Union[Dict, int]]) -> List[int]:
+    """JSON taş listesini tamsayı kodlara çevir"""
+    return [parse_tile(tile) for tile in tiles]
+
+
+def parse_indicator(indicator: Optional[Union[Dict, int]]) -> Optional[int]:
+    """Gösterge taşını (sözlük ya da kısa kod) çevir (boş gösterge → None)"""
+    if isinstance(indicator, int):
+        index = face_type(tile_from_code(indicator))
+    elif not indicator:
+        return None
+    else:
+        index = tile_index(indicator.get('color'), indicator.get('number'))
+    if index == SAHTE_OKEY:
+        raise ValueError("Sahte okey gösterge olamaz")
+    return index
+
+
+def face_type(code: int) -> int:
+    """Kodun yüz değerindeki taş tipini döndür"""
+    return code - JOKER_OFFSET if code >= JOKER_OFFSET else code
+
+
+def is_joker(code: int) -> bool:
+    """Kod joker olarak kullanılan bir taşı mı gösteriyor"""
+    return code >= JOKER_OFFSET
+
+
+def tile_key(code: int) -> str:
+    """Kodun 'renk_sayı' anahtarını döndür"""
+    return TILE_KEYS[face_type(code)]
+
+
+def _tile_dict(code: int) -> Dict:
+    t = face_type(code)
+    tile = {'color': TILE_COLOR[t], 'number': TILE_NUMBER[t]}
+    if code >= JOKER_OFFSET:
+        tile['is_okey'] = True
+    return tile
+
+
+# Kod → JSON taşı; yanıtlarda aynı sözlükler paylaşılır (değiştirilmemeli)
+TILE_DICTS = {code: _tile_dict(code) for code in list(range(NUM_SLOTS)) +
+              list(range(JOKER_OFFSET, JOKER_OFFSET + NUM_SLOTS))}
+
+
+def tile_to_dict(code: int) -> Dict:
+    """Tamsayı kodu JSON taşına çevir (hazır tablodan)"""
+    return TILE_DICTS[code]
+
+
+def tiles_to_dicts(codes: Iterable[int]) -> List[Dict]:
+    """Kod listesini JSON taş listesine çevir"""
+    return [tile_to_dict(code) for code in codes]
+
+
+def to_counts(codes: Iterable[int]) -> List[int]:
+    """Kod listesinden 53 elemanlı sayım vektörü oluştur"""
+    counts = [0] * NUM_SLOTS
+    for code in codes:
+        counts[face_type(code)] += 1
+    return counts
+
+
+def counts_to_tiles(counts: List[int]) -> List[int]:
+    """Sayım vektörünü sıralı taş tipi listesine çevir"""
+    tiles = []
+    for t, count in enumerate(counts):
+        tiles.extend([t] * count)
+    return tiles
+
+
+def okey_index(indicator: int) -> int:
+    """Gösterge tipinden okey taşının tipini hesapla (13'ten sonra 1)"""
+    color, number = divmod(indicator, 13)
+    return color * 13 + (number + 1) % 13
@@ -0,0 +1,99 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+import asgi
+from okey_encoding import dumps
+
+
+def test_limiter_rejects_when_queue_is_full():
+    """Sınır ve bekleme kuyruğu doluyken gelen istek Overloaded alır"""
+    async def scenario():
+        limiter = asgi.EndpointLimiter(1, max_waiting=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter:
+                await release.wait()
+
+        running = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        with pytest.raises(asgi.Overloaded):
+            async with limiter:
+                pass
+        release.set()
+        await asyncio.gather(running, waiting)
+        assert limiter.waiting == 0
+
+    asyncio.run(scenario())
+
+
+def _failing_lines(data):
+    yield dumps({'n': 1}) + b'\n'
+    raise RuntimeError('motor hatası')
+
+
+@pytest.mark.parametrize('accept', [None, b'gzip'])
+def test_failing_stream_ends_with_error_line(monkeypatch, accept):
+    """Akış yarıda hata verirse tek yanıt başlığı gider, akış hata satırıyla biter"""
+    monkeypatch.setitem(asgi.ROUTES, '/api/fail', (lambda data: asgi.CHEAP, _failing_lines, True))
+    monkeypatch.setitem(asgi.CONCURRENCY_LIMITS, '/api/fail', 1)
+    app = asgi.OkeyASGI()
+    sent = []
+    messages = [{'type': 'http.request', 'body': b'{}'}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(10)
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    headers = [(b'accept-encoding', accept)] if accept else []
+    asyncio.run(app({'type': 'http', 'path': '/api/fail', 'method': 'POST', 'headers': headers},
+                    receive, send))
+
+    starts = [m for m in sent if m['type'] == 'http.response.start']
+    bodies = [m for m in sent if m['type'] == 'http.response.body']
+    assert len(starts) == 1 and starts[0]['status'] == 200
+    assert not bodies[-1].get('more_body', False)
+    body = b''.join(m.get('body', b'') for m in bodies)
+    if accept:
+        body = gzip.decompress(body)
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert lines == [{'n': 1}, {'error': 'motor hatası'}]
+
+
+def _lines(data):
+    for n in range(3):
+        yield dumps({'n': n}) + b'\n'
+
+
+def test_send_failure_mid_stream_does_not_restart_response(monkeypatch):
+    """Başlık gittikten sonra gönderim hata verirse ikinci yanıt başlatılmaz"""
+    monkeypatch.setitem(asgi.ROUTES, '/api/lines', (lambda data: asgi.CHEAP, _lines, True))
+    monkeypatch.setitem(asgi.CONCURRENCY_LIMITS, '/api/lines', 1)
+    app = asgi.OkeyASGI()
+    sent = []
+    messages = [{'type': 'http.request', 'body': b'{}'}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(10)
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.body':
+            raise ConnectionResetError()
+        sent.append(message)
+
+    asyncio.run(app({'type': 'http', 'path': '/api/lines', 'method': 'POST', 'headers': []}, receive, send))
+    assert [m['type'] for m in sent] == ['http.response.start']
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from okey_ai import OkeyAI
+from okey_cache import LRUCache
+from okey_opening import OPEN_THRESHOLD, PAIRS_TO_OPEN, can_open_with_pers, cheapest_per_opening
+from okey_tiles import JOKER_OFFSET, NUM_NORMAL, TILE_NUMBER, face_type, okey_index
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_cheapest_opening_agrees_with_can_open(seed):
+    """En ucuz per seçimi ancak eşiğe ulaşılabiliyorsa bulunur ve eşiği geçer"""
+    rng = random.Random(seed)
+    counts = [0] * (NUM_NORMAL + 1)
+    for t in rng.sample([t for t in range(NUM_NORMAL) for _ in range(2)], 21):
+        counts[t] += 1
+    jokers = seed % 3
+    found = cheapest_per_opening(counts, jokers)
+    assert (found is not None) == can_open_with_pers(counts, jokers)
+    if found is not None:
+        score, pers = found
+        assert score >= OPEN_THRESHOLD
+        assert score == sum(TILE_NUMBER[face_type(code)] for per in pers for code in per)
+
+
+def test_opening_search_prefers_cheaper_route():
+    """Per yolu açamayan çiftli elde çift yolu seçilir, yere konanlar elden düşer"""
+    tiles = [0, 0, 14, 14, 28, 28, 42, 42, 4, 4, 18, 31, 45, 9]
+    result = OkeyAI().opening_search(tiles)
+    assert not result['pers']['can_open']
+    assert result['best'] == 'pairs'
+    assert len(result['pairs']['pairs']) == PAIRS_TO_OPEN
+    assert result['pairs']['tiles_used'] == 2 * PAIRS_TO_OPEN
+    assert len(result['pairs']['remaining']) == len(tiles) - 2 * PAIRS_TO_OPEN
+
+
+def test_pairs_route_completes_with_joker():
+    """Dört çift ve bir okey: okey en yüksek tek taşla çift olur"""
+    indicator = 50
+    tiles = [0, 0, 14, 14, 28, 28, 42, 42, 10, 24, JOKER_OFFSET + okey_index(indicator)]
+    pairs = OkeyAI().opening_search(tiles, indicator)['pairs']
+    assert pairs['can_open']
+    assert [24, JOKER_OFFSET + 24] in pairs['pairs']
+
+
+def test_can_open_does_not_touch_cache_counters():
+    """Açma kontrolü önbelleği sadece okur; isabet oranı değişmez"""
+    cache = LRUCache(8)
+    engine = OkeyAI(evaluation_cache=cache)
+    tiles = [0, 1, 2, 13, 14, 15, 26, 27, 28, 39, 40, 41, 9, 22]
+    engine.can_open(tiles)
+    assert (cache.hits, cache.misses) == (0, 0)
+    engine.analyze_hand(tiles)
+    before = (cache.hits, cache.misses)
+    engine.can_open(tiles)
+    assert (cache.hits, cache.misses) == before
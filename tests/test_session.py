@@ -0,0 +1,62 @@
+import pytest
+
+from okey_ai import OkeyAI
+from okey_session import SessionNotFound, SessionStore
+from okey_tiles import to_counts
+
+TILES = [0, 1, 2, 13, 26, 39, 5, 6, 7, 20, 21, 22, 40, 41]
+
+
+def test_session_round_trip():
+    """Açılan oturum kimliğiyle bulunur, kapatılınca SessionNotFound"""
+    store = SessionStore(limit=4, ttl=None)
+    session_id, session = store.create(TILES, [3], indicator=10)
+    assert store.get(session_id) is session
+    store.delete(session_id)
+    with pytest.raises(SessionNotFound):
+        store.get(session_id)
+    with pytest.raises(SessionNotFound):
+        store.delete(session_id)
+
+
+def test_events_update_state():
+    """Olaylar eli, atılanları ve görülmeyen sayılarını günceller"""
+    _, session = SessionStore(ttl=None).create(TILES, [3], indicator=10)
+    unseen = session.state()['unseen']
+    session.apply([{'type': 'draw', 'tile': 30},
+                   {'type': 'discard', 'tile': 0},
+                   {'type': 'opponent_discard', 'tile': 45, 'player': 1}])
+    assert session.hand_counts == to_counts(session.tiles)
+    assert 30 in session.tiles and 0 not in session.tiles
+    assert session.discard_history == [(1, 45)]
+    assert session.state()['unseen'] == unseen - 2
+
+
+def test_invalid_event_rolls_back():
+    """Olaylardan biri geçersizse hiçbiri uygulanmaz, önbellek boşaltılır"""
+    _, session = SessionStore(ttl=None).create(TILES, [3], indicator=10)
+    before = (list(session.tiles), list(session.discarded_tiles), list(session.hand_counts),
+              list(session.model.remaining))
+    session.cached('analysis', lambda: {'stale': True})
+    with pytest.raises(ValueError):
+        session.apply([{'type': 'draw', 'tile': 30}, {'type': 'discard', 'tile': 50}])
+    assert (session.tiles, session.discarded_tiles, session.hand_counts, session.model.remaining) == before
+    assert session.cached('analysis', lambda: {'stale': False}) == {'stale': False}
+
+
+def test_session_turn_matches_stateless_after_pickup():
+    """Yerden alınan atıştan sonra oturumun turu durumsuz turla aynı"""
+    _, session = SessionStore(ttl=None).create(TILES, [3], indicator=10)
+    session.apply([{'type': 'opponent_discard', 'tile': 8, 'player': 0},
+                   {'type': 'opponent_discard', 'tile': 23, 'player': 0},
+                   {'type': 'discard', 'tile': 0},
+                   {'type': 'opponent_discard', 'tile': 42, 'player': 2},
+                   {'type': 'draw', 'tile': 42, 'from_discard': True}])
+    engine = OkeyAI()
+    stateful = engine.play_turn(session.tiles, session.discarded_tiles, session.indicator,
+                                discard_history=session.discard_history,
+                                model=session.model, player_counts=session.hand_counts)
+    stateless = engine.play_turn(list(session.tiles), list(session.discarded_tiles), session.indicator,
+                                 discard_history=list(session.discard_history))
+    assert session.discard_history == [(0, 8), (0, 23)]
+    assert stateful == stateless
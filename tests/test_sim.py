@@ -0,0 +1,55 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from okey_sim import ROUND_SHARDS, _accumulate, _empty_totals, _wilson_ci, simulate_discards, summarize
+from okey_tiles import to_counts
+
+INDICATOR = 5
+
+
+def _setup():
+    tiles = random.Random(3).sample([t for t in range(52) if t not in (INDICATOR, INDICATOR + 1)], 14)
+    return tiles, to_counts(tiles), sorted(set(tiles))[:5]
+
+
+def _simulate(**kwargs):
+    tiles, counts, candidates = _setup()
+    return simulate_discards(tiles, [], counts, 0, candidates, INDICATOR, num_simulations=6000,
+                             seed=11, target_ci_width=1.0, **kwargs)
+
+
+def test_seeded_simulation_is_deterministic():
+    """Aynı tohum aynı sonucu verir"""
+    first = _simulate()
+    # Birden çok eleme turu oynanmış olmalı
+    assert first['num_shards'] > ROUND_SHARDS
+    assert _simulate() == first
+
+
+@pytest.mark.parametrize('workers', [1, 2, 3])
+def test_result_does_not_depend_on_pool_size(workers):
+    """Eleme noktaları ve sonuç işçi sayısından bağımsız"""
+    base = _simulate()
+    with ThreadPoolExecutor(workers) as executor:
+        result = _simulate(executor=executor, table_chunks=workers)
+    assert result['moves'] == base['moves']
+    assert result['num_shards'] == base['num_shards']
+    assert result['stopped'] == base['stopped']
+
+
+@pytest.mark.parametrize('successes, n', [(0, 1), (1, 1), (0, 50), (50, 50), (3, 10)])
+def test_wilson_interval_is_clamped(successes, n):
+    """Wilson aralığı [0, 1] içinde kalır ve oranı kapsar"""
+    low, high = _wilson_ci(successes, n)
+    assert 0.0 <= low <= successes / n <= high <= 1.0
+
+
+def test_ties_keep_candidate_order():
+    """Puanı, oranı ve tehlikesi eşit adaylar çağıranın verdiği sırada kalır"""
+    totals = _empty_totals(3)
+    _accumulate(totals, {'n': 10, 'score_sum': np.full(3, 500.0), 'score_sq_sum': np.full(3, 25000.0),
+                         'wins': np.zeros(3, dtype=np.int64), 'danger': np.full(3, 2)}, [0, 1, 2])
+    assert [m['move'] for m in summarize(totals, [30, 4, 17])] == [30, 4, 17]
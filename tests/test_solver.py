@@ -0,0 +1,65 @@
+import random
+from collections import Counter
+from functools import lru_cache
+from typing import Tuple
+
+import pytest
+
+from okey_melds import MELDS
+from okey_solver import solve
+from okey_tiles import NUM_NORMAL, TILE_NUMBER, face_type, is_joker
+
+
+@lru_cache(maxsize=None)
+def _brute_force(counts: Tuple[int, ...], jokers: int) -> int:
+    """En düşük taşı ya boşta bırak ya da onu içeren her pere (eksikleri jokerle) koy"""
+    t = next((t for t in range(NUM_NORMAL) if counts[t]), None)
+    if t is None:
+        return 0
+    rest = list(counts)
+    rest[t] -= 1
+    best = _brute_force(tuple(rest), jokers)
+    for meld in MELDS:
+        if t not in meld:
+            continue
+        best = max(best, _fill(list(rest), jokers, [u for u in meld if u != t], TILE_NUMBER[t]))
+    return best
+
+
+def _fill(counts, jokers: int, positions, score: int) -> int:
+    """Perin kalan pozisyonlarını gerçek taş ya da jokerle doldurmanın her yolu"""
+    if not positions:
+        return score + _brute_force(tuple(counts), jokers)
+    u, rest = positions[0], positions[1:]
+    best = -1
+    if counts[u]:
+        counts[u] -= 1
+        best = _fill(counts, jokers, rest, score + TILE_NUMBER[u])
+        counts[u] += 1
+    if jokers:
+        best = max(best, _fill(counts, jokers - 1, rest, score + TILE_NUMBER[u]))
+    return best
+
+
+def _random_hand(rng: random.Random, size: int):
+    pool = [t for t in range(NUM_NORMAL) for _ in range(2)]
+    counts = [0] * (NUM_NORMAL + 1)
+    for t in rng.sample(pool, size):
+        counts[t] += 1
+    return counts
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_solve_matches_brute_force(seed):
+    """Çözücünün puanı kaba kuvvetle aynı, perleri elle tutarlı"""
+    rng = random.Random(seed)
+    jokers = seed % 3
+    counts = _random_hand(rng, rng.randint(8, 14) - jokers)
+    score, pers = solve(counts, jokers)
+    assert score == _brute_force(tuple(counts[:NUM_NORMAL]), jokers)
+
+    real = Counter(code for per in pers for code in per if not is_joker(code))
+    assert all(real[t] <= counts[t] for t in real)
+    assert sum(is_joker(code) for per in pers for code in per) <= jokers
+    assert all(tuple(face_type(code) for code in per) in MELDS for per in pers)
+    assert score == sum(TILE_NUMBER[face_type(code)] for per in pers for code in per)
@@ -0,0 +1,52 @@
+import okey_store
+from okey_cache import LRUCache
+from okey_solver import hand_signature, solve
+from okey_store import EvaluationStore
+
+COUNTS = [1, 1, 1] + [0] * 10 + [1] + [0] * 12 + [1] + [0] * 12 + [1] + [0] * 13
+SIMULATION = {'stopped': 'complete', 'moves': [{'move': 3, 'avg_score': 12.5}], 'num_simulations': 2000}
+
+
+def test_arrangement_round_trip(tmp_path):
+    """Yazılan dizilim yeni bağlantıdan aynen okunur ve önbelleği ısıtır"""
+    signature = hand_signature(COUNTS, 1, True)
+    score, pers = solve(COUNTS, 1)
+    EvaluationStore(str(tmp_path / 'store.db')).put_arrangement(signature, score, pers)
+
+    store = EvaluationStore(str(tmp_path / 'store.db'))
+    assert store.get_arrangement(signature) == (score, pers)
+    cache = LRUCache(8)
+    assert store.warm(cache) == 1
+    assert cache.get(signature).score == score
+
+
+def test_only_converged_simulations_are_stored(tmp_path):
+    """Süre dolup kesilen simülasyon yazılmaz"""
+    store = EvaluationStore(str(tmp_path / 'store.db'))
+    store.put_simulation('done', SIMULATION)
+    store.put_simulation('cut', dict(SIMULATION, stopped='time_budget'))
+    assert store.get_simulation('done') == SIMULATION
+    assert store.get_simulation('cut') is None
+
+
+def test_eviction_keeps_most_recent(tmp_path, monkeypatch):
+    """Sınır aşılınca en uzun süredir kullanılmayan kayıtlar silinir"""
+    monkeypatch.setattr(okey_store, 'EVICT_INTERVAL', 1)
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(okey_store.time, 'time', lambda: next(clock))
+    store = EvaluationStore(str(tmp_path / 'store.db'), max_entries=2)
+    for key in ('a', 'b', 'c'):
+        store.put_simulation(key, SIMULATION)
+    assert store.get_simulation('a') is None
+    assert store.get_simulation('b') == store.get_simulation('c') == SIMULATION
+    assert store.evictions == 1
+
+
+def test_fingerprint_change_clears_store(tmp_path, monkeypatch):
+    """Kaynak parmak izi değişince açılışta depo boşaltılır"""
+    path = str(tmp_path / 'store.db')
+    EvaluationStore(path).put_simulation('key', SIMULATION)
+    assert EvaluationStore(path).get_simulation('key') == SIMULATION
+
+    monkeypatch.setattr(okey_store, 'fingerprint', lambda: 'changed')
+    assert EvaluationStore(path).get_simulation('key') is None